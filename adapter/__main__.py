@@ -1,43 +1,95 @@
-
 """
 
 This script creates a connection between the Debugger and Foundry's Nuke for debugging Python 2.
 
 """
 
-from util import (Queue, log, run, dirname, debugpy_path, join, split,
-                  basename, ATTACH_TEMPLATE, ATTACH_ARGS, RUN_TEMPLATE, 
-                  INITIALIZE_RESPONSE, NUKE_CMD_TEMPLATE, CONTENT_HEADER)
+from util import (log, ERROR, WARNING, dirname, debugpy_path, modules_path, split, basename,
+                  frame_message, peek, FrameParser, RelayStats,
+                  ATTACH_TEMPLATE, ATTACH_ARGS, RUN_TEMPLATE, RUN_INCREMENTAL_TEMPLATE,
+                  INITIALIZE_RESPONSE,
+                  READ_CHUNK_SIZE, CONNECT_TIMEOUT, CONNECT_ATTEMPTS,
+                  CONNECT_INITIAL_DELAY, CONNECT_MAX_DELAY, REQUEST_TIMINGS)
 from interface import DebuggerInterface
-from tempfile import gettempdir
-import socket
+from nuke_channel import NukeChannel, NukeCommandError, PRIORITY_CONTROL
+from response_cache import ResponseCache
+from request_timings import RequestTimings, TIMINGS_EVENT
+import traceback
+import asyncio
+import time
 import json
 
 interface = None
+nuke = None
+cache = ResponseCache()
+timings = RequestTimings() if REQUEST_TIMINGS else None
 
 processed_seqs = []
 run_code = ""
 attach_code = ""
 last_seq = -1
 
-debugpy_send_queue = Queue()
-debugpy_socket = None
+debugpy_writer = None
+debugpy_backlog = []  # messages from the debugger received before debugpy is connected
+
+tasks = set()
 
 
 def main():
     """
-    Initializes a python script through nuke, starts the thread to send information to debugger,
-    then remains in a loop reading messages from debugger.
+    Creates the adapter's event loop and runs it until the debugger closes stdin.
+    Messages from the debugger are read on the loop, and debugpy's connection
+    is started on it once the debugger asks to attach.
     """
 
-    global interface
+    global interface, nuke
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
 
     # Create and start the interface with the debugger
     interface = DebuggerInterface(on_receive=on_receive_from_debugger)
-    interface.start()
+    nuke = NukeChannel()
+
+    try:
+        loop.run_until_complete(interface.serve())
+    finally:
+        # Close the connections and cancel whatever is still pending
+        if debugpy_writer:
+            debugpy_writer.close()
+        nuke.close()
+        for task in list(tasks):
+            task.cancel()
+        if tasks:
+            loop.run_until_complete(asyncio.wait(tasks))
+        loop.close()
+        if timings is not None:
+            timings.dump()
+        RelayStats.dump()
+
+
+def spawn(coro):
+    """
+    Schedules a coroutine to run on the loop in the background.
+    """
+
+    task = asyncio.ensure_future(coro)
+    tasks.add(task)
+    task.add_done_callback(_on_task_done)
+    return task
+
 
+def _on_task_done(task):
+    tasks.discard(task)
 
-def on_receive_from_debugger(message):
+    if not task.cancelled() and task.exception():
+        # Writing exceptions to stderr shows the text in the Debugger's output.
+        e = task.exception()
+        log("Exception occurred: \n\n" + str(e), level=ERROR)
+        traceback.print_exception(type(e), e, e.__traceback__)
+
+
+async def on_receive_from_debugger(message):
     """
     Intercept the initialize and attach requests from the debugger
     while debugpy is being set up
@@ -45,6 +97,8 @@ def on_receive_from_debugger(message):
 
     global last_seq, avoiding_continue_stall
 
+    received = time.perf_counter()
+
     # Load message contents into a dictionary
     contents = json.loads(message)
     last_seq = contents.get('seq')
@@ -53,15 +107,15 @@ def on_receive_from_debugger(message):
 
     # Get the type of command the debugger sent
     cmd = contents['command']
-    
+
     if cmd == 'initialize':
         # Run init request once nuke connection is established and send success response to the debugger
         interface.send(json.dumps(json.loads(INITIALIZE_RESPONSE)))  # load and dump to remove indents
         processed_seqs.append(contents['seq'])
-    
+
     elif cmd == 'attach':
         # time to attach to nuke
-        run(attach_to_nuke, (contents,))
+        spawn(attach_to_nuke(contents))
 
         # Change arguments to valid ones for debugpy
         config = contents['arguments']
@@ -78,15 +132,26 @@ def on_receive_from_debugger(message):
         message = json.dumps(contents)  # update contents to reflect new args
 
         log("New attach arguments loaded:", new_args)
-    
+
     elif cmd == 'continue':
         avoiding_continue_stall = True
 
-    # Then just put the message in the debugpy queue
-    debugpy_send_queue.put(message)
+    # Answer repeated requests while stopped without asking debugpy
+    response = cache.on_request(contents)
+    if response is not None:
+        log("Answered from the cache ({} hits, {} misses):".format(cache.hits, cache.misses), message)
+        interface.send(json.dumps(response))
+        return
+
+    # Then just pass the message on to debugpy
+    if timings is not None:
+        timings.on_request(contents['seq'], cmd, received)
+    await send_to_debugpy(message)
+    if timings is not None:
+        timings.on_relayed(contents['seq'])
 
 
-def attach_to_nuke(contents):
+async def attach_to_nuke(contents):
     """
     Defines commands to send to Nuke, and sends the attach code to it.
     """
@@ -98,23 +163,29 @@ def attach_to_nuke(contents):
     # while we set up the debugpy in the background
     attach_code = ATTACH_TEMPLATE.format(
         debugpy_path=debugpy_path,
+        modules_path=modules_path,
         hostname=config['debugpy']['host'],
         port=int(config['debugpy']['port']),
         interpreter=config['interpreter'],
+        request_timings=REQUEST_TIMINGS,
     )
 
-    # Copy code to temporary file and start a Nuke console with it
-    try: 
-        send_code_to_nuke(attach_code)
+    # Run the attach code in Nuke, and wait for it to report debugpy is listening
+    started = time.perf_counter()
+    try:
+        response = await nuke.execute(attach_code, priority=PRIORITY_CONTROL)
+    except NukeCommandError as e:
+        # Nuke is running, but the attach code failed there
+        raise Exception("Could not start debugpy in Nuke:\n\n" + str(e))
     except Exception as e:
         # Raising exceptions shows the text in the Debugger's output.
         # Raise an error to show a potential solution to this problem.
-        log("Exception occurred: \n\n" + str(e))
+        log("Exception occurred: \n\n" + str(e), level=ERROR)
         raise Exception(
             """
-            
-            
-            
+
+
+
                         Could not connect to Nuke.
 
                 Please ensure Nuke is running. If this is your first time
@@ -122,163 +193,167 @@ def attach_to_nuke(contents):
             """
         )
 
-    run_code = RUN_TEMPLATE.format(
+    log("debugpy {} in Nuke after {:.1f} ms".format(
+        (response.get('result') or {}).get('listening', 'started'), elapsed_ms(started)))
+
+    # Either reload the whole module on every run, or only what changed since the last one
+    template = RUN_INCREMENTAL_TEMPLATE if config.get('reload') == 'incremental' else RUN_TEMPLATE
+    run_code = template.format(
         hostname=config['debugpy']['host'],
         port=int(config['debugpy']['port']),
         dir=dirname(config['program']),
         file_name=split(config['program'])[1][:-3] or basename(split(config['program'])[0])[:-3]
     )
 
-    # Then start the Nuke debugging threads
-    run(start_debugging, ((config['debugpy']['host'], int(config['debugpy']['port'])),))
+    # Then start debugging Nuke
+    await start_debugging((config['debugpy']['host'], int(config['debugpy']['port'])), started)
 
 
-def send_code_to_nuke(code):
+async def start_debugging(address, started=None):
     """
-    Copies code to temporary file, formats execution template code with file location, 
-    and sends execution code to Nuke via socket connection.
-
-    Inspired by send_to_nuke.py at https://github.com/tokejepsen/atom-foundry-nuke
+    Connects to debugpy in Nuke, sends it what the debugger sent so far,
+    then reads its messages until the connection closes
     """
 
-    # Create a temporary file, keeping its path, and
-    # populate it with the given code to run
-    filepath = join(gettempdir(), 'temp.py')
-    with open(filepath, "w") as file:
-        file.write(code)
+    global debugpy_writer
 
-    # throws error if it fails
-    log("Sending code to Nuke...")
+    log("Connecting to " + address[0] + ":" + str(address[1]))
 
-    # Format the code wrapper with the file's path
-    # This wrapper allows the code to execute in its own namespace
-    cmd = NUKE_CMD_TEMPLATE.format(filepath)
+    # Open the stream used to communicate with debugpy
+    connecting = time.perf_counter()
+    reader, writer, attempts = await connect_with_backoff(address)
 
-    ADDR = ("localhost", 8888)
+    log("Successfully connected to Nuke for debugging after {} attempt(s) in {:.1f} ms. Starting...".format(
+        attempts, elapsed_ms(connecting)))
+    if started is not None:
+        log("Attached to Nuke in {:.1f} ms".format(elapsed_ms(started)))
 
-    # Create a socket and connect to server in Nuke
-    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    client.connect(ADDR)
+    # From now on messages are written straight to debugpy
+    debugpy_writer = writer
+    for message in debugpy_backlog:
+        writer.write(frame_message(message))
+        log('Sent to debugpy:', message)
+    del debugpy_backlog[:]
 
-    # Send the formatted template to the server
-    client.send(cmd.encode("UTF-8"))
-    client.close()
-    
-    log("Success")
+    try:
+        await writer.drain()
+        await read_debugpy_messages(reader)
+    finally:
+        debugpy_writer = None
+        writer.close()
 
 
-def start_debugging(address):
+async def connect_with_backoff(address):
     """
-    Connects to debugpy in Nuke, then starts the threads needed to
-    send and receive information from it
+    Opens a connection to the address, retrying failed attempts after
+    exponentially growing delays. Returns the reader and writer,
+    and the number of attempts it took.
     """
 
-    log("Connecting to " + address[0] + ":" + str(address[1]))
+    delay = CONNECT_INITIAL_DELAY
+
+    for attempt in range(1, CONNECT_ATTEMPTS + 1):
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(*address), CONNECT_TIMEOUT)
+            return reader, writer, attempt
+        except (OSError, asyncio.TimeoutError) as e:
+            if attempt == CONNECT_ATTEMPTS:
+                raise
+            log("Connection attempt {} failed ({}), retrying in {:.0f} ms".format(attempt, e, delay * 1000),
+                level=WARNING)
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, CONNECT_MAX_DELAY)
 
-    # Create the socket used to communicate with debugpy
-    global debugpy_socket
-    debugpy_socket = socket.create_connection(address)
 
-    log("Successfully connected to Nuke for debugging. Starting...")
+def elapsed_ms(since):
+    return (time.perf_counter() - since) * 1000
 
-    # Start a thread that sends requests to debugpy
-    run(debugpy_send_loop)
 
-    fstream = debugpy_socket.makefile()
+async def read_debugpy_messages(reader):
+    """
+    Reads debugpy's output and awaits on_receive_from_debugpy with the raw
+    body of every complete message, as bytes.
+    """
 
+    parser = FrameParser()
     while True:
         try:
-            # Wait for the CONTENT_HEADER to show up,
-            # then get the length of the content following it
-            content_length = 0
-            while True:
-                header = fstream.readline()
-                if header:
-                    header = header.strip()
-                if not header:
-                    break
-                if header.startswith(CONTENT_HEADER):
-                    content_length = int(header[len(CONTENT_HEADER):])
-
-            # Read the content of the response, then call the callback
-            if content_length > 0:
-                total_content = ""
-                while content_length > 0:
-                    content = fstream.read(content_length)
-                    content_length -= len(content)
-                    total_content += content
-
-                if content_length == 0:
-                    message = total_content
-                    on_receive_from_debugpy(message)
+            data = await reader.read(READ_CHUNK_SIZE)
+            if not data:
+                log("Nuke's debugpy closed the connection.")
+                return
 
-        except Exception as e:
-            # Problem with socket. Close it then return
+            for message in parser.feed(data):
+                await on_receive_from_debugpy(message)
 
-            log("Failure reading Nuke's debugpy output: \n" + str(e))
-            debugpy_socket.close()
-            break
+        except Exception as e:
+            # Problem with the connection. Return so that it gets closed
+            log("Failure reading Nuke's debugpy output: \n" + str(e), level=ERROR)
+            return
 
 
-def debugpy_send_loop():
+async def send_to_debugpy(message):
     """
-    The loop that waits for items to show in the send queue and prints them.
-    Blocks until an item is present
+    Writes a message to debugpy, or keeps it until debugpy is connected.
     """
 
-    while True:
-        # Get the first message off the queue
-        msg = debugpy_send_queue.get()
-        if msg is None:
-            # get() is blocking, so None means it was intentionally
-            # added to the queue to stop this loop, or that a problem occurred
-            return
-        else:
-            try:
-                # First send the content header with the length of the message, then send the message
-                debugpy_socket.send(bytes(CONTENT_HEADER + '{}\r\n\r\n'.format(len(msg)), 'UTF-8'))
-                debugpy_socket.send(msg.encode('UTF-8'))
-                log('Sent to debugpy:', msg)
-            except OSError:
-                log("Debug socket closed.")
-                return
-            except Exception as e:
-                log("Error sending to debugpy: " + str(e))
-                return
+    if debugpy_writer is None:
+        debugpy_backlog.append(message)
+        return
 
+    try:
+        debugpy_writer.write(frame_message(message))
+        await debugpy_writer.drain()
+        log('Sent to debugpy:', message)
+    except OSError:
+        log("Debug socket closed.")
+    except Exception as e:
+        log("Error sending to debugpy: " + str(e), level=ERROR)
 
-def on_receive_from_debugpy(message):
+
+async def on_receive_from_debugpy(message):
     """
     Handles messages going from debugpy to the debugger
     """
 
-    global inv_seq, artificial_seqs, waiting_for_pause_event, avoiding_continue_stall, stashed_event
+    # Peek at the fields needed to route the message instead of decoding all of it
+    msg_type = peek(message, 'type')
 
-    # Load the message into a dictionary
-    c = json.loads(message)
-    seq = int(c.get('request_seq', -1))  # a negative seq will never occur
-    cmd = c.get('command', '')
+    if msg_type == 'event':
+        event = peek(message, 'event')
+        if event == TIMINGS_EVENT and timings is not None:
+            timings.on_timings_event(message)
+            return
+        cache.on_event(event)
+
+    elif msg_type == 'response':
+        cache.on_response(message)
+        if timings is not None:
+            timings.on_response(message)
+        cmd = peek(message, 'command')
+
+        if cmd == 'configurationDone':
+            # When Debugger & debugpy are done setting up, send the code to debug
+            log('Received from debugpy:', message)
+            interface.send(message)
+            # Don't wait for the code to finish running, as it may stop on breakpoints
+            spawn(nuke.execute(run_code))
+            return
 
-    if cmd == 'configurationDone':
-        # When Debugger & debugpy are done setting up, send the code to debug
-        log('Received from debugpy:', message)
-        interface.send(message)
-        send_code_to_nuke(run_code)
-        return
+        if cmd == 'initialize' and json.loads(message).get('request_seq') in processed_seqs:
+            # Should only be the initialization request
+            log("Already processed, debugpy response is:", message)
+            return
 
-    # Send responses and events to debugger
-    if seq in processed_seqs:
-        # Should only be the initialization request
-        log("Already processed, debugpy response is:", message)
-    else:
-        # Send the message normally to the debugger
-        log('Received from debugpy:', message)
-        interface.send(message)
+    # Send the message normally to the debugger
+    log('Received from debugpy:', message)
+    interface.send(message)
 
 
 if __name__ == '__main__':
     try:
         main()
     except Exception as e:
-        log(str(e))
+        log(str(e), level=ERROR)
         raise e
@@ -1,92 +1,112 @@
 
 from sys import stdin, stdout
-from util import CONTENT_HEADER, run, log, Queue
+from util import READ_CHUNK_SIZE, FrameParser, run, log, ERROR, frame_message
+import asyncio
+import sys
 
 
 class DebuggerInterface:
     """
-    Provides a simple interface to capture and send 
+    Provides a simple interface to capture and send
     messages from/to the debugger vis stdin/stdout.
+
+    Runs on the adapter's asyncio event loop: messages are read as
+    a stream and handed in order to the on_receive coroutine.
     """
 
     def __init__(self, on_receive = None):
-        self.send_queue = Queue()
         self.running = False
         self.callback = on_receive
+        self.loop = None
+        self._reader = None
+
+    async def serve(self):
+        """
+        Reads messages from the debugger until stdin is closed or stop() is called.
+        """
 
-    def start(self):
-        if not self.running:
-            self.running = True
-            run(self._debugger_send_loop)
-            self._read_debugger_input()
-    
-    def start_nonblocking(self):
         if not self.running:
             self.running = True
-            run(self._debugger_send_loop)
-            run(self._read_debugger_input)
+            self.loop = asyncio.get_event_loop()
+            self._reader = await self._open_stdin()
+            try:
+                await self._read_debugger_input()
+            finally:
+                self.running = False
 
     def stop(self):
         if self.running:
             self.running = False
+            self._reader.feed_eof()
 
     def send(self, message):
-        self.send_queue.put(message)
+        """
+        Writes a message (str, or raw bytes relayed from debugpy) to the debugger.
+        Must be called from the event loop.
+        """
+
+        try:
+            # Write the header and the bytes as is, in a single write
+            stdout.buffer.write(frame_message(message))
+            stdout.buffer.flush()
+            log('Sent to Debugger:', message)
+        except Exception as e:
+            log("Failure writing to stdout (normal on exit):" + str(e))
 
-    def _read_debugger_input(self):
+    async def _open_stdin(self):
         """
-        Reads DAP messages sent from the debugger through stdin and calls the
-        function passed in as the callback with the message recieved.
+        Returns a StreamReader over stdin. Where the loop can't watch stdin
+        directly (Windows, regular files), a thread feeds the reader instead.
         """
 
-        while self.running:
-            try:
-                content_length = 0
-                while self.running:
-                    header = stdin.readline()
-                    if header:
-                        header = header.strip()
-                    if not header:
-                        break
-                    if header.startswith(CONTENT_HEADER):
-                        content_length = int(header[len(CONTENT_HEADER):])
-
-                if content_length > 0:
-                    total_content = ""
-                    while content_length > 0:
-                        content = stdin.read(content_length)
-                        content_length -= len(content)
-                        total_content += content
-
-                    if content_length == 0:
-                        message = total_content
-                        if self.callback:
-                            self.callback(message)
+        reader = asyncio.StreamReader()
+
+        try:
+            if sys.platform == 'win32':
+                raise NotImplementedError
+            await self.loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), stdin.buffer)
+        except (NotImplementedError, ValueError, OSError):
+            run(self._pump_stdin, (reader,), daemon=True)
 
+        return reader
+
+    def _pump_stdin(self, reader):
+        """
+        Blocks on stdin in a thread, passing whatever is read over to the loop.
+        """
+
+        while True:
+            try:
+                chunk = stdin.buffer.read1(READ_CHUNK_SIZE)
             except Exception as e:
-                log("Failure reading stdin: " + str(e))
-                log(header)
-                log(message)
-                log(total_content)
-                raise e
+                log("Failure reading stdin: " + str(e), level=ERROR)
+                chunk = b''
 
+            if not chunk:
+                self.loop.call_soon_threadsafe(reader.feed_eof)
+                return
+            self.loop.call_soon_threadsafe(reader.feed_data, chunk)
 
-    def _debugger_send_loop(self):
+    async def _read_debugger_input(self):
         """
-        Waits for items to show in the send queue and prints them.
-        Blocks until an item is present
+        Reads DAP messages sent from the debugger through stdin and awaits the
+        coroutine passed in as the callback with each message recieved.
         """
 
+        parser = FrameParser()
+        data = b''
         while self.running:
-            msg = self.send_queue.get()
-            if msg is None:
-                return
-            else:
-                try:
-                    stdout.write('Content-Length: {}\r\n\r\n'.format(len(msg)))
-                    stdout.write(msg)
-                    stdout.flush()
-                    log('Sent to Debugger:', msg)
-                except Exception as e:
-                    log("Failure writing to stdout (normal on exit):" + str(e))
+            try:
+                data = await self._reader.read(READ_CHUNK_SIZE)
+                if not data:
+                    log("Debugger closed stdin.")
+                    return
 
+                for message in parser.feed(data):
+                    if self.callback:
+                        await self.callback(message)
+
+            except Exception as e:
+                log("Failure reading stdin: " + str(e), level=ERROR)
+                log(repr(data), level=ERROR)
+                raise e
@@ -0,0 +1,146 @@
+"""
+
+Leveled logging for the adapter, written to a file from a background thread
+so that logging never holds up the relay.
+
+"""
+
+from collections import deque
+from datetime import datetime
+from threading import Thread, Event, Lock
+import atexit
+import json
+import time
+import os
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+LEVEL_NAMES = {level: name for name, level in LEVELS.items()}
+
+
+class Logger:
+    """
+    Keeps log records in a bounded ring buffer that a background thread writes to the log file.
+
+    Records below the logger's level are discarded before anything is formatted, and the rest
+    are only formatted by the writer thread. If the buffer fills up faster than it is written,
+    the oldest records are dropped and the number dropped is logged. The file is rotated
+    once it grows past max_bytes, keeping the given number of backups.
+    """
+
+    def __init__(self, path, level=INFO, buffer_size=10000, max_bytes=5 * 1024 * 1024,
+                 backups=2, flush_interval=0.2):
+        self.path = path
+        self.level = level
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+
+        self._records = deque(maxlen=buffer_size)
+        self._wake_at = buffer_size // 2
+        self._wake = Event()
+        self._writing = Lock()
+        self._dropped = 0
+        self._file = None
+
+    def start(self):
+        """
+        Creates and/or clears the log file, then starts the writer thread.
+        """
+
+        self._file = open(self.path, 'w+', encoding='UTF-8')
+        atexit.register(self.flush)
+        Thread(target=self._run, daemon=True).start()
+
+    def is_enabled_for(self, level):
+        return level >= self.level
+
+    def log(self, level, msg, json_msg=None):
+        """
+        Queues a message, and the JSON message (str or bytes) given with it, to be written.
+        """
+
+        if level < self.level:
+            return
+
+        records = self._records
+        record = (time.time(), level, msg, json_msg)
+        if len(records) == records.maxlen:
+            # Counted under the lock flush resets the count with (the buffer may have
+            # been written out by the time it's acquired, and then nothing is dropped)
+            with self._writing:
+                if len(records) == records.maxlen:
+                    self._dropped += 1
+                records.append(record)
+        else:
+            records.append(record)
+
+        if len(records) >= self._wake_at:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Writes all queued records to the log file.
+        """
+
+        with self._writing:
+            if self._file is None:
+                return
+
+            records = self._records
+            while records:
+                if self._dropped:
+                    dropped, self._dropped = self._dropped, 0
+                    self._file.write(self._format((time.time(), WARNING,
+                        "{} log records were dropped.".format(dropped), None)))
+                self._file.write(self._format(records.popleft()))
+
+            self._file.flush()
+            if self._file.tell() > self.max_bytes:
+                self._rotate()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Nowhere left to report it, but keep logging what we can
+                pass
+
+    def _rotate(self):
+        """
+        Shifts log.txt to log.txt.1, log.txt.1 to log.txt.2 and so on, then starts a new file.
+        """
+
+        self._file.close()
+
+        for i in range(self.backups - 1, 0, -1):
+            older = '{}.{}'.format(self.path, i)
+            if os.path.exists(older):
+                os.replace(older, '{}.{}'.format(self.path, i + 1))
+        if self.backups > 0:
+            os.replace(self.path, self.path + '.1')
+
+        self._file = open(self.path, 'w+', encoding='UTF-8')
+
+    def _format(self, record):
+        created, level, msg, json_msg = record
+
+        if json_msg:
+            try:
+                msg += '\n' + json.dumps(json.loads(json_msg), indent=4)
+            except ValueError:
+                if isinstance(json_msg, bytes):
+                    json_msg = json_msg.decode('UTF-8', 'replace')
+                msg += '\n' + json_msg
+
+        timestamp = datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S")
+        if level == INFO:
+            return '\n' + timestamp + " - " + msg + '\n'
+        return '\n' + timestamp + " - " + LEVEL_NAMES[level] + " - " + msg + '\n'
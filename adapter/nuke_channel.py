@@ -0,0 +1,117 @@
+
+from util import log, DEBUG, NUKE_ADDRESS, CONNECT_TIMEOUT
+import asyncio
+import struct
+import json
+
+# Commands and responses are framed as a 4-byte big-endian length followed by a JSON object
+COMMAND_HEADER = struct.Struct('>I')
+
+# Commands sent with this priority run in Nuke ahead of those queued without one
+PRIORITY_CONTROL = 'control'
+
+
+class NukeCommandError(Exception):
+    """
+    Raised when code sent to Nuke raises an exception there.
+    Its message is the traceback Nuke reported.
+    """
+
+
+class NukeChannel:
+    """
+    A persistent connection to script_debug_server in Nuke, over which any number
+    of commands are sent. Each command carries an id, and the channel resolves
+    the matching pending command when Nuke reports it has run.
+    """
+
+    def __init__(self, address=NUKE_ADDRESS):
+        self.address = address
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._next_id = 1
+        self._pending = {}
+        self._connecting = asyncio.Lock()
+
+    async def connect(self):
+        """
+        Opens the connection to Nuke, unless it is already open.
+        """
+
+        async with self._connecting:
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(*self.address), CONNECT_TIMEOUT
+                )
+                self._read_task = asyncio.ensure_future(self._read_responses())
+
+    async def execute(self, code, priority=None):
+        """
+        Sends code to run in Nuke's main thread, and returns Nuke's response once it has run.
+        Raises NukeCommandError if the code raised an exception.
+        """
+
+        await self.connect()
+
+        command_id = self._next_id
+        self._next_id += 1
+
+        future = asyncio.get_event_loop().create_future()
+        self._pending[command_id] = future
+
+        command = {'id': command_id, 'code': code}
+        if priority:
+            command['priority'] = priority
+
+        try:
+            payload = json.dumps(command).encode('UTF-8')
+            self._writer.write(COMMAND_HEADER.pack(len(payload)) + payload)
+            await self._writer.drain()
+        except BaseException:
+            # Nothing will answer it (this includes being cancelled while draining)
+            self._pending.pop(command_id, None)
+            raise
+        log("Sent command {} to Nuke.".format(command_id), level=DEBUG)
+
+        response = await future
+        if not response['success']:
+            raise NukeCommandError(response['error'])
+        return response
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None:
+            self._read_task.cancel()
+
+    async def _read_responses(self):
+        """
+        Resolves pending commands as their responses arrive. When the connection
+        closes, commands still pending fail, and the next command reconnects.
+        """
+
+        error = ConnectionError("Connection to Nuke closed.")
+        try:
+            while True:
+                header = await self._reader.readexactly(COMMAND_HEADER.size)
+                payload = await self._reader.readexactly(COMMAND_HEADER.unpack(header)[0])
+                response = json.loads(payload.decode('UTF-8'))
+
+                log("Nuke ran command {}.".format(response['id']), level=DEBUG)
+                future = self._pending.pop(response['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+
+        except (asyncio.IncompleteReadError, OSError) as e:
+            log("Connection to Nuke closed: " + str(e))
+            error = ConnectionError("Connection to Nuke closed: " + str(e))
+
+        finally:
+            self._writer.close()
+            self._reader = self._writer = None
+
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
@@ -0,0 +1,74 @@
+'''
+Checks whether some code object has a line breakpoint without going over all of its lines on
+each check.
+
+The lines of each code object are computed only once (and kept while the code object is alive,
+regardless of changes to the breakpoints) and the lines with breakpoints in each file are kept
+sorted, so, the check is a bisect to the breakpoints in the range of lines of the code.
+'''
+from _pydevd_bundle.pydevd_caches import BoundedCache
+from bisect import bisect_left
+import dis
+
+# id(code) -> (first line, last line, frozenset(lines)) or None if its lines can't be gotten.
+_code_lines_cache = BoundedCache('code_lines')
+
+# Lines of code objects without any line.
+_NO_LINES = (0, -1, frozenset())
+
+# canonical_normalized_filename -> (breakpoints for the file, sorted breakpoint lines).
+_filename_to_breakpoint_lines = BoundedCache('breakpoint_lines')
+
+
+def get_code_lines(code):
+    '''
+    :return tuple(int, int, frozenset(int))|None:
+        The first line, the last line and all the lines where some instruction of the code
+        starts or None if the lines can't be gotten (i.e.: jython).
+    '''
+    key = id(code)
+    try:
+        return _code_lines_cache[key]
+    except KeyError:
+        try:
+            lines = frozenset(offset_and_lineno[1] for offset_and_lineno in dis.findlinestarts(code))
+        except:
+            code_lines = None
+        else:
+            if lines:
+                code_lines = (min(lines), max(lines), lines)
+            else:
+                code_lines = _NO_LINES
+
+        _code_lines_cache.set_for_code(code, key, code_lines)
+        return code_lines
+
+
+def has_breakpoint_in_lines(canonical_normalized_filename, breakpoints_for_file, code_lines):
+    '''
+    :param dict breakpoints_for_file:
+        The line breakpoints for the file (line -> breakpoint). Note that this dict must not be
+        changed afterwards (PyDB.consolidate_breakpoints always creates a new one).
+
+    :param tuple(int, int, frozenset(int)) code_lines:
+        The result from get_code_lines.
+
+    :return bool:
+        Whether there's a breakpoint in any of the given lines.
+    '''
+    entry = _filename_to_breakpoint_lines.get(canonical_normalized_filename)
+    if entry is None or entry[0] is not breakpoints_for_file:
+        entry = _filename_to_breakpoint_lines[canonical_normalized_filename] = (
+            breakpoints_for_file, sorted(breakpoints_for_file))
+
+    breakpoint_lines = entry[1]
+    first_line, last_line, lines = code_lines
+    i = bisect_left(breakpoint_lines, first_line)
+    while i < len(breakpoint_lines):
+        line = breakpoint_lines[i]
+        if line > last_line:
+            break
+        if line in lines:
+            return True
+        i += 1
+    return False
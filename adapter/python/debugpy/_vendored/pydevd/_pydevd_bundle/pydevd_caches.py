@@ -0,0 +1,237 @@
+'''
+Bounded caches for the state the debugger keeps while tracing (file types, files filters,
+frames skipped, normalized paths, ...).
+
+A debug session may last for a long time while new code keeps being compiled (i.e.: `exec` of
+generated code), so, these caches can't just keep on growing. Each cache is a dict (so that
+hits on the tracing fast path are just dict lookups) bounded by generations: when it's full,
+its contents become the previous generation and it starts empty again. A lookup (`cache[key]`,
+`cache.get(key)` or `key in cache`) of a key which isn't in the current generation brings the
+entry back from the previous one, so, entries in use survive while the ones not used for a whole
+generation are dropped (when it rotates again).
+
+Entries whose key refers to a code object should be set with `set_for_code` using `id(code)` in
+the key (and not the code itself, which would keep it alive): they're removed as soon as the
+code object is collected. Entries which depend on the breakpoints of a file should be set with
+`set_for_file` so that they can be removed with `discard_entries_for_file` when those change.
+
+The number of hits is only counted when PYDEVD_CACHE_STATS is set in the environment (as it
+makes the lookups slower). The stats of the caches used by the debugger are available in
+`PyDB.caches_stats`.
+'''
+from _pydevd_bundle.pydevd_constants import PYDEVD_CACHE_MAX_SIZE, PYDEVD_CACHE_STATS
+import weakref
+
+_MISSING = object()
+
+
+class _BoundedCache(dict):
+
+    def __init__(self, name, max_size=PYDEVD_CACHE_MAX_SIZE):
+        dict.__init__(self)
+        self.name = name
+        self.max_size = max_size
+        self._previous = {}
+        self._code_id_to_ref_and_keys = {}  # id(code) -> (weak ref to code (or code), keys)
+        self._file_to_keys = {}  # canonical normalized filename -> keys
+
+        # Stats.
+        self.hits = None
+        self.misses = 0  # Lookups of keys in neither generation.
+        self.recovered = 0  # Entries brought back from the previous generation.
+        self.evictions = 0  # Entries dropped with the previous generation.
+        self.generations = 0
+        self.clears = 0
+        self.discarded = 0  # Entries removed with discard_entries or discard_entries_for_file.
+
+    def __missing__(self, key):
+        value = self._previous.pop(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            raise KeyError(key)
+        return self._recovered(key, value)
+
+    def get(self, key, default=None):
+        value = dict.get(self, key, _MISSING)
+        if value is _MISSING:
+            # Note: the previous generation is checked inline (this is in the tracing fast path).
+            value = self._previous.pop(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._recovered(key, value)
+        return value
+
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        value = self._previous.pop(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return False
+        self._recovered(key, value)
+        return True
+
+    def _recovered(self, key, value):
+        # Brings back an entry popped from the previous generation.
+        self.recovered += 1
+        self[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if len(self) >= self.max_size and not dict.__contains__(self, key):
+            self._rotate()
+        dict.__setitem__(self, key, value)
+
+    def _rotate(self):
+        self.evictions += len(self._previous)
+        self._previous = dict(self)
+        dict.clear(self)
+        self.generations += 1
+
+        if self._code_id_to_ref_and_keys:
+            previous = self._previous
+            for code_id, (_ref, keys) in list(self._code_id_to_ref_and_keys.items()):
+                keys[:] = [key for key in keys if key in previous]
+                if not keys:
+                    del self._code_id_to_ref_and_keys[code_id]
+
+        if self._file_to_keys:
+            previous = self._previous
+            for filename, keys in list(self._file_to_keys.items()):
+                keys.intersection_update(previous)
+                if not keys:
+                    del self._file_to_keys[filename]
+
+    def set_for_code(self, code, key, value):
+        '''
+        Sets an entry which is removed when the given code object is collected.
+
+        :param key:
+            Should have `id(code)` (not the code itself).
+        '''
+        self[key] = value
+        code_id = id(code)
+        entry = self._code_id_to_ref_and_keys.get(code_id)
+        if entry is None:
+            try:
+                ref = weakref.ref(code, self._on_code_collected_callback(code_id))
+            except TypeError:
+                # Code objects can't be weakly referenced: keep it alive while it's in the
+                # cache so that its id isn't reused.
+                ref = code
+            entry = self._code_id_to_ref_and_keys[code_id] = (ref, [])
+        entry[1].append(key)
+
+    def _on_code_collected_callback(self, code_id):
+        self_ref = weakref.ref(self)
+
+        def on_code_collected(ref):
+            cache = self_ref()
+            if cache is None:
+                return
+            try:
+                entry = cache._code_id_to_ref_and_keys.get(code_id)
+                if entry is None or entry[0] is not ref:
+                    return
+                del cache._code_id_to_ref_and_keys[code_id]
+                for key in entry[1]:
+                    dict.pop(cache, key, None)
+                    cache._previous.pop(key, None)
+            except:
+                pass  # Called at any point (even during interpreter shutdown).
+
+        return on_code_collected
+
+    def set_for_file(self, canonical_normalized_filename, key, value):
+        '''
+        Sets an entry which is removed with `discard_entries_for_file` for the given file.
+        '''
+        self[key] = value
+        keys = self._file_to_keys.get(canonical_normalized_filename)
+        if keys is None:
+            keys = self._file_to_keys[canonical_normalized_filename] = set()
+        keys.add(key)
+
+    def discard_entries_for_file(self, canonical_normalized_filename):
+        '''
+        Removes the entries set with `set_for_file` for the given file.
+        '''
+        keys = self._file_to_keys.pop(canonical_normalized_filename, None)
+        if keys:
+            previous = self._previous
+            for key in keys:
+                found = dict.pop(self, key, _MISSING) is not _MISSING
+                if previous.pop(key, _MISSING) is not _MISSING or found:
+                    self.discarded += 1
+
+    def discard_entries(self, should_discard):
+        '''
+        Removes the entries for which `should_discard(key, value)` returns True.
+        '''
+        for d in (self, self._previous):
+            for key, value in list(dict.items(d)):
+                if should_discard(key, value):
+                    dict.pop(d, key, None)
+                    self.discarded += 1
+
+    def clear(self):
+        dict.clear(self)
+        self._previous = {}
+        self._code_id_to_ref_and_keys.clear()
+        self._file_to_keys.clear()
+        self.clears += 1
+
+    def is_empty(self):
+        return not dict.__len__(self) and not self._previous
+
+    def get_stats(self):
+        return {
+            'size': len(self) + len(self._previous),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'recovered': self.recovered,
+            'evictions': self.evictions,
+            'generations': self.generations,
+            'clears': self.clears,
+            'discarded': self.discarded,
+            'code_objects': len(self._code_id_to_ref_and_keys),
+            'files': len(self._file_to_keys),
+        }
+
+    def __repr__(self):
+        return '<%s %s: %s>' % (self.__class__.__name__, self.name, self.get_stats())
+
+
+class _CountingBoundedCache(_BoundedCache):
+    '''
+    A bounded cache which also counts the hits (used with PYDEVD_CACHE_STATS).
+    '''
+
+    def __init__(self, *args, **kwargs):
+        _BoundedCache.__init__(self, *args, **kwargs)
+        self.hits = 0
+
+    def __getitem__(self, key):
+        value = dict.get(self, key, _MISSING)
+        if value is _MISSING:
+            value = self.__missing__(key)
+        self.hits += 1
+        return value
+
+    def get(self, key, default=None):
+        value = _BoundedCache.get(self, key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.hits += 1
+        return value
+
+    def __contains__(self, key):
+        if _BoundedCache.__contains__(self, key):
+            self.hits += 1
+            return True
+        return False
+
+
+BoundedCache = _CountingBoundedCache if PYDEVD_CACHE_STATS else _BoundedCache
@@ -63,6 +63,7 @@ each command has a format:
     * PYDB - pydevd, the python end
 '''
 
+import collections
 import itertools
 import linecache
 import os
@@ -80,9 +81,11 @@ from _pydev_bundle._pydev_completer import extract_token_and_qualifier
 from _pydevd_bundle._debug_adapter.pydevd_schema import VariablesResponseBody, \
     SetVariableResponseBody
 from _pydevd_bundle._debug_adapter import pydevd_base_schema, pydevd_schema
-from _pydevd_bundle.pydevd_net_command import NetCommand
+from _pydevd_bundle.pydevd_net_command import NetCommand, NetCommandBatch, ChunkedJsonList
+from _pydevd_bundle.pydevd_timings import request_timings, get_request_seq, TIMINGS_EVENT
 from _pydevd_bundle.pydevd_xml import ExceptionOnEvaluate
-from _pydevd_bundle.pydevd_constants import ForkSafeLock, NULL
+from _pydevd_bundle.pydevd_constants import ForkSafeLock, NULL, \
+    PYDEVD_OUTPUT_QUEUE_HIGH_WATER, PYDEVD_OUTPUT_QUEUE_TIMEOUT
 from _pydevd_bundle.pydevd_daemon_thread import PyDBDaemonThread
 from _pydevd_bundle.pydevd_thread_lifecycle import pydevd_find_thread_by_id, resume_threads
 from _pydevd_bundle.pydevd_dont_trace_files import PYDEV_FILE
@@ -310,24 +313,215 @@ class ReaderThread(PyDBDaemonThread):
         self.process_net_command(self.py_db, cmd_id, seq, text)
 
 
+_OUTPUT_CMD_IDS = (CMD_WRITE_TO_CONSOLE, str(CMD_WRITE_TO_CONSOLE))
+
+# Output events are merged up to this number of characters.
+_MAX_COALESCED_OUTPUT = 64 * 1024
+
+
+def _get_coalescible_output(cmd):
+    '''
+    :return str|None:
+        The text of the output event, if the command is an output event which can be
+        merged with others (i.e.: it has no information other than its text and category).
+    '''
+    as_dict = cmd.as_dict
+    if as_dict is None or as_dict.get('event') != 'output':
+        return None
+    body = as_dict.get('body')
+    if not isinstance(body, dict):
+        return None
+    for key, value in body.items():
+        if key not in ('output', 'category') and value:  # i.e.: 'source': {} is Ok.
+            return None
+    return body.get('output')
+
+
+def _merge_output(cmds):
+    if len(cmds) == 1:
+        return cmds[0]
+    as_dict = dict(cmds[0].as_dict)
+    as_dict.pop('seq', None)
+    as_dict.pop('pydevd_cmd_id', None)
+    body = as_dict['body'] = dict(as_dict['body'])
+    body['output'] = body['output'][:0].join([cmd.as_dict['body']['output'] for cmd in cmds])
+    return NetCommand(CMD_WRITE_TO_CONSOLE, 0, as_dict, is_json=True)
+
+
+def _coalesce_output(cmds):
+    '''
+    Merges consecutive output events with the same category into a single event.
+    '''
+    ret = []
+    group = []
+    group_size = 0
+    for cmd in cmds:
+        output = _get_coalescible_output(cmd)
+        if group:
+            first = group[0].as_dict['body']
+            if (
+                    output is None or
+                    cmd.as_dict['body'].get('category') != first.get('category') or
+                    type(output) is not type(first['output']) or
+                    group_size + len(output) > _MAX_COALESCED_OUTPUT
+                ):
+                ret.append(_merge_output(group))
+                group = []
+                group_size = 0
+
+        if output is None:
+            ret.append(cmd)
+        else:
+            group.append(cmd)
+            group_size += len(output)
+
+    if group:
+        ret.append(_merge_output(group))
+    return ret
+
+
 class WriterThread(PyDBDaemonThread):
-    ''' writer thread writes out the commands in an infinite loop '''
+    '''
+    writer thread writes out the commands in an infinite loop
+
+    Commands are kept in two lanes: output (CMD_WRITE_TO_CONSOLE) and everything else. Each
+    time the writer wakes up it takes all the queued commands and writes them together (see:
+    NetCommandBatch): the other commands go first and then the output (with consecutive output events
+    merged), so, a program printing in a tight loop can't delay events such as a thread being
+    suspended. The order of the commands inside a lane is always kept (and all the output is
+    written before CMD_EXIT).
+    '''
 
     def __init__(self, sock, py_db, terminate_on_socket_close=True):
         PyDBDaemonThread.__init__(self, py_db)
         self.sock = sock
         self.__terminate_on_socket_close = terminate_on_socket_close
         self.setName("pydevd.Writer")
-        self._cmd_queue = _queue.Queue()
+        self._batch = NetCommandBatch(sock)
+        self._cmd_queue = collections.deque()
+        self._output_queue = collections.deque()  # Bounded by PYDEVD_OUTPUT_QUEUE_HIGH_WATER.
+        self._cmd_queue_condition = threading.Condition()
+        self._output_dropped_since_note = 0
         if pydevd_vm_type.get_vm_type() == 'python':
             self.timeout = 0
         else:
             self.timeout = 0.1
 
+        # Metrics.
+        self.max_queue_depth = 0
+        self.output_dropped = 0
+        self.output_coalesced = 0
+
     def add_command(self, cmd):
         ''' cmd is NetCommand '''
         if not self._kill_received:  # we don't take new data after everybody die
-            self._cmd_queue.put(cmd, False)
+            if cmd.id in _OUTPUT_CMD_IDS:
+                self._add_output_command(cmd)
+                return
+
+            with self._cmd_queue_condition:
+                self._cmd_queue.append(cmd)
+                self._on_command_queued()
+
+    def _add_output_command(self, cmd):
+        '''
+        Queues an output command if there's room for it in the output lane.
+
+        If there's no room, the output is dropped without blocking the thread printing, and so
+        is any further output until the lane drains. A note saying how many messages were
+        dropped is then queued along with the next output (and counts against the limit of the
+        lane too). If PYDEVD_OUTPUT_QUEUE_TIMEOUT > 0, the thread first waits for up to that
+        many seconds for room in the lane.
+        '''
+        condition = self._cmd_queue_condition
+        with condition:
+            # Once output is being dropped there's no point in waiting: the thread printing would
+            # be blocked for each message (and the writer must never wait for itself, i.e.: when
+            # it's printing something).
+            if (
+                    PYDEVD_OUTPUT_QUEUE_TIMEOUT > 0 and
+                    not self._output_dropped_since_note and
+                    not self._has_output_room(1) and
+                    threading.current_thread() is not self
+                ):
+                deadline = time.time() + PYDEVD_OUTPUT_QUEUE_TIMEOUT
+                while not self._has_output_room(1):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    condition.wait(remaining)
+
+            dropped = self._output_dropped_since_note
+            if not self._has_output_room(2 if dropped else 1):
+                self._output_dropped_since_note += 1
+                self.output_dropped += 1
+                return
+
+            if not dropped:
+                self._output_queue.append(cmd)
+                self._on_command_queued()
+                return
+
+        # Created without holding the lock (creating a command may write to the log).
+        note = self.py_db.cmd_factory.make_io_message(
+            '\n[%s output messages were not shown, because they were produced faster '
+            'than they could be sent.]\n' % (dropped,), 2)
+        with condition:
+            if not self._has_output_room(2):
+                # Filled up by other threads in the meanwhile.
+                self._output_dropped_since_note += 1
+                self.output_dropped += 1
+                return
+
+            # Messages dropped by other threads in the meanwhile are in the next note.
+            self._output_dropped_since_note -= dropped
+            self._output_queue.append(note)
+            self._output_queue.append(cmd)
+            self._on_command_queued()
+
+    def _has_output_room(self, needed):
+        # Note: must be called with the _cmd_queue_condition held.
+        return len(self._output_queue) + needed <= max(PYDEVD_OUTPUT_QUEUE_HIGH_WATER, needed)
+
+    def _on_command_queued(self):
+        # Note: must be called with the _cmd_queue_condition held.
+        depth = len(self._cmd_queue) + len(self._output_queue)
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        # Both the writer and threads waiting for room in the output lane wait on the condition.
+        self._cmd_queue_condition.notify_all()
+
+    def _get_commands_to_send(self):
+        '''
+        Waits a bit for commands to be queued and takes all of them.
+
+        :return list(NetCommand):
+            The commands in the order they should be written (empty if nothing was queued
+            in the meanwhile). If CMD_EXIT is there, it's the last one.
+        '''
+        condition = self._cmd_queue_condition
+        with condition:
+            if not self._cmd_queue and not self._output_queue:
+                condition.wait(0.1)
+
+            cmds = list(self._cmd_queue)
+            self._cmd_queue.clear()
+            output = list(self._output_queue)
+            self._output_queue.clear()
+            if output:
+                condition.notify_all()  # There's room in the output lane again.
+
+        if output:
+            coalesced = _coalesce_output(output)
+            self.output_coalesced += len(output) - len(coalesced)
+            output = coalesced
+
+        for i, cmd in enumerate(cmds):
+            if cmd.id == CMD_EXIT:
+                # Anything queued after CMD_EXIT is not written, but the output queued before is.
+                return cmds[:i] + output + [cmd]
+        cmds.extend(output)
+        return cmds
 
     @overrides(PyDBDaemonThread._on_run)
     def _on_run(self):
@@ -336,9 +530,8 @@ class WriterThread(PyDBDaemonThread):
         try:
             while True:
                 try:
-                    try:
-                        cmd = self._cmd_queue.get(True, 0.1)
-                    except _queue.Empty:
+                    cmds = self._get_commands_to_send()
+                    if not cmds:
                         if self._kill_received:
                             pydev_log.debug('WriterThread: kill_received (sock.shutdown(SHUT_WR))')
                             try:
@@ -364,14 +557,18 @@ class WriterThread(PyDBDaemonThread):
                     # but the thread was still not liberated
                     return
 
-                if cmd.as_dict is not None:
-                    for listener in self.py_db.dap_messages_listeners:
-                        listener.before_send(cmd.as_dict)
+                for cmd in cmds:
+                    if cmd.as_dict is not None:
+                        for listener in self.py_db.dap_messages_listeners:
+                            listener.before_send(cmd.as_dict)
+                    self._batch.add(cmd)
 
                 notify_about_gevent_if_needed()
-                cmd.send(self.sock)
+                self._batch.flush()
+                if request_timings is not None:
+                    self._add_timings_events(cmds)
 
-                if cmd.id == CMD_EXIT:
+                if cmds[-1].id == CMD_EXIT:
                     pydev_log.debug('WriterThread: CMD_EXIT received')
                     break
                 if time is None:
@@ -383,10 +580,25 @@ class WriterThread(PyDBDaemonThread):
                 if DebugInfoHolder.DEBUG_TRACE_LEVEL > 0:
                     pydev_log_exception()
         finally:
-            pydev_log.debug('WriterThread: exit')
+            pydev_log.debug('WriterThread: exit (max queue depth: %s, output messages dropped: %s, '
+                            'output messages coalesced: %s, sent: %s)',
+                            self.max_queue_depth, self.output_dropped, self.output_coalesced,
+                            self._batch.get_metrics_description())
+
+    def _add_timings_events(self, cmds):
+        for cmd in cmds:
+            as_dict = cmd.as_dict
+            if as_dict is not None and as_dict.get('type') == 'response':
+                request_seq = as_dict.get('request_seq')
+                request_timings.mark(request_seq, 'sent')
+                body = request_timings.pop_event_body(request_seq)
+                if body is not None:
+                    event = {'type': 'event', 'event': TIMINGS_EVENT, 'body': body}
+                    self.add_command(NetCommand(CMD_REQUEST_TIMINGS, 0, event, is_json=True))
 
     def empty(self):
-        return self._cmd_queue.empty()
+        with self._cmd_queue_condition:
+            return not self._cmd_queue and not self._output_queue
 
     @overrides(PyDBDaemonThread.do_kill_pydev_thread)
     def do_kill_pydev_thread(self):
@@ -495,6 +707,10 @@ class InternalThreadCommand(object):
         return self.thread_id == thread_id or self.thread_id.endswith('|' + thread_id)
 
     def do_it(self, dbg):
+        request_seq = None
+        if request_timings is not None:
+            request_seq = get_request_seq(self.args)
+            request_timings.mark(request_seq, 'started')
         try:
             if self.method is not None:
                 self.method(dbg, *self.args, **self.kwargs)
@@ -503,6 +719,8 @@ class InternalThreadCommand(object):
         finally:
             self.args = None
             self.kwargs = None
+            if request_seq is not None:
+                request_timings.mark(request_seq, 'executed')
 
     def __str__(self):
         return 'InternalThreadCommands(%s, %s, %s)' % (self.method, self.args, self.kwargs)
@@ -664,15 +882,23 @@ def internal_get_variable_json(py_db, request):
     if hasattr(fmt, 'to_dict'):
         fmt = fmt.to_dict()
 
-    variables = []
     try:
         try:
             variable = py_db.suspended_frames_manager.get_variable(variables_reference)
         except KeyError:
-            pass
+            children_variables = []
         else:
-            for child_var in variable.get_children_variables(fmt=fmt, scope=scope):
-                variables.append(child_var.get_var_data(fmt=fmt))
+            children_variables = variable.get_children_variables(fmt=fmt, scope=scope)
+
+        variables = (
+            pydevd_schema.Variable.update_dict_ids_to_dap(child_var.get_var_data(fmt=fmt))
+            for child_var in children_variables)
+        if py_db.dap_messages_listeners:
+            variables = list(variables)
+        else:
+            # Note: the contents may be big, so, they're encoded into chunks as they're generated.
+            variables = ChunkedJsonList(variables)
+        cmd = _make_variables_response(request, variables)
     except:
         try:
             exc, exc_type, tb = sys.exc_info()
@@ -686,10 +912,16 @@ def internal_get_variable_json(py_db, request):
             err = '<Internal error - unable to get traceback when getting variables>'
             pydev_log.exception(err)
             variables = []
+        cmd = _make_variables_response(request, variables)
 
-    body = VariablesResponseBody(variables)
-    variables_response = pydevd_base_schema.build_response(request, kwargs={'body':body})
-    py_db.writer.add_command(NetCommand(CMD_RETURN, 0, variables_response, is_json=True))
+    py_db.writer.add_command(cmd)
+
+
+def _make_variables_response(request, variables):
+    variables_response = pydevd_base_schema.build_response(request, kwargs={'body': VariablesResponseBody([])})
+    as_dict = variables_response.to_dict(update_ids_to_dap=True)
+    as_dict['body']['variables'] = variables
+    return NetCommand(CMD_RETURN, 0, as_dict, is_json=True)
 
 
 class InternalGetVariable(InternalThreadCommand):
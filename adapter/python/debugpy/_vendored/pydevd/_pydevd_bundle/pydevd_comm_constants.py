@@ -94,6 +94,8 @@ CMD_STEP_INTO_COROUTINE = 206
 
 CMD_LOAD_SOURCE_FROM_FRAME_ID = 207
 
+CMD_REQUEST_TIMINGS = 208
+
 CMD_VERSION = 501
 CMD_RETURN = 502
 CMD_SET_PROTOCOL = 503
@@ -189,6 +191,8 @@ ID_TO_MEANING = {
 
     '207': 'CMD_LOAD_SOURCE_FROM_FRAME_ID',
 
+    '208': 'CMD_REQUEST_TIMINGS',  # debugpyTimings event (see: pydevd_timings).
+
     '501': 'CMD_VERSION',
     '502': 'CMD_RETURN',
     '503': 'CMD_SET_PROTOCOL',
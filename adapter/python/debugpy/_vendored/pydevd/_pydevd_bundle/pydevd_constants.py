@@ -315,6 +315,27 @@ PYDEVD_UNBLOCK_THREADS_TIMEOUT = as_float_in_env('PYDEVD_UNBLOCK_THREADS_TIMEOUT
 # on how the thread interruption works (there are some caveats related to it).
 PYDEVD_INTERRUPT_THREAD_TIMEOUT = as_float_in_env('PYDEVD_INTERRUPT_THREAD_TIMEOUT', -1)
 
+# Maximum number of output messages (stdout/stderr) waiting to be sent to the client.
+# When it is reached, further output is dropped until the queue drains (and a note saying
+# how much was dropped is sent once there's room again).
+PYDEVD_OUTPUT_QUEUE_HIGH_WATER = int(as_float_in_env('PYDEVD_OUTPUT_QUEUE_HIGH_WATER', 1000))
+
+# If > 0, a thread writing output when the queue is full first waits for up to this many
+# seconds for it to drain instead of dropping its output right away. It's disabled by default
+# because the thread printing may be one that must not block (i.e.: a GUI main thread).
+PYDEVD_OUTPUT_QUEUE_TIMEOUT = as_float_in_env('PYDEVD_OUTPUT_QUEUE_TIMEOUT', 0.)
+
+# If true in env, a debugpyTimings event is sent after the response to each request, with
+# the time taken by each stage of its handling (see: _pydevd_bundle.pydevd_timings).
+PYDEVD_REQUEST_TIMINGS = is_true_in_env('PYDEVD_REQUEST_TIMINGS')
+
+# Maximum number of entries in each generation of the caches kept while tracing (see:
+# _pydevd_bundle.pydevd_caches).
+PYDEVD_CACHE_MAX_SIZE = int(as_float_in_env('PYDEVD_CACHE_MAX_SIZE', 50000))
+
+# If true in env, the caches kept while tracing also count their hits (which makes lookups slower).
+PYDEVD_CACHE_STATS = is_true_in_env('PYDEVD_CACHE_STATS')
+
 EXCEPTION_TYPE_UNHANDLED = 'UNHANDLED'
 EXCEPTION_TYPE_USER_UNHANDLED = 'USER_UNHANDLED'
 EXCEPTION_TYPE_HANDLED = 'HANDLED'
@@ -143,6 +143,7 @@ from _pydevd_bundle.pydevd_frame_utils import add_exception_to_frame, just_raise
 from _pydevd_bundle.pydevd_utils import get_clsname_for_code
 from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame
 from _pydevd_bundle.pydevd_comm_constants import constant_to_str
+from _pydevd_bundle.pydevd_breakpoint_lines import get_code_lines, has_breakpoint_in_lines
 
 # IFDEF CYTHON -- DONT EDIT THIS FILE (it is automatically generated)
 # ELSE
@@ -168,8 +169,6 @@ DEBUG_START = ('pydevd.py', 'run')
 DEBUG_START_PY3K = ('_pydev_execfile.py', 'execfile')
 TRACE_PROPERTY = 'pydevd_traceproperty.py'
 
-import dis
-
 
 # IFDEF CYTHON -- DONT EDIT THIS FILE (it is automatically generated)
 cdef is_unhandled_exception(container_obj, py_db, frame, int last_raise_line, set raise_lines):
@@ -651,14 +650,16 @@ cdef class PyDBFrame:
         cdef dict breakpoints_for_file;
         cdef str curr_func_name;
         cdef bint exist_result;
-        cdef dict frame_skips_cache;
+        cdef object frame_skips_cache;
         cdef tuple frame_cache_key;
         cdef tuple line_cache_key;
+        cdef tuple breakpoints_in_frame_cache_key;
+        cdef int breakpoints_mtime;
         cdef int breakpoints_in_line_cache;
         cdef int breakpoints_in_frame_cache;
         cdef bint has_breakpoint_in_frame;
         cdef bint is_coroutine_or_generator;
-        cdef int bp_line;
+        cdef tuple code_lines;
         cdef object bp;
     # ELSE
 #     def trace_dispatch(self, frame, event, arg):
@@ -677,7 +678,7 @@ cdef class PyDBFrame:
         try:
             info.is_tracing += 1
             line = frame.f_lineno
-            line_cache_key = (frame_cache_key, line)
+            line_cache_key = None
 
             if main_debugger.pydb_disposed:
                 return None if event == 'call' else NO_FTRACE
@@ -882,13 +883,20 @@ cdef class PyDBFrame:
                             return None if is_call else NO_FTRACE
 
                 else:
+                    # The mtime of the breakpoints of the file is in the keys of what's cached based
+                    # on them (so that a change in the breakpoints of some file doesn't invalidate
+                    # what's cached for other files).
+                    breakpoints_mtime = main_debugger.file_to_breakpoints_mtime.get(abs_path_canonical_path_and_base[1], 0)
+                    line_cache_key = (frame_cache_key, line, breakpoints_mtime)
+                    breakpoints_in_frame_cache_key = (frame_cache_key, breakpoints_mtime)
+
                     # When cached, 0 means we don't have a breakpoint and 1 means we have.
                     if can_skip:
                         breakpoints_in_line_cache = frame_skips_cache.get(line_cache_key, -1)
                         if breakpoints_in_line_cache == 0:
                             return self.trace_dispatch
 
-                    breakpoints_in_frame_cache = frame_skips_cache.get(frame_cache_key, -1)
+                    breakpoints_in_frame_cache = frame_skips_cache.get(breakpoints_in_frame_cache_key, -1)
                     if breakpoints_in_frame_cache != -1:
                         # Gotten from cache.
                         has_breakpoint_in_frame = breakpoints_in_frame_cache == 1
@@ -896,11 +904,10 @@ cdef class PyDBFrame:
                     else:
                         has_breakpoint_in_frame = False
 
-                        try:
-                            func_lines = set()
-                            for offset_and_lineno in dis.findlinestarts(frame.f_code):
-                                func_lines.add(offset_and_lineno[1])
-                        except:
+                        # Note: the lines of the code are kept across breakpoint changes (only
+                        # the lines with breakpoints are gotten again when they change).
+                        code_lines = get_code_lines(frame.f_code)
+                        if code_lines is None:
                             # This is a fallback for implementations where we can't get the function
                             # lines -- i.e.: jython (in this case clients need to provide the function
                             # name to decide on the skip or we won't be able to skip the function
@@ -919,16 +926,14 @@ cdef class PyDBFrame:
                                     has_breakpoint_in_frame = True
                                     break
                         else:
-                            for bp_line in breakpoints_for_file:  # iterate on keys
-                                if bp_line in func_lines:
-                                    has_breakpoint_in_frame = True
-                                    break
+                            has_breakpoint_in_frame = has_breakpoint_in_lines(
+                                abs_path_canonical_path_and_base[1], breakpoints_for_file, code_lines)
 
                         # Cache the value (1 or 0 or -1 for default because of cython).
                         if has_breakpoint_in_frame:
-                            frame_skips_cache[frame_cache_key] = 1
+                            frame_skips_cache.set_for_file(abs_path_canonical_path_and_base[1], breakpoints_in_frame_cache_key, 1)
                         else:
-                            frame_skips_cache[frame_cache_key] = 0
+                            frame_skips_cache.set_for_file(abs_path_canonical_path_and_base[1], breakpoints_in_frame_cache_key, 0)
 
                     if can_skip and not has_breakpoint_in_frame:
                         if has_exception_breakpoints:
@@ -1028,9 +1033,9 @@ cdef class PyDBFrame:
                     self.do_wait_suspend(thread, frame, event, arg)
                     return self.trace_dispatch
                 else:
-                    if not breakpoint and is_line:
+                    if not breakpoint and is_line and line_cache_key is not None:
                         # No stop from anyone and no breakpoint found in line (cache that).
-                        frame_skips_cache[line_cache_key] = 0
+                        frame_skips_cache.set_for_file(abs_path_canonical_path_and_base[1], line_cache_key, 0)
 
             except:
                 pydev_log.exception()
@@ -1205,6 +1210,7 @@ from _pydev_imps._pydev_saved_modules import threading
 from _pydevd_bundle.pydevd_constants import (get_current_thread_id, NO_FTRACE,
     USE_CUSTOM_SYS_CURRENT_FRAMES_MAP, ForkSafeLock)
 from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
+from _pydevd_bundle.pydevd_caches import BoundedCache
 
 # IFDEF CYTHON -- DONT EDIT THIS FILE (it is automatically generated)
 from cpython.object cimport PyObject
@@ -1227,8 +1233,8 @@ cdef dict _global_notify_skipped_step_in
 # It needs to be invalidated when:
 # - Breakpoints are changed
 # It can be used when running regularly (without step over/step in/step return)
-global_cache_skips = {}
-global_cache_frame_skips = {}
+global_cache_skips = BoundedCache('global_cache_skips')
+global_cache_frame_skips = BoundedCache('global_cache_frame_skips')
 
 _global_notify_skipped_step_in = False
 _global_notify_skipped_step_in_lock = ForkSafeLock()
@@ -1536,7 +1542,7 @@ cdef class ThreadTracer:
         cdef str base;
         cdef int pydev_step_cmd;
         cdef tuple frame_cache_key;
-        cdef dict cache_skips;
+        cdef object cache_skips;
         cdef bint is_stepping;
         cdef tuple abs_path_canonical_path_and_base;
         cdef PyDBAdditionalThreadInfo additional_info;
@@ -1636,7 +1642,7 @@ cdef class ThreadTracer:
             if ret is None:
                 # 1 means skipped because of filters.
                 # 2 means skipped because no breakpoints were hit.
-                cache_skips[frame_cache_key] = 2
+                cache_skips.set_for_file(abs_path_canonical_path_and_base[1], frame_cache_key, 2)
                 return None if event == 'call' else NO_FTRACE
 
             # IFDEF CYTHON -- DONT EDIT THIS FILE (it is automatically generated)
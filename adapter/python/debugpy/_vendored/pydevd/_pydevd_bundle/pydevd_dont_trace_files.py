@@ -86,7 +86,9 @@ DONT_TRACE = {
     'pydevd_additional_thread_info_regular.py': PYDEV_FILE,
     'pydevd_api.py': PYDEV_FILE,
     'pydevd_base_schema.py': PYDEV_FILE,
+    'pydevd_breakpoint_lines.py': PYDEV_FILE,
     'pydevd_breakpoints.py': PYDEV_FILE,
+    'pydevd_caches.py': PYDEV_FILE,
     'pydevd_code_to_source.py': PYDEV_FILE,
     'pydevd_collect_bytecode_info.py': PYDEV_FILE,
     'pydevd_comm.py': PYDEV_FILE,
@@ -139,6 +141,7 @@ DONT_TRACE = {
     'pydevd_thread_lifecycle.py': PYDEV_FILE,
     'pydevd_thread_wrappers.py': PYDEV_FILE,
     'pydevd_timeout.py': PYDEV_FILE,
+    'pydevd_timings.py': PYDEV_FILE,
     'pydevd_trace_api.py': PYDEV_FILE,
     'pydevd_trace_dispatch.py': PYDEV_FILE,
     'pydevd_trace_dispatch_regular.py': PYDEV_FILE,
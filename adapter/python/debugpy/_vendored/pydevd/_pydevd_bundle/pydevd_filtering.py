@@ -1,6 +1,7 @@
 import fnmatch
 import glob
 import os.path
+import re
 import sys
 
 from _pydev_bundle import pydev_log
@@ -97,6 +98,271 @@ def glob_matches_path(path, pattern, sep=os.sep, altsep=os.altsep):
     return _check_matches(patterns, paths)
 
 
+def _translate_glob_part(part, sep):
+    '''
+    Converts a part of a glob pattern (i.e.: without separators) to a regular expression
+    which matches the same as fnmatch would (without ever matching the separator).
+    '''
+    not_sep = '[^%s]' % (re.escape(sep),)
+    ret = []
+    i = 0
+    n = len(part)
+    while i < n:
+        c = part[i]
+        i += 1
+        if c == '*':
+            ret.append(not_sep + '*')
+        elif c == '?':
+            ret.append(not_sep)
+        elif c == '[':
+            j = i
+            if j < n and part[j] == '!':
+                j += 1
+            if j < n and part[j] == ']':
+                j += 1
+            while j < n and part[j] != ']':
+                j += 1
+            if j >= n:
+                ret.append('\\[')
+            else:
+                contents = part[i:j].replace('\\', '\\\\')
+                i = j + 1
+                if contents[0] == '!':
+                    contents = '^' + contents[1:]
+                elif contents[0] == '^':
+                    contents = '\\' + contents
+                ret.append('(?!%s)[%s]' % (re.escape(sep), contents))
+        else:
+            ret.append(re.escape(c))
+    return ''.join(ret)
+
+
+def _translate_glob(pattern, sep):
+    '''
+    Converts a glob pattern to a regular expression matching the same paths as
+    glob_matches_path (the path without its drive nor its leading separator).
+
+    :return str|None:
+        None if the pattern has no parts (in which case it only matches a path without parts,
+        which is different from a path with a single empty part -- i.e.: '/').
+    '''
+    parts = pattern.split(sep)
+    if parts and parts[0] == '':
+        parts = parts[1:]
+    if not parts:
+        return None
+
+    ret = []
+    for i, part in enumerate(parts):
+        is_last = i == len(parts) - 1
+        if part == '**':
+            if is_last:
+                ret.append('.*')  # One or more parts.
+            else:
+                ret.append('(?:[^%s]*%s)*' % (re.escape(sep), re.escape(sep)))  # Zero or more parts.
+            continue
+
+        part = normcase(part)
+        if glob.has_magic(part):
+            ret.append(_translate_glob_part(part, sep))
+        else:
+            ret.append(re.escape(part))
+        if not is_last:
+            ret.append(re.escape(sep))
+    return ''.join(ret)
+
+
+# Python 2 doesn't support more than 100 groups in a regular expression.
+_MAX_FILTERS_PER_REGEX = 90
+
+
+class _ExcludeFiltersMatcher(object):
+    '''
+    The exclude filters compiled so that finding the first one matching a file doesn't require
+    checking each filter in turn.
+
+    Path filters are compiled to regular expressions with an alternative per filter (in the
+    same order, so, the alternative matched is the first filter which matches) and module
+    filters to a trie of the parts of the module names.
+    '''
+
+    def __init__(self, exclude_filters, sep=os.sep, altsep=os.altsep):
+        self._sep = sep
+        self._altsep = altsep
+
+        # Alternatives used for paths without/with a drive.
+        alternatives = []
+        drive_alternatives = []
+        path_filter_indexes = []
+
+        # For paths without parts: the first filter matching those without a drive and, for
+        # those with a drive, the first filter matching each drive (None: any drive).
+        self._no_parts_index = None
+        self._drive_no_parts_indexes = {}
+
+        self._module_trie = {}  # part -> [index of the first filter ending here or None, children]
+
+        for index, exclude_filter in enumerate(exclude_filters):
+            if not exclude_filter.is_path:
+                node = None
+                children = self._module_trie
+                for part in exclude_filter.name.split('.'):
+                    node = children.get(part)
+                    if node is None:
+                        node = children[part] = [None, {}]
+                    children = node[1]
+                if node[0] is None:
+                    node[0] = index
+                continue
+
+            pattern = exclude_filter.name
+            if altsep:
+                pattern = pattern.replace(altsep, sep)
+
+            path_filter_indexes.append(index)
+            regex = _translate_glob(pattern, sep)
+            if regex is None:
+                regex = '(?!)'
+                if self._no_parts_index is None:
+                    self._no_parts_index = index
+            alternatives.append(regex)
+
+            if len(pattern) > 1 and pattern[1] == ':':
+                drive = pattern[0].lower()
+                regex = _translate_glob(pattern[2:], sep)
+            else:
+                drive = None
+                regex = _translate_glob(pattern, sep)
+            if regex is None:
+                regex = '(?!)'
+                self._drive_no_parts_indexes.setdefault(drive, index)
+            drive_alternatives.append('%s:%s' % (re.escape(drive) if drive else '[\\s\\S]', regex))
+
+        self._path_filter_indexes = path_filter_indexes
+        self._regexes = self._compile(alternatives)
+        self._drive_regexes = self._compile(drive_alternatives)
+
+    @staticmethod
+    def _compile(alternatives):
+        '''
+        :return list(tuple(regex, int)):
+            The compiled regexes, along with the index (in the path filters) of their first
+            alternative.
+        '''
+        ret = []
+        for start in xrange(0, len(alternatives), _MAX_FILTERS_PER_REGEX):
+            chunk = alternatives[start:start + _MAX_FILTERS_PER_REGEX]
+            regex = '|'.join('(%s)\\Z' % (alternative,) for alternative in chunk)
+            ret.append((re.compile(regex, re.DOTALL), start))
+        return ret
+
+    def get_first_match(self, absolute_filename, module_name):
+        '''
+        :return int|None:
+            The index of the first exclude filter matching the file or None if none matches.
+        '''
+        ret = None
+        if self._path_filter_indexes:
+            ret = self._get_first_path_match(absolute_filename)
+
+        if module_name and self._module_trie:
+            children = self._module_trie
+            for part in module_name.split('.'):
+                node = children.get(part)
+                if node is None:
+                    break
+                if node[0] is not None and (ret is None or node[0] < ret):
+                    ret = node[0]
+                children = node[1]
+        return ret
+
+    def _get_first_path_match(self, path):
+        sep = self._sep
+        if self._altsep:
+            path = path.replace(self._altsep, sep)
+
+        if len(path) > 1 and path[1] == ':':
+            regexes = self._drive_regexes
+            drive, path = path[0].lower(), path[2:]
+            if not path:
+                indexes = [self._drive_no_parts_indexes.get(key) for key in (None, drive)]
+                indexes = [index for index in indexes if index is not None]
+                return min(indexes) if indexes else None
+            path = drive + ':' + normcase(path[1:] if path.startswith(sep) else path)
+        else:
+            if not path:
+                return self._no_parts_index
+            regexes = self._regexes
+            path = normcase(path[1:] if path.startswith(sep) else path)
+
+        for regex, start in regexes:
+            match = regex.match(path)
+            if match is not None:
+                return self._path_filter_indexes[start + match.lastindex - 1]
+        return None
+
+
+_IN_PROJECT_ROOT = 1
+_IN_LIBRARY_ROOT = 2
+
+
+class _RootsTrie(object):
+    '''
+    Trie with the path components of the project and library roots, so that the deepest root
+    containing a file (and whether it's a project or a library root) is found with a single walk
+    over the components of the file (instead of checking each root).
+    '''
+
+    def __init__(self, project_roots, library_roots, sep):
+        '''
+        :param list(str) project_roots:
+        :param list(str) library_roots:
+            Absolute/normalized roots (ending with the separator).
+        '''
+        self._sep = sep
+        self._root_node = [0, {}]  # [_IN_PROJECT_ROOT/_IN_LIBRARY_ROOT flags of roots ending here, children]
+        for flag, roots in ((_IN_PROJECT_ROOT, project_roots), (_IN_LIBRARY_ROOT, library_roots)):
+            for root in roots:
+                if not root:
+                    continue
+                node = self._root_node
+                for part in root[:-1].split(sep):
+                    children = node[1]
+                    child = children.get(part)
+                    if child is None:
+                        child = children[part] = [0, {}]
+                    node = child
+                node[0] |= flag
+
+        self.roots_count = len(project_roots) + len(library_roots)
+
+        # Metrics.
+        self.lookups = 0
+        self.components_visited = 0
+        self.root_checks_avoided = 0  # What checking each root (instead of using the trie) would do.
+
+    def get_deepest_root_flags(self, absolute_normalized_filename):
+        '''
+        :return int:
+            The _IN_PROJECT_ROOT/_IN_LIBRARY_ROOT flags of the deepest root containing the file
+            (both if it's a project and a library root) or 0 if no root contains it.
+        '''
+        self.lookups += 1
+        self.root_checks_avoided += self.roots_count
+        ret = 0
+        node = self._root_node
+        visited = 0
+        for part in absolute_normalized_filename.split(self._sep):
+            node = node[1].get(part)
+            if node is None:
+                break
+            visited += 1
+            if node[0]:
+                ret = node[0]
+        self.components_visited += visited
+        return ret
+
+
 class FilesFiltering(object):
     '''
     Note: calls at FilesFiltering are uncached.
@@ -106,8 +372,10 @@ class FilesFiltering(object):
 
     def __init__(self):
         self._exclude_filters = []
+        self._exclude_filters_matcher = _ExcludeFiltersMatcher([])
         self._project_roots = []
         self._library_roots = []
+        self._roots_trie = _RootsTrie([], [], '\\' if IS_WINDOWS else '/')
 
         # Filter out libraries?
         self._use_libraries_filter = False
@@ -139,7 +407,7 @@ class FilesFiltering(object):
                 exclude_filters = []
                 for key, val in json.loads(pydevd_filters).items():
                     exclude_filters.append(ExcludeFilter(key, val, True))
-                self._exclude_filters = exclude_filters
+                self.set_exclude_filters(exclude_filters)
             else:
                 # A ';' separated list of strings with globs for the
                 # list of excludes.
@@ -148,7 +416,7 @@ class FilesFiltering(object):
                 for new_filter in filters:
                     if new_filter.strip():
                         new_filters.append(ExcludeFilter(new_filter.strip(), True, True))
-                self._exclude_filters = new_filters
+                self.set_exclude_filters(new_filters)
 
     @classmethod
     def _get_default_library_roots(cls):
@@ -225,6 +493,7 @@ class FilesFiltering(object):
 
     def set_project_roots(self, project_roots):
         self._project_roots = self._fix_roots(project_roots)
+        self._update_roots_trie()
         pydev_log.debug("IDE_PROJECT_ROOTS %s\n" % project_roots)
 
     def _get_project_roots(self):
@@ -232,8 +501,16 @@ class FilesFiltering(object):
 
     def set_library_roots(self, roots):
         self._library_roots = self._fix_roots(roots)
+        self._update_roots_trie()
         pydev_log.debug("LIBRARY_ROOTS %s\n" % roots)
 
+    def _update_roots_trie(self):
+        old = self._roots_trie
+        self._roots_trie = _RootsTrie(self._project_roots, self._library_roots, '\\' if IS_WINDOWS else '/')
+        self._roots_trie.lookups = old.lookups
+        self._roots_trie.components_visited = old.components_visited
+        self._roots_trie.root_checks_avoided = old.root_checks_avoided
+
     def _get_library_roots(self):
         return self._library_roots
 
@@ -255,53 +532,39 @@ class FilesFiltering(object):
                 pydev_log.debug('Not in in_project_roots - library basenames - starts with %s (%s)', received_filename, LIBRARY_CODE_BASENAMES_STARTING_WITH)
             return False
 
-        project_roots = self._get_project_roots()  # roots are absolute/normalized.
-
         absolute_normalized_filename = self._absolute_normalized_path(received_filename)
-        absolute_normalized_filename_as_dir = absolute_normalized_filename + ('\\' if IS_WINDOWS else '/')
-
-        found_in_project = []
-        for root in project_roots:
-            if root and (absolute_normalized_filename.startswith(root) or root == absolute_normalized_filename_as_dir):
-                if DEBUG:
-                    pydev_log.debug('In project: %s (%s)', absolute_normalized_filename, root)
-                found_in_project.append(root)
-
-        found_in_library = []
-        library_roots = self._get_library_roots()
-        for root in library_roots:
-            if root and (absolute_normalized_filename.startswith(root) or root == absolute_normalized_filename_as_dir):
-                found_in_library.append(root)
-                if DEBUG:
-                    pydev_log.debug('In library: %s (%s)', absolute_normalized_filename, root)
-            else:
-                if DEBUG:
-                    pydev_log.debug('Not in library: %s (%s)', absolute_normalized_filename, root)
+        flags = self._roots_trie.get_deepest_root_flags(absolute_normalized_filename)
 
-        if not project_roots:
+        if not self._project_roots:
             # If we have no project roots configured, consider it being in the project
             # roots if it's not found in site-packages (because we have defaults for those
             # and not the other way around).
-            in_project = not found_in_library
+            in_project = not flags
             if DEBUG:
                 pydev_log.debug('Final in project (no project roots): %s (%s)', absolute_normalized_filename, in_project)
 
         else:
-            in_project = False
-            if found_in_project:
-                if not found_in_library:
-                    if DEBUG:
-                        pydev_log.debug('Final in project (in_project and not found_in_library): %s (True)', absolute_normalized_filename)
-                    in_project = True
-                else:
-                    # Found in both, let's see which one has the bigger path matched.
-                    if max(len(x) for x in found_in_project) > max(len(x) for x in found_in_library):
-                        in_project = True
-                    if DEBUG:
-                        pydev_log.debug('Final in project (found in both): %s (%s)', absolute_normalized_filename, in_project)
+            # If the deepest root is both a project and a library root, the library wins.
+            in_project = flags == _IN_PROJECT_ROOT
+            if DEBUG:
+                pydev_log.debug('Final in project (deepest root flags: %s): %s (%s)', flags, absolute_normalized_filename, in_project)
 
         return in_project
 
+    def get_roots_lookup_counters(self):
+        '''
+        :return dict:
+            The number of in_project_roots lookups done in the roots trie, the path components
+            visited in those and the number of root comparisons that checking each root would
+            have done instead.
+        '''
+        trie = self._roots_trie
+        return {
+            'lookups': trie.lookups,
+            'components_visited': trie.components_visited,
+            'root_checks_avoided': trie.root_checks_avoided,
+        }
+
     def use_libraries_filter(self):
         '''
         Should we debug only what's inside project folders?
@@ -321,21 +584,17 @@ class FilesFiltering(object):
         :return: True if it should be excluded, False if it should be included and None
             if no rule matched the given file.
         '''
-        for exclude_filter in self._exclude_filters:  # : :type exclude_filter: ExcludeFilter
-            if exclude_filter.is_path:
-                if glob_matches_path(absolute_filename, exclude_filter.name):
-                    return exclude_filter.exclude
-            else:
-                # Module filter.
-                if exclude_filter.name == module_name or module_name.startswith(exclude_filter.name + '.'):
-                    return exclude_filter.exclude
-        return None
+        index = self._exclude_filters_matcher.get_first_match(absolute_filename, module_name)
+        if index is None:
+            return None
+        return self._exclude_filters[index].exclude
 
     def set_exclude_filters(self, exclude_filters):
         '''
         :param list(ExcludeFilter) exclude_filters:
         '''
         self._exclude_filters = exclude_filters
+        self._exclude_filters_matcher = _ExcludeFiltersMatcher(exclude_filters)
         self.require_module = False
         for exclude_filter in exclude_filters:
             if not exclude_filter.is_path:
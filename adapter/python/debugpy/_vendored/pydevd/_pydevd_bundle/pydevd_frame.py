@@ -10,6 +10,7 @@ from _pydevd_bundle.pydevd_frame_utils import add_exception_to_frame, just_raise
 from _pydevd_bundle.pydevd_utils import get_clsname_for_code
 from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame
 from _pydevd_bundle.pydevd_comm_constants import constant_to_str
+from _pydevd_bundle.pydevd_breakpoint_lines import get_code_lines, has_breakpoint_in_lines
 
 # IFDEF CYTHON
 # cython_inline_constant: CMD_STEP_INTO = 107
@@ -47,8 +48,6 @@ DEBUG_START = ('pydevd.py', 'run')
 DEBUG_START_PY3K = ('_pydev_execfile.py', 'execfile')
 TRACE_PROPERTY = 'pydevd_traceproperty.py'
 
-import dis
-
 
 # IFDEF CYTHON
 # cdef is_unhandled_exception(container_obj, py_db, frame, int last_raise_line, set raise_lines):
@@ -530,14 +529,16 @@ class PyDBFrame:
     #     cdef dict breakpoints_for_file;
     #     cdef str curr_func_name;
     #     cdef bint exist_result;
-    #     cdef dict frame_skips_cache;
+    #     cdef object frame_skips_cache;
     #     cdef tuple frame_cache_key;
     #     cdef tuple line_cache_key;
+    #     cdef tuple breakpoints_in_frame_cache_key;
+    #     cdef int breakpoints_mtime;
     #     cdef int breakpoints_in_line_cache;
     #     cdef int breakpoints_in_frame_cache;
     #     cdef bint has_breakpoint_in_frame;
     #     cdef bint is_coroutine_or_generator;
-    #     cdef int bp_line;
+    #     cdef tuple code_lines;
     #     cdef object bp;
     # ELSE
     def trace_dispatch(self, frame, event, arg):
@@ -556,7 +557,7 @@ class PyDBFrame:
         try:
             info.is_tracing += 1
             line = frame.f_lineno
-            line_cache_key = (frame_cache_key, line)
+            line_cache_key = None
 
             if main_debugger.pydb_disposed:
                 return None if event == 'call' else NO_FTRACE
@@ -761,13 +762,20 @@ class PyDBFrame:
                             return None if is_call else NO_FTRACE
 
                 else:
+                    # The mtime of the breakpoints of the file is in the keys of what's cached based
+                    # on them (so that a change in the breakpoints of some file doesn't invalidate
+                    # what's cached for other files).
+                    breakpoints_mtime = main_debugger.file_to_breakpoints_mtime.get(abs_path_canonical_path_and_base[1], 0)
+                    line_cache_key = (frame_cache_key, line, breakpoints_mtime)
+                    breakpoints_in_frame_cache_key = (frame_cache_key, breakpoints_mtime)
+
                     # When cached, 0 means we don't have a breakpoint and 1 means we have.
                     if can_skip:
                         breakpoints_in_line_cache = frame_skips_cache.get(line_cache_key, -1)
                         if breakpoints_in_line_cache == 0:
                             return self.trace_dispatch
 
-                    breakpoints_in_frame_cache = frame_skips_cache.get(frame_cache_key, -1)
+                    breakpoints_in_frame_cache = frame_skips_cache.get(breakpoints_in_frame_cache_key, -1)
                     if breakpoints_in_frame_cache != -1:
                         # Gotten from cache.
                         has_breakpoint_in_frame = breakpoints_in_frame_cache == 1
@@ -775,11 +783,10 @@ class PyDBFrame:
                     else:
                         has_breakpoint_in_frame = False
 
-                        try:
-                            func_lines = set()
-                            for offset_and_lineno in dis.findlinestarts(frame.f_code):
-                                func_lines.add(offset_and_lineno[1])
-                        except:
+                        # Note: the lines of the code are kept across breakpoint changes (only
+                        # the lines with breakpoints are gotten again when they change).
+                        code_lines = get_code_lines(frame.f_code)
+                        if code_lines is None:
                             # This is a fallback for implementations where we can't get the function
                             # lines -- i.e.: jython (in this case clients need to provide the function
                             # name to decide on the skip or we won't be able to skip the function
@@ -798,16 +805,14 @@ class PyDBFrame:
                                     has_breakpoint_in_frame = True
                                     break
                         else:
-                            for bp_line in breakpoints_for_file:  # iterate on keys
-                                if bp_line in func_lines:
-                                    has_breakpoint_in_frame = True
-                                    break
+                            has_breakpoint_in_frame = has_breakpoint_in_lines(
+                                abs_path_canonical_path_and_base[1], breakpoints_for_file, code_lines)
 
                         # Cache the value (1 or 0 or -1 for default because of cython).
                         if has_breakpoint_in_frame:
-                            frame_skips_cache[frame_cache_key] = 1
+                            frame_skips_cache.set_for_file(abs_path_canonical_path_and_base[1], breakpoints_in_frame_cache_key, 1)
                         else:
-                            frame_skips_cache[frame_cache_key] = 0
+                            frame_skips_cache.set_for_file(abs_path_canonical_path_and_base[1], breakpoints_in_frame_cache_key, 0)
 
                     if can_skip and not has_breakpoint_in_frame:
                         if has_exception_breakpoints:
@@ -907,9 +912,9 @@ class PyDBFrame:
                     self.do_wait_suspend(thread, frame, event, arg)
                     return self.trace_dispatch
                 else:
-                    if not breakpoint and is_line:
+                    if not breakpoint and is_line and line_cache_key is not None:
                         # No stop from anyone and no breakpoint found in line (cache that).
-                        frame_skips_cache[line_cache_key] = 0
+                        frame_skips_cache.set_for_file(abs_path_canonical_path_and_base[1], line_cache_key, 0)
 
             except:
                 pydev_log.exception()
@@ -6,6 +6,14 @@ from _pydevd_bundle.pydevd_constants import HTTP_PROTOCOL, HTTP_JSON_PROTOCOL, \
     get_protocol, IS_JYTHON, ForkSafeLock
 import json
 from _pydev_bundle import pydev_log
+from _pydevd_bundle.pydevd_timings import request_timings
+
+# Chunked json lists are encoded in chunks of (about) this size.
+_JSON_LIST_CHUNK_SIZE = 64 * 1024
+
+# Placeholder for a ChunkedJsonList in the json of a command.
+_CHUNKED_JSON_LIST_MARKER = '\0pydevd-chunked-json-list\0'
+_ENCODED_CHUNKED_JSON_LIST_MARKER = json.dumps(_CHUNKED_JSON_LIST_MARKER)
 
 
 class _BaseNetCommand(object):
@@ -19,6 +27,13 @@ class _BaseNetCommand(object):
     def send(self, *args, **kwargs):
         pass
 
+    def get_buffers_to_send(self):
+        '''
+        :return tuple(bytes):
+            The bytes to write to the socket for this command (as a part of a batch of commands).
+        '''
+        return ()
+
 
 class _NullNetCommand(_BaseNetCommand):
     pass
@@ -70,7 +85,21 @@ class NetCommand(_BaseNetCommand):
             as_dict['pydevd_cmd_id'] = cmd_id
             as_dict['seq'] = seq
             self.as_dict = as_dict
-            text = json.dumps(as_dict)
+            chunked_lists = []
+            text = json.dumps(as_dict, default=lambda obj: _replace_chunked_json_list(obj, chunked_lists))
+            if chunked_lists:
+                # Encoded right away: the Content-Length header (which is written first) needs
+                # the size of the whole message.
+                buffers = tuple(_encode_chunked_json_lists(text, chunked_lists))
+            if request_timings is not None and as_dict.get('type') == 'response':
+                request_timings.mark(as_dict.get('request_seq'), 'serialized')
+            if chunked_lists:
+                if DebugInfoHolder.DEBUG_TRACE_LEVEL >= 1:
+                    self._show_debug_info(cmd_id, seq, b''.join(buffers).decode('utf-8'))
+                self._as_bytes = None
+                self._buffers = buffers
+                self._size = sum(len(b) for b in buffers)
+                return
 
         if IS_PY2:
             if isinstance(text, unicode):
@@ -103,20 +132,16 @@ class NetCommand(_BaseNetCommand):
             assert isinstance(msg, bytes)
             as_bytes = msg
         self._as_bytes = as_bytes
+        self._buffers = (as_bytes,)
+        self._size = len(as_bytes)
+
+    def get_buffers_to_send(self):
+        if get_protocol() in (HTTP_PROTOCOL, HTTP_JSON_PROTOCOL):
+            return (('Content-Length: %s\r\n\r\n' % self._size).encode('ascii'),) + self._buffers
+        return self._buffers
 
     def send(self, sock):
-        as_bytes = self._as_bytes
-        try:
-            if get_protocol() in (HTTP_PROTOCOL, HTTP_JSON_PROTOCOL):
-                sock.sendall(('Content-Length: %s\r\n\r\n' % len(as_bytes)).encode('ascii'))
-            sock.sendall(as_bytes)
-        except:
-            if IS_JYTHON:
-                # Ignore errors in sock.sendall in Jython (seems to be common for Jython to
-                # give spurious exceptions at interpreter shutdown here).
-                pass
-            else:
-                raise
+        send_commands(sock, (self,))
 
     @classmethod
     def _show_debug_info(cls, cmd_id, seq, text):
@@ -140,3 +165,177 @@ class NetCommand(_BaseNetCommand):
             finally:
                 cls._showing_debug_info -= 1
 
+
+class ChunkedJsonList(object):
+    '''
+    May be used in the dict of a json NetCommand in place of a (potentially big) list.
+
+    The items are generated and encoded one by one into chunks of about _JSON_LIST_CHUNK_SIZE
+    when the command is created, so, the items never need to be in memory together as python
+    objects, and the encoded list is never joined into a single string (the chunks are written
+    as separate buffers).
+
+    :note: this isn't streaming: all the chunks are kept until the command is written, and
+        nothing is written before the whole list is encoded (as the Content-Length header
+        comes first).
+
+    :note: the as_dict of the command keeps this placeholder, so, it shouldn't be used when
+        there are DAP messages listeners (which expect the actual contents).
+    '''
+
+    def __init__(self, items):
+        '''
+        :param iterable(dict) items:
+            The items of the list (must be dicts ready to be converted to json).
+        '''
+        self.items = items
+
+
+def _replace_chunked_json_list(obj, chunked_lists):
+    if isinstance(obj, ChunkedJsonList):
+        chunked_lists.append(obj)
+        return _CHUNKED_JSON_LIST_MARKER
+    raise TypeError('Object of type %s is not JSON serializable' % (obj.__class__.__name__,))
+
+
+def _to_bytes(s):
+    if IS_PY2 and not isinstance(s, unicode):
+        return s
+    return s.encode('utf-8')
+
+
+def _encode_chunked_json_lists(text, chunked_lists):
+    '''
+    :param str text:
+        The json of a command with markers in place of the given chunked lists.
+
+    :return iterable(bytes):
+        The chunks of the json with the chunked lists encoded.
+    '''
+    parts = text.split(_ENCODED_CHUNKED_JSON_LIST_MARKER)
+    assert len(parts) == len(chunked_lists) + 1
+    for part, chunked_list in zip(parts, chunked_lists):
+        yield _to_bytes(part)
+        for chunk in _encode_json_list(chunked_list.items):
+            yield chunk
+    yield _to_bytes(parts[-1])
+
+
+def _encode_json_list(items):
+    chunk = ['[']
+    size = 0
+    separator = ''
+    for item in items:
+        encoded = json.dumps(item)
+        chunk.append(separator)
+        chunk.append(encoded)
+        separator = ', '
+        size += len(encoded)
+        if size >= _JSON_LIST_CHUNK_SIZE:
+            yield _to_bytes(''.join(chunk))
+            del chunk[:]
+            size = 0
+    chunk.append(']')
+    yield _to_bytes(''.join(chunk))
+
+
+# Upper bound for the number of buffers passed to a single sendmsg call (IOV_MAX is usually 1024).
+_MAX_BUFFERS_PER_SENDMSG = 512
+
+
+class NetCommandBatch(object):
+    '''
+    Collects commands to be written to a socket so that they're written together.
+
+    When the socket supports sendmsg the buffers of the commands are written as they are
+    (without copying them to a single buffer first), otherwise they're joined and written
+    with a single sendall.
+    '''
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._buffers = []
+        self._commands = 0
+
+        # Metrics.
+        self.flushes = 0
+        self.commands_sent = 0
+        self.bytes_sent = 0
+        self.max_commands_per_flush = 0
+        self.max_bytes_per_flush = 0
+
+    def add(self, cmd):
+        self._buffers.extend(cmd.get_buffers_to_send())
+        self._commands += 1
+
+    def flush(self):
+        buffers = self._buffers
+        commands = self._commands
+        self._commands = 0
+        if not buffers:
+            return
+
+        try:
+            if hasattr(self.sock, 'sendmsg'):
+                size = _sendmsg_all(self.sock, buffers)
+            else:
+                as_bytes = b''.join(buffers)
+                size = len(as_bytes)
+                self.sock.sendall(as_bytes)
+        except:
+            if IS_JYTHON:
+                # Ignore errors in sock.sendall in Jython (seems to be common for Jython to
+                # give spurious exceptions at interpreter shutdown here).
+                return
+            else:
+                raise
+        finally:
+            del buffers[:]
+
+        self.flushes += 1
+        self.commands_sent += commands
+        self.bytes_sent += size
+        if commands > self.max_commands_per_flush:
+            self.max_commands_per_flush = commands
+        if size > self.max_bytes_per_flush:
+            self.max_bytes_per_flush = size
+
+    def get_metrics_description(self):
+        flushes = self.flushes or 1
+        return '%s commands (%s bytes) in %s flushes, %.1f commands (%.0f bytes) per flush, max: %s commands (%s bytes)' % (
+            self.commands_sent, self.bytes_sent, self.flushes,
+            float(self.commands_sent) / flushes, float(self.bytes_sent) / flushes,
+            self.max_commands_per_flush, self.max_bytes_per_flush)
+
+
+def _sendmsg_all(sock, buffers):
+    '''
+    Writes all the buffers with sendmsg (which, unlike sendall, may write just a part of them).
+
+    :return int:
+        The number of bytes written.
+    '''
+    buffers = [memoryview(b) for b in buffers if b]
+    total = 0
+    i = 0
+    while i < len(buffers):
+        sent = sock.sendmsg(buffers[i:i + _MAX_BUFFERS_PER_SENDMSG])
+        total += sent
+        while sent:
+            size = len(buffers[i])
+            if sent < size:
+                buffers[i] = buffers[i][sent:]
+                break
+            sent -= size
+            i += 1
+    return total
+
+
+def send_commands(sock, cmds):
+    '''
+    Writes the given commands to the socket together.
+    '''
+    batch = NetCommandBatch(sock)
+    for cmd in cmds:
+        batch.add(cmd)
+    batch.flush()
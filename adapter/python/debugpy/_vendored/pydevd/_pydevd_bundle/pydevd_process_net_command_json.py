@@ -4,6 +4,7 @@ import linecache
 import os
 import platform
 import sys
+import time
 from functools import partial
 
 import pydevd_file_utils
@@ -24,7 +25,8 @@ from _pydevd_bundle.pydevd_comm_constants import (
     CMD_STEP_RETURN_MY_CODE, CMD_STEP_RETURN)
 from _pydevd_bundle.pydevd_filtering import ExcludeFilter
 from _pydevd_bundle.pydevd_json_debug_options import _extract_debug_options, DebugOptions
-from _pydevd_bundle.pydevd_net_command import NetCommand
+from _pydevd_bundle.pydevd_net_command import NetCommand, ChunkedJsonList
+from _pydevd_bundle.pydevd_timings import request_timings
 from _pydevd_bundle.pydevd_utils import convert_dap_log_message_to_expression, ScopeRequest
 from _pydevd_bundle.pydevd_constants import (PY_IMPL_NAME, DebugInfoHolder, PY_VERSION_STR,
     PY_IMPL_VERSION_STR, IS_64BIT_PROCESS)
@@ -127,6 +129,9 @@ class PyDevJsonCommandProcessor(object):
 
         DEBUG = False
 
+        if request_timings is not None:
+            received_at = time.time()
+
         try:
             if isinstance(json_contents, bytes):
                 json_contents = json_contents.decode('utf-8')
@@ -172,6 +177,9 @@ class PyDevJsonCommandProcessor(object):
             if DEBUG:
                 print('Handled in pydevd: %s (in PyDevJsonCommandProcessor).\n' % (method_name,))
 
+        if request_timings is not None:
+            request_timings.mark(request.seq, 'received', request.command, at=received_at)
+
         with py_db._main_lock:
             if request.__class__ == PydevdAuthorizeRequest:
                 authorize_request = request  # : :type authorize_request: PydevdAuthorizeRequest
@@ -185,7 +193,11 @@ class PyDevJsonCommandProcessor(object):
                 py_db.writer.add_command(cmd)
                 return
 
+            if request_timings is not None:
+                request_timings.mark(request.seq, 'dispatched')
             cmd = on_request(py_db, request)
+            if request_timings is not None:
+                request_timings.mark(request.seq, 'handled')
             if cmd is not None and send_response:
                 py_db.writer.add_command(cmd)
 
@@ -915,9 +927,17 @@ class PyDevJsonCommandProcessor(object):
     def on_modules_request(self, py_db, request):
         modules_manager = py_db.cmd_factory.modules_manager  # : :type modules_manager: ModulesManager
         modules_info = modules_manager.get_modules_info()
-        body = ModulesResponseBody(modules_info)
-        variables_response = pydevd_base_schema.build_response(request, kwargs={'body': body})
-        return NetCommand(CMD_RETURN, 0, variables_response, is_json=True)
+        if py_db.dap_messages_listeners:
+            body = ModulesResponseBody(modules_info)
+            variables_response = pydevd_base_schema.build_response(request, kwargs={'body': body})
+            return NetCommand(CMD_RETURN, 0, variables_response, is_json=True)
+
+        # Note: there may be many modules, so, they're encoded one by one.
+        variables_response = pydevd_base_schema.build_response(request, kwargs={'body': ModulesResponseBody([])})
+        as_dict = variables_response.to_dict(update_ids_to_dap=True)
+        as_dict['body']['modules'] = ChunkedJsonList(
+            pydevd_schema.Module.update_dict_ids_to_dap(module) for module in modules_info)
+        return NetCommand(CMD_RETURN, 0, as_dict, is_json=True)
 
     def on_source_request(self, py_db, request):
         '''
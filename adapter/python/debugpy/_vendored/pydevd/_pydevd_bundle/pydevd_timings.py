@@ -0,0 +1,89 @@
+'''
+Opt-in timing of the DAP requests handled by pydevd (enabled with PYDEVD_REQUEST_TIMINGS=1).
+
+The time at which each request reaches each stage of its handling is recorded and, after its
+response is written, a "debugpyTimings" event is sent with the milliseconds elapsed from the
+time it was received until each stage:
+
+    received: the request was read (before parsing it).
+    dispatched: the request was parsed and its handler is about to be called.
+    handled: the handler returned (requests answered right away end here).
+    started: an internal command to handle it started running (in the suspended thread).
+    executed: the internal command finished.
+    serialized: its response was converted to json.
+    sent: its response was written to the socket.
+
+i.e.:
+
+    {"type": "event", "event": "debugpyTimings", "body": {"command": "variables",
+        "request_seq": 12, "timings": {"received": 0.0, "dispatched": 0.1, ...}}}
+'''
+from _pydev_imps._pydev_saved_modules import threading
+from _pydevd_bundle.pydevd_constants import PYDEVD_REQUEST_TIMINGS
+import time
+
+TIMINGS_EVENT = 'debugpyTimings'
+
+# Requests still being handled beyond this number are forgotten (i.e.: when responses are
+# not sent for some reason).
+_MAX_TRACKED_REQUESTS = 1000
+
+
+class RequestTimings(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}  # request seq -> (command, dict(stage -> time))
+
+    def mark(self, request_seq, stage, command=None, at=None):
+        '''
+        Records that the request reached the given stage.
+
+        :param command:
+            Must be given for the first stage (requests are only tracked from then on).
+
+        :param at:
+            The time (from time.time()) at which the stage was reached (if not now).
+        '''
+        if at is None:
+            at = time.time()
+        with self._lock:
+            entry = self._requests.get(request_seq)
+            if entry is None:
+                if command is None:
+                    return
+                if len(self._requests) >= _MAX_TRACKED_REQUESTS:
+                    self._requests.clear()
+                entry = self._requests[request_seq] = (command, {})
+            entry[1][stage] = at
+
+    def pop_event_body(self, request_seq):
+        '''
+        :return dict|None:
+            The body for the debugpyTimings event of the given request (which is then no
+            longer tracked) or None if it's not tracked.
+        '''
+        with self._lock:
+            entry = self._requests.pop(request_seq, None)
+        if entry is None:
+            return None
+
+        command, stages = entry
+        start = stages.get('received', min(stages.values()))
+        timings = dict((stage, round((t - start) * 1000, 3)) for stage, t in stages.items())
+        return {'command': command, 'request_seq': request_seq, 'timings': timings}
+
+
+def get_request_seq(args):
+    '''
+    :return int|None:
+        The seq of the DAP request in the given arguments (of an internal command), if any.
+    '''
+    for arg in args:
+        if getattr(arg, 'type', None) == 'request':
+            return getattr(arg, 'seq', None)
+    return None
+
+
+# None when disabled (so, checking it is all the overhead there is in that case).
+request_timings = RequestTimings() if PYDEVD_REQUEST_TIMINGS else None
@@ -4,6 +4,7 @@ from _pydev_imps._pydev_saved_modules import threading
 from _pydevd_bundle.pydevd_constants import (get_current_thread_id, NO_FTRACE,
     USE_CUSTOM_SYS_CURRENT_FRAMES_MAP, ForkSafeLock)
 from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
+from _pydevd_bundle.pydevd_caches import BoundedCache
 
 # IFDEF CYTHON
 # from cpython.object cimport PyObject
@@ -30,8 +31,8 @@ CMD_STEP_RETURN_MY_CODE = 160
 # It needs to be invalidated when:
 # - Breakpoints are changed
 # It can be used when running regularly (without step over/step in/step return)
-global_cache_skips = {}
-global_cache_frame_skips = {}
+global_cache_skips = BoundedCache('global_cache_skips')
+global_cache_frame_skips = BoundedCache('global_cache_frame_skips')
 
 _global_notify_skipped_step_in = False
 _global_notify_skipped_step_in_lock = ForkSafeLock()
@@ -341,7 +342,7 @@ class ThreadTracer(object):
         # cdef str base;
         # cdef int pydev_step_cmd;
         # cdef tuple frame_cache_key;
-        # cdef dict cache_skips;
+        # cdef object cache_skips;
         # cdef bint is_stepping;
         # cdef tuple abs_path_canonical_path_and_base;
         # cdef PyDBAdditionalThreadInfo additional_info;
@@ -441,7 +442,7 @@ class ThreadTracer(object):
             if ret is None:
                 # 1 means skipped because of filters.
                 # 2 means skipped because no breakpoints were hit.
-                cache_skips[frame_cache_key] = 2
+                cache_skips.set_for_file(abs_path_canonical_path_and_base[1], frame_cache_key, 2)
                 return None if event == 'call' else NO_FTRACE
 
             # IFDEF CYTHON
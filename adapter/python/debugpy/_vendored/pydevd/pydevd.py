@@ -57,8 +57,10 @@ import pydev_ipython  # @UnusedImport
 from _pydevd_bundle.pydevd_source_mapping import SourceMapping
 from pydevd_concurrency_analyser.pydevd_concurrency_logger import ThreadingLogger, AsyncioLogger, send_concurrency_message, cur_time
 from pydevd_concurrency_analyser.pydevd_thread_wrappers import wrap_threads
-from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
+from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER, \
+    NORM_PATHS_CONTAINER, NORMCASE_CACHE
 from pydevd_file_utils import get_fullname, get_package_dir
+from _pydevd_bundle.pydevd_caches import BoundedCache
 from os.path import abspath as os_path_abspath
 import pydevd_tracing
 from _pydevd_bundle.pydevd_comm import (InternalThreadCommand, InternalThreadCommandForAnyThread,
@@ -152,7 +154,7 @@ _global_redirect_stderr_to_server = False
 
 file_system_encoding = getfilesystemencoding()
 
-_CACHE_FILE_TYPE = {}
+_CACHE_FILE_TYPE = BoundedCache('file_type')
 
 pydev_log.debug('Using GEVENT_SUPPORT: %s', pydevd_constants.SUPPORT_GEVENT)
 pydev_log.debug('pydevd __file__: %s', os.path.abspath(__file__))
@@ -525,6 +527,10 @@ class PyDB(object):
         # mtime to be raised when breakpoints change
         self.mtime = 0
 
+        # canonical_normalized_filename -> mtime raised when the line breakpoints of the file change
+        # (part of the key of the entries in global_cache_frame_skips which depend on them).
+        self.file_to_breakpoints_mtime = {}
+
         self.file_to_id_to_line_breakpoint = {}
         self.file_to_id_to_plugin_breakpoint = {}
 
@@ -651,9 +657,9 @@ class PyDB(object):
         self.PYDEV_FILE = PYDEV_FILE
         self.LIB_FILE = LIB_FILE
 
-        self._in_project_scope_cache = {}
-        self._exclude_by_filter_cache = {}
-        self._apply_filter_cache = {}
+        self._in_project_scope_cache = BoundedCache('in_project_scope')
+        self._exclude_by_filter_cache = BoundedCache('exclude_by_filter')
+        self._apply_filter_cache = BoundedCache('apply_filter')
         self._ignore_system_exit_codes = set()
 
         # DAP related
@@ -864,7 +870,10 @@ class PyDB(object):
 
         # Note 3: this cache key is repeated in pydevd_frame_evaluator.pyx:get_func_code_info (for
         # speedups).
-        cache_key = (frame.f_code.co_firstlineno, abs_real_path_and_basename[0], frame.f_code)
+
+        # Note 4: the id of the code is used so that the cache doesn't keep it alive (the entry
+        # is removed when the code is collected).
+        cache_key = (frame.f_code.co_firstlineno, abs_real_path_and_basename[0], id(frame.f_code))
         try:
             return _cache_file_type[cache_key]
         except:
@@ -885,13 +894,13 @@ class PyDB(object):
 
                         # Note that we return as a LIB_FILE and not PYDEV_FILE because we still want
                         # to show it in the stack.
-                        _cache_file_type[cache_key] = LIB_FILE
+                        _cache_file_type.set_for_code(frame.f_code, cache_key, LIB_FILE)
                         return LIB_FILE
                     f = f.f_back
                 else:
                     # This is a top-level file (used in python -c), so, trace it as usual... we
                     # still won't be able to show the sources, but some tests require this to work.
-                    _cache_file_type[cache_key] = None
+                    _cache_file_type.set_for_code(frame.f_code, cache_key, None)
                     return None
 
             file_type = self._internal_get_file_type(abs_real_path_and_basename)
@@ -899,11 +908,11 @@ class PyDB(object):
                 if self.dont_trace_external_files(abs_real_path_and_basename[0]):
                     file_type = PYDEV_FILE
 
-            _cache_file_type[cache_key] = file_type
+            _cache_file_type.set_for_code(frame.f_code, cache_key, file_type)
             return file_type
 
     def is_cache_file_type_empty(self):
-        return not _CACHE_FILE_TYPE
+        return _CACHE_FILE_TYPE.is_empty()
 
     def get_cache_file_type(self, _cache=_CACHE_FILE_TYPE):  # i.e.: Make it local.
         return _cache
@@ -1019,6 +1028,26 @@ class PyDB(object):
     def threads_suspended_single_notification(self):
         return self._threads_suspended_single_notification
 
+    @property
+    def caches_stats(self):
+        '''
+        :return dict(str->dict):
+            The stats of the caches kept while tracing by their name (see:
+            _pydevd_bundle.pydevd_caches).
+        '''
+        caches = (
+            _CACHE_FILE_TYPE,
+            self._in_project_scope_cache,
+            self._exclude_by_filter_cache,
+            self._apply_filter_cache,
+            global_cache_skips,
+            global_cache_frame_skips,
+            NORM_PATHS_CONTAINER,
+            NORM_PATHS_AND_BASE_CONTAINER,
+            NORMCASE_CACHE,
+        )
+        return dict((cache.name, cache.get_stats()) for cache in caches)
+
     def get_plugin_lazy_init(self):
         if self.plugin is None and SUPPORT_PLUGINS:
             self.plugin = PluginManager(self)
@@ -1047,7 +1076,7 @@ class PyDB(object):
 
                 absolute_filename = abs_real_path_and_basename[0]
 
-            cache_key = (frame.f_code.co_firstlineno, absolute_filename, frame.f_code)
+            cache_key = (frame.f_code.co_firstlineno, absolute_filename, id(frame.f_code))
 
             return self._in_project_scope_cache[cache_key]
         except KeyError:
@@ -1060,22 +1089,23 @@ class PyDB(object):
             # pydevd files are never considered to be in the project scope.
             file_type = self.get_file_type(frame, abs_real_path_and_basename)
             if file_type == self.PYDEV_FILE:
-                cache[cache_key] = False
+                in_project = False
 
             elif absolute_filename == '<string>':
                 # Special handling for '<string>'
                 if file_type == self.LIB_FILE:
-                    cache[cache_key] = False
+                    in_project = False
                 else:
-                    cache[cache_key] = True
+                    in_project = True
 
             elif self.source_mapping.has_mapping_entry(absolute_filename):
-                cache[cache_key] = True
+                in_project = True
 
             else:
-                cache[cache_key] = self._files_filtering.in_project_roots(absolute_filename)
+                in_project = self._files_filtering.in_project_roots(absolute_filename)
 
-            return cache[cache_key]
+            cache.set_for_code(frame.f_code, cache_key, in_project)
+            return in_project
 
     def _clear_filters_caches(self):
         self._in_project_scope_cache.clear()
@@ -1136,7 +1166,7 @@ class PyDB(object):
             True if it should be excluded when stepping and False if it should be
             included.
         '''
-        cache_key = (frame.f_code.co_firstlineno, original_filename, force_check_project_scope, frame.f_code)
+        cache_key = (frame.f_code.co_firstlineno, original_filename, force_check_project_scope, id(frame.f_code))
         try:
             return self._apply_filter_cache[cache_key]
         except KeyError:
@@ -1144,7 +1174,7 @@ class PyDB(object):
                 # If it's explicitly needed by some plugin, we can't skip it.
                 if not self.plugin.can_skip(self, frame):
                     pydev_log.debug_once('File traced (included by plugins): %s', original_filename)
-                    self._apply_filter_cache[cache_key] = False
+                    self._apply_filter_cache.set_for_code(frame.f_code, cache_key, False)
                     return False
 
             if self._exclude_filters_enabled:
@@ -1155,17 +1185,17 @@ class PyDB(object):
                         # ignore files matching stepping filters
                         pydev_log.debug_once('File not traced (excluded by filters): %s', original_filename)
 
-                        self._apply_filter_cache[cache_key] = True
+                        self._apply_filter_cache.set_for_code(frame.f_code, cache_key, True)
                         return True
                     else:
                         pydev_log.debug_once('File traced (explicitly included by filters): %s', original_filename)
 
-                        self._apply_filter_cache[cache_key] = False
+                        self._apply_filter_cache.set_for_code(frame.f_code, cache_key, False)
                         return False
 
             if (self._is_libraries_filter_enabled or force_check_project_scope) and not self.in_project_scope(frame):
                 # ignore library files while stepping
-                self._apply_filter_cache[cache_key] = True
+                self._apply_filter_cache.set_for_code(frame.f_code, cache_key, True)
                 if force_check_project_scope:
                     pydev_log.debug_once('File not traced (not in project): %s', original_filename)
                 else:
@@ -1177,7 +1207,7 @@ class PyDB(object):
                 pydev_log.debug_once('File traced: %s (force_check_project_scope)', original_filename)
             else:
                 pydev_log.debug_once('File traced: %s', original_filename)
-            self._apply_filter_cache[cache_key] = False
+            self._apply_filter_cache.set_for_code(frame.f_code, cache_key, False)
             return False
 
     def exclude_exception_by_filter(self, exception_breakpoint, trace):
@@ -1601,12 +1631,30 @@ class PyDB(object):
             break_dict[pybreakpoint.line] = pybreakpoint
 
         breakpoints[canonical_normalized_filename] = break_dict
-        self._clear_skip_caches()
+        if breakpoints is self.breakpoints:
+            self._clear_skip_caches_for_file(canonical_normalized_filename)
+        else:
+            # Plugin breakpoints (i.e.: in templates) may change whether code in any file is skipped.
+            self._clear_skip_caches()
 
     def _clear_skip_caches(self):
         global_cache_skips.clear()
         global_cache_frame_skips.clear()
 
+    def _clear_skip_caches_for_file(self, canonical_normalized_filename):
+        '''
+        Invalidates what was cached on skipping the code in the given file based on its line
+        breakpoints (when those change). What's cached for other files (or based on filters) is
+        still valid.
+        '''
+        # The entries in global_cache_frame_skips also have the mtime in the key (so that what a
+        # thread computes with the previous breakpoints and stores afterwards isn't used).
+        self.file_to_breakpoints_mtime[canonical_normalized_filename] = \
+            self.file_to_breakpoints_mtime.get(canonical_normalized_filename, 0) + 1
+
+        global_cache_skips.discard_entries_for_file(canonical_normalized_filename)
+        global_cache_frame_skips.discard_entries_for_file(canonical_normalized_filename)
+
     def add_break_on_exception(
         self,
         exception,
@@ -46,6 +46,7 @@ from _pydevd_bundle.pydevd_constants import IS_PY2, IS_PY3K, DebugInfoHolder, IS
 from _pydev_bundle._pydev_filesystem_encoding import getfilesystemencoding
 from _pydevd_bundle.pydevd_comm_constants import file_system_encoding, filesystem_encoding_is_utf8
 from _pydev_bundle.pydev_log import error_once
+from _pydevd_bundle.pydevd_caches import BoundedCache
 
 import json
 import os.path
@@ -300,7 +301,10 @@ else:
     _default_normcase = _normcase_linux
 
 
-def normcase(s, NORMCASE_CACHE={}):
+NORMCASE_CACHE = BoundedCache('normcase')
+
+
+def normcase(s, NORMCASE_CACHE=NORMCASE_CACHE):
     try:
         return NORMCASE_CACHE[s]
     except:
@@ -354,8 +358,8 @@ def set_ide_os(os):
 
 
 # Caches filled as requested during the debug session.
-NORM_PATHS_CONTAINER = {}
-NORM_PATHS_AND_BASE_CONTAINER = {}
+NORM_PATHS_CONTAINER = BoundedCache('norm_paths')
+NORM_PATHS_AND_BASE_CONTAINER = BoundedCache('norm_paths_and_base')
 
 
 def canonical_normalized_path(filename):
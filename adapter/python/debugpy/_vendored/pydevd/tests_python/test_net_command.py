@@ -0,0 +1,145 @@
+# coding: utf-8
+import pytest
+
+from _pydevd_bundle import pydevd_net_command
+from _pydevd_bundle.pydevd_net_command import NetCommand, NetCommandBatch
+
+
+class _PartialSendmsgSocket(object):
+    '''
+    Writes at most max_bytes in each sendmsg call (as sendmsg may do).
+    '''
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.written = []
+        self.sendmsg_buffers = []
+
+    def sendmsg(self, buffers):
+        self.sendmsg_buffers.append(len(buffers))
+        data = b''.join(memoryview(b).tobytes() for b in buffers)[:self.max_bytes]
+        self.written.append(data)
+        return len(data)
+
+
+class _SendallSocket(object):
+
+    def __init__(self):
+        self.written = []
+
+    def sendall(self, data):
+        self.written.append(data)
+
+
+def _make_commands():
+    return [
+        NetCommand(0, 0, {'type': 'event', 'event': 'output', 'body': {'output': u'%s ação\n' % (i,)}}, is_json=True)
+        for i in range(20)
+    ]
+
+
+def _expected(cmds):
+    return b''.join(b''.join(cmd.get_buffers_to_send()) for cmd in cmds)
+
+
+@pytest.mark.parametrize('max_bytes', [1, 7, 64, 1000000])
+@pytest.mark.parametrize('max_buffers', [1, 3, 512])
+def test_net_command_batch_partial_sendmsg(max_bytes, max_buffers, monkeypatch):
+    monkeypatch.setattr(pydevd_net_command, '_MAX_BUFFERS_PER_SENDMSG', max_buffers)
+    sock = _PartialSendmsgSocket(max_bytes)
+    batch = NetCommandBatch(sock)
+    cmds = _make_commands()
+    for cmd in cmds:
+        batch.add(cmd)
+    batch.flush()
+
+    expected = _expected(cmds)
+    assert b''.join(sock.written) == expected
+    assert max(sock.sendmsg_buffers) <= max_buffers
+    assert all(len(data) <= max_bytes for data in sock.written)
+    assert batch.flushes == 1
+    assert batch.commands_sent == len(cmds)
+    assert batch.bytes_sent == len(expected)
+
+    # Nothing is written again on the next flush.
+    del sock.written[:]
+    batch.flush()
+    assert sock.written == []
+
+
+def test_net_command_batch_sendall():
+    sock = _SendallSocket()
+    batch = NetCommandBatch(sock)
+    cmds = _make_commands()
+    for cmd in cmds:
+        batch.add(cmd)
+    batch.flush()
+
+    assert sock.written == [_expected(cmds)]
+    assert batch.bytes_sent == len(sock.written[0])
+
+
+def _variables():
+    from _pydevd_bundle._debug_adapter import pydevd_schema
+    for i in range(50):
+        yield pydevd_schema.Variable(
+            name=u'var_%s' % (i,),
+            value=u"u'ação \"%s\"\\n\\t'" % (i,),
+            variablesReference=i % 3,
+            type=u'str',
+            evaluateName=u'var_%s' % (i,),
+            presentationHint=pydevd_schema.VariablePresentationHint(attributes=['rawString'])
+        ).to_dict(update_ids_to_dap=True)
+
+
+def _stack_frames():
+    from _pydevd_bundle._debug_adapter import pydevd_schema
+    for i in range(50):
+        yield pydevd_schema.StackFrame(
+            id=i + 1,
+            name=u'<módulo> %s' % (i,),
+            line=i * 10,
+            column=1,
+            source=pydevd_schema.Source(path=u'/tmp/código/file_%s.py' % (i,), sourceReference=0).to_dict(),
+            presentationHint='subtle' if i % 2 else 'normal',
+        ).to_dict(update_ids_to_dap=True)
+
+
+def _response(command, body):
+    return {
+        'type': 'response',
+        'request_seq': 3,
+        'success': True,
+        'command': command,
+        'body': body,
+    }
+
+
+@pytest.mark.parametrize('chunk_size', [1, 100, 64 * 1024])
+@pytest.mark.parametrize('command, make_body', [
+    ('variables', lambda items: {'variables': items(_variables)}),
+    ('stackTrace', lambda items: {'stackFrames': items(_stack_frames), 'totalFrames': 50}),
+    ('variables', lambda items: {'variables': items(lambda: iter(()))}),
+])
+def test_chunked_json_list_same_as_json_dumps(chunk_size, command, make_body, monkeypatch):
+    import json
+    from _pydevd_bundle.pydevd_comm_constants import CMD_RETURN
+    from _pydevd_bundle.pydevd_net_command import ChunkedJsonList
+    monkeypatch.setattr(pydevd_net_command, '_JSON_LIST_CHUNK_SIZE', chunk_size)
+
+    chunked_cmd = NetCommand(
+        CMD_RETURN, 7, _response(command, make_body(lambda items: ChunkedJsonList(items()))), is_json=True)
+    chunked = b''.join(chunked_cmd.get_buffers_to_send())
+
+    as_dict = _response(command, make_body(lambda items: list(items())))
+    cmd = NetCommand(CMD_RETURN, 7, as_dict, is_json=True)
+    assert chunked == b''.join(cmd.get_buffers_to_send())
+
+    as_dict['pydevd_cmd_id'] = CMD_RETURN
+    as_dict['seq'] = 7
+    expected = json.dumps(as_dict)
+    if not isinstance(expected, bytes):
+        expected = expected.encode('utf-8')
+    assert chunked.endswith(expected)
+    if chunk_size == 1 and command == 'stackTrace':
+        assert len(chunked_cmd.get_buffers_to_send()) > 50
@@ -0,0 +1,41 @@
+import dis
+
+_SOURCE = '''
+def outer(a):
+    b = a + 1
+
+    def inner(c):
+        return c * 2
+
+    return inner(b)
+
+
+class Foo(object):
+
+    def method(self):
+        pass
+'''
+
+
+def _iter_codes(code):
+    yield code
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            for c in _iter_codes(const):
+                yield c
+
+
+def test_has_breakpoint_in_lines():
+    from _pydevd_bundle.pydevd_breakpoint_lines import get_code_lines, has_breakpoint_in_lines
+    module_code = compile(_SOURCE, '<breakpoint_lines>', 'exec')
+
+    for code in _iter_codes(module_code):
+        code_lines = get_code_lines(code)
+        assert get_code_lines(code) is code_lines
+        func_lines = set(lineno for _offset, lineno in dis.findlinestarts(code))
+
+        for line in range(0, 20):
+            for breakpoints_for_file in ({line: None}, {line: None, line + 1: None}, {}):
+                expected = any(bp_line in func_lines for bp_line in breakpoints_for_file)
+                assert has_breakpoint_in_lines(
+                    '<breakpoint_lines>', breakpoints_for_file, code_lines) == expected, (code.co_name, breakpoints_for_file)
@@ -0,0 +1,179 @@
+import gc
+
+
+def test_bounded_cache_generations():
+    from _pydevd_bundle.pydevd_caches import BoundedCache
+    cache = BoundedCache('test', max_size=3)
+
+    for i in range(3):
+        cache[i] = str(i)
+    assert cache.is_empty() is False
+    assert cache.get_stats()['generations'] == 0
+
+    # Rotates: 0, 1 and 2 go to the previous generation.
+    cache[3] = '3'
+    assert cache.get_stats()['generations'] == 1
+    assert cache.get_stats()['size'] == 4
+
+    # Brought back from the previous generation when indexed.
+    assert cache[1] == '1'
+    assert cache.get_stats()['recovered'] == 1
+
+    # Rotates again: 0 and 2 weren't used in the last generation and are dropped.
+    cache[4] = '4'
+    cache[5] = '5'
+    stats = cache.get_stats()
+    assert stats['generations'] == 2
+    assert stats['evictions'] == 2
+    assert stats['misses'] == 0
+    for i in (0, 2):
+        try:
+            cache[i]
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('Expected %s to be evicted.' % (i,))
+    assert cache.get_stats()['misses'] == 2
+    for i in (1, 3, 4, 5):
+        assert cache[i] == str(i)
+
+    cache.clear()
+    assert cache.is_empty()
+    assert cache.get_stats()['clears'] == 1
+
+
+def test_bounded_cache_get_and_contains_use_previous_generation():
+    from _pydevd_bundle.pydevd_caches import BoundedCache
+    cache = BoundedCache('test', max_size=2)
+
+    cache[0] = None
+    cache[1] = 1
+    cache[2] = 2  # Rotates: 0 and 1 go to the previous generation.
+
+    # Found in the previous generation (even if the value is None) and brought back.
+    assert cache.get(0, 'missing') is None
+    assert 1 in cache
+    stats = cache.get_stats()
+    assert stats['recovered'] == 2
+    assert stats['misses'] == 0
+
+    assert cache.get(3) is None
+    assert cache.get(3, 'missing') == 'missing'
+    assert 3 not in cache
+    assert cache.get_stats()['misses'] == 3
+
+    # 1 was brought back last (rotating 2 and 0 to the previous generation), so, it survives
+    # the next rotation.
+    cache[4] = 4
+    cache[5] = 5
+    assert cache.get(1) == 1
+    assert cache.get(2) is None
+    assert 0 not in cache
+
+
+def test_bounded_cache_code_collected():
+    from _pydevd_bundle.pydevd_caches import BoundedCache
+    cache = BoundedCache('test', max_size=10)
+
+    code = compile('a = 1', '<string>', 'exec')
+    key = (1, '<string>', id(code))
+    cache.set_for_code(code, key, 'value')
+    assert cache[key] == 'value'
+    assert cache.get_stats()['code_objects'] == 1
+
+    del code
+    gc.collect()
+    assert key not in cache
+    assert cache.get_stats()['code_objects'] == 0
+
+
+def test_caches_stats():
+    from pydevd import PyDB
+    py_db = PyDB(set_as_global=False)
+
+    caches_stats = py_db.caches_stats
+    for name in ('file_type', 'apply_filter', 'global_cache_skips', 'global_cache_frame_skips', 'normcase'):
+        assert name in caches_stats
+        assert caches_stats[name]['max_size'] > 0
+
+
+def test_bounded_cache_discard_entries():
+    from _pydevd_bundle.pydevd_caches import BoundedCache
+    cache = BoundedCache('test', max_size=3)
+
+    for i in range(5):
+        cache[i] = i % 2
+    assert cache.get_stats()['generations'] == 1
+
+    # Discarded from both generations.
+    cache.discard_entries(lambda key, value: value == 0)
+    assert cache.get_stats()['discarded'] == 3
+    for i in (0, 2, 4):
+        try:
+            cache[i]
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('Expected %s to be discarded.' % (i,))
+    assert cache[1] == 1
+    assert cache[3] == 1
+
+
+def test_bounded_cache_discard_entries_for_file():
+    from _pydevd_bundle.pydevd_caches import BoundedCache
+    cache = BoundedCache('test', max_size=3)
+
+    cache.set_for_file('file1', 'a', 1)
+    cache.set_for_file('file2', 'b', 1)
+    cache.set_for_file('file1', 'c', 1)
+    cache.set_for_file('file1', 'd', 1)
+    assert cache.get_stats()['generations'] == 1
+
+    # Discarded from both generations (and only for the given file).
+    cache.discard_entries_for_file('file1')
+    assert cache.get_stats()['discarded'] == 3
+    for key in ('a', 'c', 'd'):
+        assert key not in cache
+    assert cache['b'] == 1
+    assert cache.get_stats()['files'] == 1
+
+    # Keys dropped with the previous generation are dropped from the index too.
+    for i in range(6):
+        cache[i] = i
+    assert cache.get_stats()['files'] == 0
+
+
+def test_clear_skip_caches_for_file(tmpdir):
+    from pydevd import PyDB
+    from _pydevd_bundle.pydevd_trace_dispatch import global_cache_skips, global_cache_frame_skips
+    import pydevd_file_utils
+    py_db = PyDB(set_as_global=False)
+
+    filename1 = str(tmpdir.join('file1.py'))
+    filename2 = str(tmpdir.join('file2.py'))
+    canonical1 = pydevd_file_utils.canonical_normalized_path(filename1)
+    canonical2 = pydevd_file_utils.canonical_normalized_path(filename2)
+
+    global_cache_skips.clear()
+    global_cache_frame_skips.clear()
+    try:
+        global_cache_skips.set_for_file(canonical1, (1, 'skipped_no_breakpoints', filename1), 2)
+        global_cache_skips[(2, 'skipped_by_filters', filename1)] = 1
+        global_cache_skips.set_for_file(canonical2, (1, 'skipped_no_breakpoints', filename2), 2)
+        global_cache_frame_skips.set_for_file(canonical1, ((1, 'has_breakpoint', filename1), 0), 1)
+        global_cache_frame_skips.set_for_file(canonical2, ((1, 'has_breakpoint', filename2), 0), 1)
+
+        py_db.consolidate_breakpoints(canonical1, {}, py_db.breakpoints)
+
+        assert py_db.file_to_breakpoints_mtime == {canonical1: 1}
+        assert (1, 'skipped_no_breakpoints', filename1) not in global_cache_skips
+        assert ((1, 'has_breakpoint', filename1), 0) not in global_cache_frame_skips
+        assert global_cache_skips[(2, 'skipped_by_filters', filename1)] == 1
+        assert global_cache_skips[(1, 'skipped_no_breakpoints', filename2)] == 2
+        assert global_cache_frame_skips[((1, 'has_breakpoint', filename2), 0)] == 1
+
+        py_db.consolidate_breakpoints(canonical1, {}, py_db.breakpoints)
+        assert py_db.file_to_breakpoints_mtime == {canonical1: 2}
+    finally:
+        global_cache_skips.clear()
+        global_cache_frame_skips.clear()
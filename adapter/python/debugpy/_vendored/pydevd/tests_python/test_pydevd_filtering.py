@@ -130,6 +130,38 @@ def test_in_project_roots(tmpdir):
         sys.path.remove(str(site_packages))
 
 
+def test_in_project_roots_deepest_root(tmpdir):
+    from _pydevd_bundle.pydevd_filtering import FilesFiltering
+    import os.path
+    files_filtering = FilesFiltering()
+
+    tmpdir = str(tmpdir)
+    a = os.path.join(tmpdir, 'a')
+    a_b = os.path.join(a, 'b')
+    a_b_c = os.path.join(a_b, 'c')
+
+    files_filtering.set_project_roots([a, a_b_c])
+    files_filtering.set_library_roots([a_b, a_b_c])
+    initial_counters = files_filtering.get_roots_lookup_counters()
+
+    check = [
+        (os.path.join(tmpdir, 'f.py'), False),
+        (os.path.join(a, 'f.py'), True),
+        (a, True),
+        (os.path.join(tmpdir, 'ab', 'f.py'), False),
+        (os.path.join(a_b, 'f.py'), False),
+        (a_b + 'c', True),
+        (os.path.join(a_b_c, 'f.py'), False),  # Both a project and a library root: library wins.
+    ]
+    for check_path, find in check:
+        assert files_filtering.in_project_roots(check_path) == find, \
+            'Expected: %s to be a part of the project: %s' % (check_path, find)
+
+    counters = files_filtering.get_roots_lookup_counters()
+    assert counters['lookups'] - initial_counters['lookups'] == len(check)
+    assert counters['root_checks_avoided'] - initial_counters['root_checks_avoided'] == len(check) * 4
+
+
 def test_filtering(tmpdir):
     from _pydevd_bundle.pydevd_filtering import FilesFiltering
     from _pydevd_bundle.pydevd_filtering import ExcludeFilter
@@ -214,6 +246,65 @@ def test_glob_matching():
         assert glob_matches_path(build('/'), r'*', sep, altsep)
 
 
+def test_exclude_filters_matcher_same_as_glob_matching():
+    from _pydevd_bundle.pydevd_filtering import glob_matches_path
+    from _pydevd_bundle.pydevd_filtering import _ExcludeFiltersMatcher
+    from _pydevd_bundle.pydevd_filtering import ExcludeFilter
+
+    patterns = [
+        '', '*', '**', '/**', '/*', '**/*', '**/d', '**/c', '**/c/d', '/*/b/*/d', '/a/**/c/*',
+        '/a/**/c/*.py', '/a/**/c/so?.py', '/**/d.py', '**/[cd]/*', '**/[!c]/d', '/a/b/c/d',
+        r'**\d', r'c:\**\d', 'c:', 'd:/a/**', '/a+b/(c)/*', '**/**/?',
+    ]
+    paths = [
+        '', '/', '/a', '/a/b', '/a/b/c', '/a/b/c/d', '/a/b/c/d.py', '/a/b/c/some.py', '/a/b/C/d.py',
+        '/a+b/(c)/d', 'c:', 'c:/', 'd:', 'C:/a/b/c/d', 'd:/a/b', 'x',
+    ]
+
+    for sep, altsep in (('\\', '/'), ('/', None)):
+        for path in paths:
+            if sep == '\\':
+                path = path.replace('/', '\\')
+
+            for i in range(len(patterns)):
+                # Rotate the patterns so that each one gets to be the first.
+                exclude_filters = [ExcludeFilter(pattern, True, True) for pattern in patterns[i:] + patterns[:i]]
+                matcher = _ExcludeFiltersMatcher(exclude_filters, sep, altsep)
+
+                expected = None
+                for index, exclude_filter in enumerate(exclude_filters):
+                    if glob_matches_path(path, exclude_filter.name, sep, altsep):
+                        expected = index
+                        break
+                assert matcher.get_first_match(path, None) == expected, (sep, path, exclude_filters)
+
+
+def test_exclude_filters_first_rule_wins():
+    from _pydevd_bundle.pydevd_filtering import FilesFiltering
+    from _pydevd_bundle.pydevd_filtering import ExcludeFilter
+    files_filtering = FilesFiltering()
+
+    files_filtering.set_exclude_filters([
+        ExcludeFilter('bar.foo', False, False),
+        ExcludeFilter('**/foo/*.py', True, True),
+        ExcludeFilter('bar', True, False),
+        ExcludeFilter('**/*.py', False, True),
+    ])
+    assert files_filtering.exclude_by_filter('/a/bar/foo/__init__.py', 'bar.foo') is False
+    assert files_filtering.exclude_by_filter('/a/bar/foo/mod.py', 'bar.foo.mod') is False
+    assert files_filtering.exclude_by_filter('/a/bar/foo/mod.py', 'other.foo.mod') is True
+    assert files_filtering.exclude_by_filter('/a/bar/mod.py', 'bar.mod') is True
+    assert files_filtering.exclude_by_filter('/a/barz/mod.py', 'barz.mod') is False
+    assert files_filtering.exclude_by_filter('/a/bar/mod.txt', 'barz.mod') is None
+
+    # More filters than fit in a single regex.
+    exclude_filters = [ExcludeFilter('/dir%s/**' % (i,), bool(i % 2), True) for i in range(250)]
+    files_filtering.set_exclude_filters(exclude_filters)
+    for i in range(250):
+        assert files_filtering.exclude_by_filter('/dir%s/a.py' % (i,), None) is bool(i % 2)
+    assert files_filtering.exclude_by_filter('/dir250/a.py', None) is None
+
+
 def test_rules_to_exclude_filter(tmpdir):
     from _pydevd_bundle.pydevd_process_net_command_json import _convert_rules_to_exclude_filters
     from _pydevd_bundle.pydevd_filtering import ExcludeFilter
@@ -0,0 +1,196 @@
+import threading
+import time
+
+import pytest
+
+from _pydevd_bundle import pydevd_comm
+from _pydevd_bundle.pydevd_comm import WriterThread
+from _pydevd_bundle.pydevd_comm_constants import CMD_EXIT, CMD_WRITE_TO_CONSOLE
+from _pydevd_bundle.pydevd_net_command import NetCommand
+from _pydevd_bundle.pydevd_net_command_factory_json import NetCommandFactoryJson
+
+
+@pytest.fixture
+def writer():
+    from pydevd import PyDB
+    py_db = PyDB(set_as_global=False)
+    py_db.cmd_factory = NetCommandFactoryJson()
+    # Not started: the test takes the commands the writer would send (the writer only keeps a
+    # weak reference to py_db, so, it must be kept alive here).
+    yield WriterThread(None, py_db)
+
+
+def _output(writer, text, ctx=1):
+    return writer.py_db.cmd_factory.make_io_message(text, ctx)
+
+
+def _event(name):
+    return NetCommand(0, 0, {'type': 'event', 'event': name, 'body': {}}, is_json=True)
+
+
+def _texts(cmds):
+    ret = []
+    for cmd in cmds:
+        if cmd.as_dict['event'] == 'output':
+            ret.append((cmd.as_dict['body']['category'], cmd.as_dict['body']['output']))
+        else:
+            ret.append(cmd.as_dict['event'])
+    return ret
+
+
+def test_writer_thread_output_lane_limit(writer, monkeypatch):
+    monkeypatch.setattr(pydevd_comm, 'PYDEVD_OUTPUT_QUEUE_HIGH_WATER', 3)
+    monkeypatch.setattr(pydevd_comm, 'PYDEVD_OUTPUT_QUEUE_TIMEOUT', 0.2)
+
+    for i in range(3):
+        writer.add_command(_output(writer, '%s\n' % (i,)))
+
+    # The first message which doesn't fit waits for the lane to drain...
+    initial_time = time.time()
+    writer.add_command(_output(writer, 'dropped\n'))
+    assert time.time() - initial_time >= 0.2
+
+    # ... but the next ones are dropped right away.
+    initial_time = time.time()
+    for i in range(20):
+        writer.add_command(_output(writer, 'dropped\n'))
+    assert time.time() - initial_time < 0.2
+    assert len(writer._output_queue) == 3
+    assert writer.output_dropped == 21
+
+    assert _texts(writer._get_commands_to_send()) == [('stdout', '0\n1\n2\n')]
+
+    # The note is added along with the next message.
+    writer.add_command(_output(writer, 'shown\n'))
+    assert _texts(writer._get_commands_to_send()) == [
+        ('stderr', '\n[21 output messages were not shown, because they were produced faster '
+         'than they could be sent.]\n'),
+        ('stdout', 'shown\n'),
+    ]
+    assert writer.empty()
+
+
+def test_writer_thread_output_dropped_without_waiting_by_default(writer, monkeypatch):
+    monkeypatch.setattr(pydevd_comm, 'PYDEVD_OUTPUT_QUEUE_HIGH_WATER', 3)
+    assert pydevd_comm.PYDEVD_OUTPUT_QUEUE_TIMEOUT == 0
+
+    for i in range(3):
+        writer.add_command(_output(writer, '%s\n' % (i,)))
+
+    # The thread printing may be Nuke's main thread: it must not be blocked.
+    initial_time = time.time()
+    for i in range(20):
+        writer.add_command(_output(writer, 'dropped\n'))
+    assert time.time() - initial_time < 0.5
+    assert len(writer._output_queue) == 3
+    assert writer.output_dropped == 20
+
+
+def test_writer_thread_output_waits_until_lane_drains(writer, monkeypatch):
+    monkeypatch.setattr(pydevd_comm, 'PYDEVD_OUTPUT_QUEUE_HIGH_WATER', 3)
+    monkeypatch.setattr(pydevd_comm, 'PYDEVD_OUTPUT_QUEUE_TIMEOUT', 10.)
+
+    for i in range(3):
+        writer.add_command(_output(writer, '%s\n' % (i,)))
+
+    added = threading.Event()
+
+    def add():
+        writer.add_command(_output(writer, 'waited\n'))
+        added.set()
+
+    t = threading.Thread(target=add)
+    t.start()
+    assert not added.wait(0.2)  # Waiting for room in the lane.
+
+    # Taking the queued output makes room, so, the waiting message is queued, not dropped.
+    assert _texts(writer._get_commands_to_send()) == [('stdout', '0\n1\n2\n')]
+    assert added.wait(5)
+    t.join()
+    assert writer.output_dropped == 0
+    assert _texts(writer._get_commands_to_send()) == [('stdout', 'waited\n')]
+
+
+def test_writer_thread_never_waits_for_itself(writer, monkeypatch):
+    monkeypatch.setattr(pydevd_comm, 'PYDEVD_OUTPUT_QUEUE_HIGH_WATER', 3)
+    monkeypatch.setattr(pydevd_comm, 'PYDEVD_OUTPUT_QUEUE_TIMEOUT', 10.)
+
+    for i in range(3):
+        writer.add_command(_output(writer, '%s\n' % (i,)))
+
+    # The writer printing something while the lane is full can't wait for itself to drain it.
+    monkeypatch.setattr(threading, 'current_thread', lambda: writer)
+    initial_time = time.time()
+    writer.add_command(_output(writer, 'dropped\n'))
+    assert time.time() - initial_time < 5
+    assert writer.output_dropped == 1
+
+
+def test_writer_thread_output_drop_note_counts_against_limit(writer, monkeypatch):
+    monkeypatch.setattr(pydevd_comm, 'PYDEVD_OUTPUT_QUEUE_HIGH_WATER', 3)
+    monkeypatch.setattr(pydevd_comm, 'PYDEVD_OUTPUT_QUEUE_TIMEOUT', 0.)
+
+    for i in range(4):
+        writer.add_command(_output(writer, '%s\n' % (i,)))
+    assert writer.output_dropped == 1
+
+    writer._output_queue.popleft()
+    # There's room for one message, but not for the message and the note.
+    writer.add_command(_output(writer, 'dropped\n'))
+    assert len(writer._output_queue) == 2
+    assert writer.output_dropped == 2
+
+    writer._output_queue.popleft()
+    writer.add_command(_output(writer, 'shown\n'))
+    assert len(writer._output_queue) == 3
+    assert _texts(writer._get_commands_to_send())[-2:] == [
+        ('stderr', '\n[2 output messages were not shown, because they were produced faster '
+         'than they could be sent.]\n'),
+        ('stdout', 'shown\n'),
+    ]
+
+
+def test_writer_thread_commands_before_output(writer):
+    writer.add_command(_output(writer, 'a\n'))
+    writer.add_command(_event('stopped'))
+    writer.add_command(_output(writer, 'b\n'))
+    writer.add_command(_event('continued'))
+
+    assert _texts(writer._get_commands_to_send()) == ['stopped', 'continued', ('stdout', 'a\nb\n')]
+
+
+def test_writer_thread_output_before_exit(writer):
+    writer.add_command(_event('stopped'))
+    writer.add_command(_output(writer, 'a\n'))
+    writer.add_command(NetCommand(CMD_EXIT, 0, {'type': 'event', 'event': 'exit', 'body': {}}, is_json=True))
+    writer.add_command(_output(writer, 'b\n'))
+
+    cmds = writer._get_commands_to_send()
+    assert _texts(cmds) == ['stopped', ('stdout', 'a\nb\n'), 'exit']
+    assert cmds[-1].id == CMD_EXIT
+
+
+def test_writer_thread_output_merged_per_category(writer, monkeypatch):
+    monkeypatch.setattr(pydevd_comm, '_MAX_COALESCED_OUTPUT', 6)
+
+    writer.add_command(_output(writer, 'a\n'))
+    writer.add_command(_output(writer, 'b\n'))
+    writer.add_command(_output(writer, 'c\n', ctx=2))
+    writer.add_command(_output(writer, 'd\n', ctx=2))
+    writer.add_command(_output(writer, 'e\n'))
+    # Output with a source is not merged with the output around it.
+    writer.add_command(NetCommand(CMD_WRITE_TO_CONSOLE, 0, {'type': 'event', 'event': 'output', 'body': {
+        'category': 'stdout', 'output': 'f\n', 'source': {'path': 'f.py'}, 'line': 1}}, is_json=True))
+    for text in 'ghijk':
+        writer.add_command(_output(writer, text + '\n'))
+
+    assert _texts(writer._get_commands_to_send()) == [
+        ('stdout', 'a\nb\n'),
+        ('stderr', 'c\nd\n'),
+        ('stdout', 'e\n'),
+        ('stdout', 'f\n'),
+        # Merged up to _MAX_COALESCED_OUTPUT.
+        ('stdout', 'g\nh\ni\n'),
+        ('stdout', 'j\nk\n'),
+    ]
+    assert writer.output_coalesced == 5
@@ -132,6 +132,32 @@ class Client(components.Component):
     def request(self, request):
         return self.server.channel.delegate(request)
 
+    # Generic request handler for requests that can be relayed without parsing them,
+    # used in lieu of request() if there's no specific handler below. The request is
+    # sent to the server as is, and so is the response to it.
+    def raw_request(self, request):
+        def relay_response(response):
+            try:
+                if response is None:
+                    self.channel.send_raw_failure(
+                        request, fmt("{0} disconnected unexpectedly", server)
+                    )
+                else:
+                    self.channel.send_raw(response, request_seq=request.seq)
+            except messaging.JsonIOError as exc:
+                log.info("Couldn't relay response to {0}: {1}", request.describe(), exc)
+
+        try:
+            with self.session:
+                server = self.server
+                server.channel.send_raw(request, on_response=relay_response)
+        except components.ComponentNotAvailable as exc:
+            self.channel.send_raw_failure(request, str(exc))
+        except messaging.JsonIOError as exc:
+            self.channel.send_raw_failure(
+                request, fmt("{0} disconnected unexpectedly", exc.stream.name)
+            )
+
     @message_handler
     def initialize_request(self, request):
         if self._initialize_request is not None:
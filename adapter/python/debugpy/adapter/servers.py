@@ -308,6 +308,15 @@ class Server(components.Component):
     def event(self, event):
         self.client.propagate_after_start(event)
 
+    # Generic event handler for events that can be propagated without parsing them,
+    # used in lieu of event() if there's no specific handler below.
+    def raw_event(self, event):
+        try:
+            with self.session:
+                self.client.propagate_after_start(event)
+        except (components.ComponentNotAvailable, messaging.JsonIOError) as exc:
+            log.error("{0} couldn't propagate {1}: {2}", self, event.describe(), exc)
+
     @message_handler
     def initialized_event(self, event):
         # pydevd doesn't send it, but the adapter will send its own in any case.
@@ -5,6 +5,7 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import atexit
+import collections
 import contextlib
 import functools
 import inspect
@@ -28,6 +29,11 @@ log_dir = os.getenv("DEBUGPY_LOG_DIR")
 in the specified directory, where <pid> is the return value of os.getpid().
 """
 
+log_format = os.getenv("DEBUGPY_LOG_FORMAT", "text")
+"""If "trace", to_file(prefix=...) writes a structured trace named debugpy.*-<pid>.trace
+instead of a text log - see TraceFile.
+"""
+
 timestamp_format = "09.3f"
 """Format spec used for timestamps. Can be changed to dial precision up or down.
 """
@@ -35,12 +41,17 @@ timestamp_format = "09.3f"
 _lock = threading.RLock()
 _tls = threading.local()
 _files = {}  # filename -> LogFile
-_levels = set()  # combined for all log files
+_file_levels = set()  # combined for all log files
+_trace = None  # TraceFile
+_levels = set()  # combined for all log files and the trace
 
 
 def _update_levels():
-    global _levels
-    _levels = frozenset(level for file in _files.values() for level in file.levels)
+    global _file_levels, _levels
+    _file_levels = frozenset(
+        level for file in _files.values() for level in file.levels
+    )
+    _levels = _file_levels | (_trace.levels if _trace is not None else frozenset())
 
 
 class LogFile(object):
@@ -103,6 +114,117 @@ class LogFile(object):
         self.close()
 
 
+class TraceFile(object):
+    """Records log messages and DAP messages as newline-delimited JSON, at a fraction
+    of the cost of a text LogFile - see debugpy.common.tracelog for the format, and
+    for how to pretty-print it.
+
+    Every thread appends records to a buffer of its own without taking any locks, and
+    the records are formatted and written to the file by a background thread. DAP
+    messages are recorded by reference to the raw bytes that were read or written,
+    and are copied into the file as is.
+    """
+
+    flush_interval = 0.1
+    """How often the buffered records are written to the file, in seconds."""
+
+    def __init__(self, filename, file, levels=LEVELS):
+        self.filename = filename
+        self.file = file
+        self._levels = frozenset(levels)
+        self._tls = threading.local()
+        self._buffers = []  # [(thread, deque of records)]
+        self._buffers_lock = threading.Lock()
+        self._closed = threading.Event()
+
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="debugpy.common.log trace flusher"
+        )
+        self._flusher.pydev_do_not_trace = True
+        self._flusher.is_pydev_daemon_thread = True
+        self._flusher.daemon = True
+        self._flusher.start()
+
+    @property
+    def levels(self):
+        return self._levels
+
+    @levels.setter
+    def levels(self, value):
+        with _lock:
+            self._levels = frozenset(LEVELS if value is all else value)
+            _update_levels()
+
+    def _buffer(self):
+        try:
+            return self._tls.buffer
+        except AttributeError:
+            buffer = self._tls.buffer = collections.deque()
+            with self._buffers_lock:
+                self._buffers.append((threading.current_thread(), buffer))
+            return buffer
+
+    def write(self, level, text):
+        if level in self._levels:
+            self._buffer().append((timestamp.current(), level, text))
+
+    def write_message(self, stream_name, dir, body):
+        self._buffer().append((timestamp.current(), stream_name, dir, body))
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        from debugpy.common import tracelog
+
+        with self._buffers_lock:
+            buffers = list(self._buffers)
+            self._buffers[:] = [
+                (thread, buffer) for thread, buffer in buffers if thread.is_alive()
+            ]
+
+        lines = []
+        for thread, buffer in buffers:
+            # popleft() is atomic, so it's safe while the thread keeps appending.
+            while True:
+                try:
+                    record = buffer.popleft()
+                except IndexError:
+                    break
+                lines.append(tracelog.encode(thread.name, record))
+
+        if lines:
+            try:
+                self.file.write(b"".join(lines))
+                self.file.flush()
+            except Exception:
+                pass
+
+    def close(self):
+        global _trace
+
+        with _lock:
+            if _trace is self:
+                _trace = None
+                _update_levels()
+        info("Not tracing to {0!j} anymore.", self.filename)
+
+        self._closed.set()
+        self._flusher.join(1)
+        self.flush()
+        try:
+            self.file.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 class NoLog(object):
     file = filename = None
 
@@ -128,11 +250,19 @@ def newline(level="info"):
 def write(level, text, _to_files=all):
     assert level in LEVELS
 
+    text = getattr(_tls, "prefix", "") + text
+
+    if _to_files is all:
+        trace = _trace
+        if trace is not None:
+            trace.write(level, text)
+        if level not in _file_levels:
+            return text
+
     t = timestamp.current()
     format_string = "{0}+{1:" + timestamp_format + "}: "
     prefix = fmt(format_string, level[0].upper(), t)
 
-    text = getattr(_tls, "prefix", "") + text
     indent = "\n" + (" " * len(prefix))
     output = indent.join(text.split("\n"))
     output = prefix + output + "\n\n"
@@ -165,6 +295,33 @@ info = functools.partial(write_format, "info")
 warning = functools.partial(write_format, "warning")
 
 
+def message(stream_name, dir, body, value=None):
+    """Logs a DAP message that was read from or written to the named stream, at the
+    "debug" level.
+
+    body is the message as raw bytes. If value is not None, it's the JSON value that
+    body was decoded from or encoded to; it is then used to format the message for
+    log files, instead of the raw bytes. A trace only records body, as is.
+    """
+
+    trace = _trace
+    if trace is not None and "debug" in trace.levels:
+        trace.write_message(stream_name, dir, body)
+
+    if "debug" not in _file_levels:
+        return
+    if value is None:
+        format_string = "{0} {1} {2}"
+        value = body.decode("utf-8", "replace")
+    elif isinstance(value, list):
+        format_string = "{0} {1} {2!j:indent=None}"
+    else:
+        format_string = "{0} {1} {2!j}"
+    write_format(
+        "debug", format_string, stream_name, dir, value, _to_files=_files.values()
+    )
+
+
 def error(*args, **kwargs):
     """Logs an error.
 
@@ -259,6 +416,9 @@ def to_file(filename=None, prefix=None, levels=LEVELS):
             os.makedirs(log_dir)
         except OSError:
             pass
+        if log_format == "trace":
+            filename = fmt("{0}/{1}-{2}.trace", log_dir, prefix, os.getpid())
+            return to_trace(filename, levels)
         filename = fmt("{0}/{1}-{2}.log", log_dir, prefix, os.getpid())
 
     file = _files.get(filename)
@@ -269,6 +429,30 @@ def to_file(filename=None, prefix=None, levels=LEVELS):
     return file
 
 
+def to_trace(filename, levels=LEVELS):
+    """Starts recording all messages at the specified levels, and all DAP messages if
+    "debug" is among them, to the designated trace file - see TraceFile.
+
+    There can only be one trace at a time. If it is already being recorded, its levels
+    are updated as specified, and the filename is ignored.
+
+    Like to_file(), returns an object with a close() method, which can also be used in
+    a with-statement.
+    """
+
+    global _trace
+
+    with _lock:
+        if _trace is not None:
+            _trace.levels = levels
+            return _trace
+        _trace = TraceFile(filename, io.open(filename, "wb"), levels)
+        _update_levels()
+
+    info("Also tracing to {0!j}.", filename)
+    return _trace
+
+
 @contextlib.contextmanager
 def prefixed(format_string, *args, **kwargs):
     """Adds a prefix to all messages logged from the current thread for the duration
@@ -361,6 +545,8 @@ stderr = LogFile(
 def _close_files():
     for file in tuple(_files.values()):
         file.close()
+    if _trace is not None:
+        _trace.close()
 
 
 # The following are helper shortcuts for printf debugging. They must never be used
@@ -16,6 +16,7 @@ import contextlib
 import functools
 import itertools
 import os
+import re
 import socket
 import sys
 import threading
@@ -58,6 +59,78 @@ class NoMoreMessages(JsonIOError, EOFError):
         super(NoMoreMessages, self).__init__(*args, **kwargs)
 
 
+class BufferedSocketIO(object):
+    """A buffered byte stream over a blocking socket, used by JsonIOStream.from_socket()
+    as both its reader and its writer.
+
+    Reads are served from a read-ahead buffer that is refilled a large chunk at a time,
+    so that readline() finds the end of each header line in the buffer rather than
+    reading the socket one byte at a time. Writes go straight to the socket, and
+    writev() sends the header and body of a message in a single call.
+    """
+
+    READ_AHEAD = 64 * 1024
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._buffer = bytearray()
+
+    def _fill(self, size=0):
+        data = self._sock.recv(max(size, self.READ_AHEAD))
+        self._buffer += data
+        return len(data)
+
+    def _take(self, size):
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readline(self):
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", start)
+            if end >= 0:
+                return self._take(end + 1)
+            start = len(self._buffer)
+            if not self._fill():
+                return self._take(len(self._buffer))
+
+    def read(self, size):
+        while len(self._buffer) < size:
+            if not self._fill(size - len(self._buffer)):
+                break
+        return self._take(size)
+
+    def write(self, data):
+        self._sock.sendall(data)
+        return len(data)
+
+    def writev(self, chunks):
+        """Writes all chunks, using a single sendmsg() where it's available."""
+
+        sendmsg = getattr(self._sock, "sendmsg", None)
+        if sendmsg is None:
+            self._sock.sendall(b"".join(chunks))
+            return
+
+        chunks = [memoryview(chunk) for chunk in chunks]
+        while chunks:
+            sent = sendmsg(chunks)
+            while chunks and sent >= len(chunks[0]):
+                sent -= len(chunks[0])
+                chunks.pop(0)
+            if sent:
+                chunks[0] = chunks[0][sent:]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        # Like the SocketIO returned by socket.makefile(), this doesn't close
+        # the socket itself - JsonIOStream's cleanup does that.
+        pass
+
+
 class JsonIOStream(object):
     """Implements a JSON value stream over two byte streams (input and output).
 
@@ -108,13 +181,11 @@ class JsonIOStream(object):
         if name is None:
             name = repr(sock)
 
-        # TODO: investigate switching to buffered sockets; readline() on unbuffered
-        # sockets is very slow! Although the implementation of readline() itself is
-        # native code, it calls read(1) in a loop - and that then ultimately calls
-        # SocketIO.readinto(), which is implemented in Python.
-        socket_io = sock.makefile("rwb", 0)
+        # sock.makefile("rwb", 0) is unbuffered, and readline() on it calls read(1)
+        # in a loop - use a stream that reads ahead instead.
+        socket_io = BufferedSocketIO(sock)
 
-        # SocketIO.close() doesn't close the underlying socket.
+        # BufferedSocketIO.close() doesn't close the underlying socket.
         def cleanup():
             try:
                 sock.shutdown(socket.SHUT_RDWR)
@@ -206,8 +277,15 @@ class JsonIOStream(object):
         Returns JSON value as parsed by decoder.decode(), or raises NoMoreMessages
         if there are no more values to be read.
         """
+        return self.decode_json(self.read_raw(), decoder)
+
+    def read_raw(self):
+        """Read the body of a single message from reader, without parsing it.
+
+        Returns the body as bytes, or raises NoMoreMessages if there are no more
+        messages to be read.
+        """
 
-        decoder = decoder if decoder is not None else self.json_decoder_factory()
         reader = self._reader
         read_line = functools.partial(self._read_line, reader)
 
@@ -276,20 +354,28 @@ class JsonIOStream(object):
             body_remaining -= len(chunk)
         assert body_remaining == 0
 
-        body = b"".join(raw_chunks[body_start:])
-        try:
-            body = body.decode("utf-8")
-        except Exception:
-            log_message_and_reraise_exception()
+        return b"".join(raw_chunks[body_start:])
+
+    def decode_json(self, body, decoder=None):
+        """Parse the body of a message returned by read_raw().
+
+        Returns JSON value as parsed by decoder.decode().
+        """
+
+        decoder = decoder if decoder is not None else self.json_decoder_factory()
+
+        def log_message_and_reraise_exception():
+            raw_lines = "\n".join(repr(line) for line in body.split(b"\n"))
+            log.reraise_exception("{0} -->\n{1}", self.name, raw_lines)
 
         try:
-            body = decoder.decode(body)
+            value = decoder.decode(body.decode("utf-8"))
         except Exception:
             log_message_and_reraise_exception()
 
         # If parsed successfully, log as JSON for readability.
-        self._log_message("-->", body)
-        return body
+        log.message(self.name, "-->", body, value)
+        return value
 
     def write_json(self, value, encoder=None):
         """Write a single JSON value into writer.
@@ -303,7 +389,6 @@ class JsonIOStream(object):
             raise NoMoreMessages(stream=self)
 
         encoder = encoder if encoder is not None else self.json_encoder_factory()
-        writer = self._writer
 
         # Format the value as a message, and try to log any failures using as much
         # information as we already have at the point of the failure. For example,
@@ -316,26 +401,48 @@ class JsonIOStream(object):
         if not isinstance(body, bytes):
             body = body.encode("utf-8")
 
+        self._write_body(body, value)
+
+    def write_raw(self, body):
+        """Write a single message into writer, with body already encoded as bytes.
+        """
+
+        if self._closed:
+            raise NoMoreMessages(stream=self)
+        self._write_body(body, None)
+
+    def _write_body(self, body, value):
+        """Frames and writes the body. For logging, value is the JSON value that it
+        was encoded from, or None if the body is logged as is.
+        """
+
+        writer = self._writer
         header = fmt("Content-Length: {0}\r\n\r\n", len(body))
         header = header.encode("ascii")
 
-        data = header + body
-        data_written = 0
         try:
-            while data_written < len(data):
-                written = writer.write(data[data_written:])
-                # On Python 2, socket.makefile().write() does not properly implement
-                # BytesIO.write(), and always returns None instead of the number of
-                # bytes written - but also guarantees that it is always a full write.
-                if written is None:
-                    break
-                data_written += written
+            writev = getattr(writer, "writev", None)
+            if writev is not None:
+                writev((header, body))
+            else:
+                data = header + body
+                data_written = 0
+                while data_written < len(data):
+                    written = writer.write(data[data_written:])
+                    # On Python 2, socket.makefile().write() does not properly implement
+                    # BytesIO.write(), and always returns None instead of the number of
+                    # bytes written - but also guarantees that it is always a full write.
+                    if written is None:
+                        break
+                    data_written += written
             writer.flush()
         except Exception as exc:
+            if value is None:
+                value = body.decode("utf-8", "replace")
             self._log_message("<--", value, logger=log.exception)
             raise JsonIOError(stream=self, cause=exc)
 
-        self._log_message("<--", value)
+        log.message(self.name, "<--", body, value)
 
     def __repr__(self):
         return fmt("{0}({1!r})", type(self).__name__, self.name)
@@ -357,6 +464,17 @@ class MessageDict(collections.OrderedDict):
     vanilla dicts for all its values, recursively. This is guaranteed for the payload
     of all freshly received messages (unless and until it is mutated), but there is no
     such guarantee for outgoing messages.
+
+    For freshly received messages, nested objects are deserialized as vanilla dicts,
+    and are only converted to MessageDict when they are first retrieved via [], get(),
+    pop(), or __call__() - including the dicts inside lists retrieved that way. Thus,
+    payloads that are only relayed as is never pay for that conversion. Note that
+    items() and values() do not convert anything, and return the values as stored.
+    """
+
+    _lazy = None
+    """The _LazyMessageDicts that converts the nested dicts of this one on access,
+    or None if this dict's values are returned as is.
     """
 
     def __init__(self, message, items=None):
@@ -375,6 +493,25 @@ class MessageDict(collections.OrderedDict):
         guarantee for outgoing messages.
         """
 
+    def _materialize(self, key, value):
+        """If this dict converts its nested dicts lazily, converts value, which is
+        stored under key, and stores the result back. Returns the converted value.
+        """
+        lazy = self._lazy
+        if lazy is None:
+            return value
+        if isinstance(value, dict) and not isinstance(value, MessageDict):
+            value = lazy.wrap(value)
+            collections.OrderedDict.__setitem__(self, key, value)
+        elif isinstance(value, list):
+            lazy.wrap_items(value)
+        return value
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        return self._materialize(key, collections.OrderedDict.__getitem__(self, key))
+
     def __repr__(self):
         return fmt("{0!j}", self)
 
@@ -431,13 +568,69 @@ class MessageDict(collections.OrderedDict):
 
         return wrap
 
-    __getitem__ = _invalid_if_no_key(collections.OrderedDict.__getitem__)
+    @_invalid_if_no_key
+    def __getitem__(self, key):
+        return self._materialize(key, collections.OrderedDict.__getitem__(self, key))
+
     __delitem__ = _invalid_if_no_key(collections.OrderedDict.__delitem__)
-    pop = _invalid_if_no_key(collections.OrderedDict.pop)
+
+    @_invalid_if_no_key
+    def pop(self, key, *args):
+        if self._lazy is not None and key in self:
+            self._materialize(key, collections.OrderedDict.__getitem__(self, key))
+        return collections.OrderedDict.pop(self, key, *args)
 
     del _invalid_if_no_key
 
 
+class _LazyMessageDicts(object):
+    """Converts the vanilla dicts of a freshly received message to MessageDict on first
+    access, and keeps track of them until they can be associated with the Message.
+
+    This works around the circular dependency between messages, and instances of
+    MessageDict in their payload: MessageDict.message must be set for all of them, but
+    it cannot be done until the actual Message is created - which happens after the
+    payload has been deserialized, and partially accessed by the parser.
+
+    So, until then, every MessageDict converted so far gets an associate_with() method
+    that sets MessageDict.message for *all* of them. This method can then be invoked on
+    the payload by the Message, once it's instantiated; dicts converted after that are
+    associated with the message right away.
+    """
+
+    def __init__(self):
+        self.message = None
+        self._unassociated = []
+        self._wrapped_lists = set()
+
+    def wrap(self, value):
+        d = MessageDict(self.message, value)
+        d._lazy = self
+        if self.message is None:
+            d.associate_with = self.associate_with
+            self._unassociated.append(d)
+        return d
+
+    def wrap_items(self, items):
+        """Converts the dicts in the list in-place, recursing into nested lists."""
+        # Lists stay referenced by their parent dict, so their id() is stable.
+        if id(items) in self._wrapped_lists:
+            return
+        self._wrapped_lists.add(id(items))
+        for i, item in enumerate(items):
+            if isinstance(item, dict) and not isinstance(item, MessageDict):
+                items[i] = self.wrap(item)
+            elif isinstance(item, list):
+                self.wrap_items(item)
+
+    def associate_with(self, message):
+        self.message = message
+        for d in self._unassociated:
+            d.message = message
+            del d.associate_with
+        self._unassociated = []
+
+
 def _payload(value):
     """JSON validator for message payload.
 
@@ -998,6 +1191,134 @@ class Response(Message):
             )
 
 
+class RawMessage(object):
+    """An incoming event, request, or response that is relayed to another channel
+    as is, without being parsed - see JsonMessageChannel.send_raw().
+
+    Only the scalar properties at the start and at the end of the top-level object
+    are looked at, which is where both the clients and pydevd put "seq", "type",
+    "command", "event", and "request_seq". If any of those are missing there, the
+    message cannot be relayed as raw, and is parsed as usual instead.
+    """
+
+    # A top-level scalar property, scanning forward from the start of the object.
+    _head_property_re = re.compile(
+        br'\s*[{,]\s*"(\w+)"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+|true|false|null)\s*(?=[,}])'
+    )
+
+    # A top-level scalar property, scanning backward from the end of the object. Strings
+    # are not matched, since it's ambiguous where they begin when seen from the end.
+    _tail_property_re = re.compile(
+        br'[{,]\s*"(\w+)"\s*:\s*(-?\d+|true|false|null)\s*\Z'
+    )
+
+    # How far back to search for the beginning of a property at the end of the object.
+    _tail_window = 128
+
+    def __init__(self, channel, body, properties):
+        self.channel = channel
+
+        self.body = body
+        """The raw JSON of the message, as bytes."""
+
+        self._properties = properties  # {name: (value, start, end)}
+        self.type = properties["type"][0]
+        self.seq = properties["seq"][0]
+        self.command = properties.get("command", (None,))[0]
+        self.event = properties.get("event", (None,))[0]
+        self.request_seq = properties.get("request_seq", (None,))[0]
+
+    @classmethod
+    def scan(cls, channel, body):
+        """Returns a RawMessage for the body of a message received from channel, or
+        None if it must be parsed.
+        """
+
+        properties = {}
+
+        pos = 0
+        while True:
+            match = cls._head_property_re.match(body, pos)
+            if match is None:
+                break
+            cls._add_property(properties, match)
+            pos = match.end()
+
+        end = body.rfind(b"}")
+        while end > pos:
+            match = cls._tail_property_re.search(
+                body, max(pos, end - cls._tail_window), end
+            )
+            if match is None:
+                break
+            cls._add_property(properties, match)
+            end = match.start()
+
+        type = properties.get("type", (None,))[0]
+        required = {
+            "event": ("seq", "event"),
+            "request": ("seq", "command"),
+            "response": ("seq", "command", "request_seq"),
+        }.get(type)
+        if required is None or not all(name in properties for name in required):
+            return None
+        for name in required:
+            expected_type = unicode if name in ("command", "event") else int
+            value = properties[name][0]
+            if not isinstance(value, expected_type) or isinstance(value, bool):
+                return None
+        return cls(channel, body, properties)
+
+    @staticmethod
+    def _add_property(properties, match):
+        name = match.group(1).decode("ascii")
+        if name not in properties:
+            value = json.JsonDecoder().decode(match.group(2).decode("utf-8"))
+            properties[name] = (value, match.start(2), match.end(2))
+
+    def describe(self):
+        if self.type == "response":
+            return fmt(
+                "#{0} response to #{1} request {2!j} from {3}",
+                self.seq,
+                self.request_seq,
+                self.command,
+                self.channel,
+            )
+        return fmt(
+            "#{0} {1} {2!j} from {3}",
+            self.seq,
+            self.type,
+            self.event if self.type == "event" else self.command,
+            self.channel,
+        )
+
+    def is_event(self, *event):
+        return self.type == "event" and (event == () or self.event in event)
+
+    def is_request(self, *command):
+        return self.type == "request" and (command == () or self.command in command)
+
+    def is_response(self, *command):
+        return self.type == "response" and (command == () or self.command in command)
+
+    def rewrite(self, **values):
+        """Returns the body with the values of the specified integer properties
+        replaced - e.g. rewrite(seq=1).
+        """
+
+        spans = sorted(
+            (self._properties[name][1:], value) for name, value in values.items()
+        )
+        chunks = []
+        pos = 0
+        for (start, end), value in spans:
+            chunks += [self.body[pos:start], ("%d" % value).encode("ascii")]
+            pos = end
+        chunks.append(self.body[pos:])
+        return b"".join(chunks)
+
+
 class Disconnect(Message):
     """A dummy message used to represent disconnect. It's always the last message
     received from any channel.
@@ -1144,6 +1465,19 @@ class JsonMessageChannel(object):
             channel.send_request(...)
             # No interleaving messages can be sent here from other threads.
             channel.send_event(...)
+
+    Incoming messages are handled in the order in which they were received, except
+    that requests and responses are handled ahead of any "output" events that are
+    still waiting to be handled. If more than output_high_water "output" events are
+    waiting, the output is backlogged, and all other messages are handled ahead of it
+    until the handlers catch up with half of it. The message loop keeps reading in the
+    meantime, so that nothing is held up behind the output; it's pydevd that bounds
+    how much output can be in flight - see PYDEVD_OUTPUT_QUEUE_HIGH_WATER.
+    """
+
+    output_high_water = 1000
+    """How many "output" events can wait to be handled before the output is backlogged,
+    and is handled after everything else.
     """
 
     def __init__(self, stream, handlers=None, name=None):
@@ -1155,8 +1489,18 @@ class JsonMessageChannel(object):
         self._closed = False
         self._seq_iter = itertools.count(1)
         self._sent_requests = {}  # {seq: Request}
-        self._handler_queue = []  # [(what, handler)]
+        self._sent_raw_requests = {}  # {seq: response handler}
+        self._handler_queue = collections.deque()  # [(index, what, handler)]
+        self._output_queue = collections.deque()  # [(index, what, handler)]
+        self._enqueued_count = itertools.count()
         self._handlers_enqueued = threading.Condition(self._lock)
+        self._output_backlogged = False
+
+        self.max_queue_depth = 0
+        """The most handlers that were waiting to run at once."""
+
+        self.output_backlogs = 0
+        """How many times the "output" events waiting went over output_high_water."""
         self._handler_thread = None
         self._parser_thread = None
 
@@ -1186,6 +1530,7 @@ class JsonMessageChannel(object):
             if not self._closed:
                 self._closed = True
                 self.stream.close()
+                self._handlers_enqueued.notify_all()
 
     def start(self):
         """Starts a message loop which parses incoming messages and invokes handlers
@@ -1313,13 +1658,51 @@ class JsonMessageChannel(object):
         """
         return self.send_request(*args, **kwargs).wait_for_response()
 
+    def send_raw(self, message, on_response=None, **values):
+        """Sends a RawMessage received from another channel as is, except that its
+        "seq" is replaced with a new sequence number for this channel, and any other
+        integer properties specified as keyword arguments are replaced as well - e.g.
+        request_seq=... when relaying a response.
+
+        If message is a request, on_response must be specified. It is invoked with the
+        RawMessage for the response as the sole argument once it is received, or with
+        None if the channel is closed before that.
+
+        Safe to call concurrently for the same channel from different threads.
+        """
+
+        assert message.is_request() == (on_response is not None)
+        with self:
+            seq = next(self._seq_iter)
+            if on_response is not None:
+                self._sent_raw_requests[seq] = on_response
+            self.stream.write_raw(message.rewrite(seq=seq, **values))
+
+    def send_raw_failure(self, request, error_message):
+        """Sends a failure response to a RawMessage request received from this channel.
+        """
+
+        assert request.channel is self and request.is_request()
+        d = {
+            "type": "response",
+            "request_seq": request.seq,
+            "success": False,
+            "command": request.command,
+            "message": error_message,
+        }
+        with self._send_message(d):
+            pass
+
     def propagate(self, message):
         """Sends a new message with the same type and payload.
 
         If it was a request, returns the new OutgoingRequest object for it.
         """
         assert message.is_request() or message.is_event()
-        if message.is_request():
+        if isinstance(message, RawMessage):
+            assert message.is_event()
+            self.send_raw(message)
+        elif message.is_request():
             return self.send_request(message.command, message.arguments)
         else:
             self.send_event(message.event, message.body)
@@ -1343,7 +1726,14 @@ class JsonMessageChannel(object):
                 self._parse_incoming_message()
 
         except NoMoreMessages as exc:
-            log.debug("Exiting message loop for channel {0}: {1}", self, exc)
+            log.debug(
+                "Exiting message loop for channel {0}: {1}\n"
+                "(at most {2} handlers waiting to run; output backlogged {3} times)",
+                self,
+                exc,
+                self.max_queue_depth,
+                self.output_backlogs,
+            )
             with self:
                 # Generate dummy responses for all outstanding requests.
                 err_message = compat.force_unicode(str(exc), "utf-8", errors="replace")
@@ -1366,6 +1756,12 @@ class JsonMessageChannel(object):
                     Response._parse(self, response_json, body=exc)
                 assert not len(self._sent_requests)
 
+                for on_response in self._sent_raw_requests.values():
+                    self._enqueue_handlers(
+                        Disconnect(self), functools.partial(on_response, None)
+                    )
+                self._sent_raw_requests.clear()
+
                 self._enqueue_handlers(Disconnect(self), self._handle_disconnect)
                 self.close()
 
@@ -1380,36 +1776,17 @@ class JsonMessageChannel(object):
         for _run_handlers() to invoke, until the channel is closed.
         """
 
-        # Set up a dedicated decoder for this message, to create MessageDict instances
-        # for all JSON objects, and track them so that they can be later wired up to
-        # the Message they belong to, once it is instantiated.
-        def object_hook(d):
-            d = MessageDict(None, d)
-            if "seq" in d:
-                self._prettify(d)
-            d.associate_with = associate_with
-            message_dicts.append(d)
-            return d
-
-        # A hack to work around circular dependency between messages, and instances of
-        # MessageDict in their payload. We need to set message for all of them, but it
-        # cannot be done until the actual Message is created - which happens after the
-        # dicts are created during deserialization.
-        #
-        # So, upon deserialization, every dict in the message payload gets a method
-        # that can be called to set MessageDict.message for *all* dicts belonging to
-        # that message. This method can then be invoked on the top-level dict by the
-        # parser, after it has parsed enough of the dict to create the appropriate
-        # instance of Event, Request, or Response for this message.
-        def associate_with(message):
-            for d in message_dicts:
-                d.message = message
-                del d.associate_with
-
-        message_dicts = []
-        decoder = self.stream.json_decoder_factory(object_hook=object_hook)
-        message_dict = self.stream.read_json(decoder)
-        assert isinstance(message_dict, MessageDict)  # make sure stream used decoder
+        body = self.stream.read_raw()
+        if self._relay_raw_message(body):
+            return
+
+        # The message is deserialized into vanilla dicts, and only the top-level one
+        # is converted to MessageDict right away; the payload is converted lazily, as
+        # it is accessed by the parser and message handlers - see _LazyMessageDicts.
+        message_dict = self.stream.decode_json(body)
+        assert isinstance(message_dict, dict)
+        message_dict = _LazyMessageDicts().wrap(message_dict)
+        self._prettify(message_dict)
 
         msg_type = message_dict("type", json.enum("event", "request", "response"))
         parser = self._message_parsers[msg_type]
@@ -1430,6 +1807,85 @@ class JsonMessageChannel(object):
             )
             os._exit(1)
 
+    def _relay_raw_message(self, body):
+        """If the message can be handled without parsing it, enqueues the handler for
+        it, and returns True. Otherwise, returns False.
+
+        Events and requests can be handled as raw if the handlers object doesn't have
+        a specific handler for them, but has a generic "raw_event" or "raw_request"
+        handler, which is then invoked with the RawMessage. Responses are handled as
+        raw if they're for requests sent via send_raw().
+        """
+
+        with self:
+            handlers = self.handlers
+            expecting_raw_responses = bool(self._sent_raw_requests)
+
+        if not (
+            expecting_raw_responses
+            or hasattr(handlers, "raw_event")
+            or hasattr(handlers, "raw_request")
+        ):
+            return False
+
+        message = RawMessage.scan(self, body)
+        if message is None:
+            if not expecting_raw_responses:
+                return False
+            message = self._rescan_raw_response(body)
+            if message is None:
+                return False
+
+        name = message.event if message.type == "event" else message.command
+        if message.type == "response":
+            with self:
+                handler = self._sent_raw_requests.pop(message.request_seq, None)
+        elif hasattr(handlers, name + "_" + message.type):
+            handler = None
+        else:
+            handler = getattr(handlers, "raw_" + message.type, None)
+        if handler is None:
+            return False
+
+        log.message(self.stream.name, "-->", body)
+        self._enqueue_handlers(message, functools.partial(handler, message))
+        return True
+
+    def _rescan_raw_response(self, body):
+        """If the message is a response to a request sent via send_raw(), but its
+        properties couldn't be found by RawMessage.scan() - e.g. "seq" is after the
+        "body" - returns a RawMessage for it, with the body re-serialized so that those
+        properties come first. Otherwise, returns None.
+
+        Without it, the response would be parsed as usual, and rejected as a response
+        to an unknown request, so that the request would never be answered.
+        """
+
+        try:
+            value = json.JsonDecoder().decode(body.decode("utf-8"))
+        except Exception:
+            return None  # Reported when it's parsed as usual.
+        if not isinstance(value, dict) or value.get("type") != "response":
+            return None
+
+        request_seq = value.get("request_seq")
+        if not isinstance(request_seq, int) or isinstance(request_seq, bool):
+            return None
+        with self:
+            if request_seq not in self._sent_raw_requests:
+                return None
+
+        ordered = collections.OrderedDict(
+            (name, value[name])
+            for name in ("seq", "type", "request_seq", "success", "command")
+            if name in value
+        )
+        ordered.update(value)
+        body = json.JsonEncoder().encode(ordered)
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8")
+        return RawMessage.scan(self, body)
+
     def _enqueue_handlers(self, what, *handlers):
         """Enqueues handlers for _run_handlers() to run.
 
@@ -1438,8 +1894,27 @@ class JsonMessageChannel(object):
         If the background thread with _run_handlers() isn't running yet, starts it.
         """
 
+        if isinstance(what, (Event, RawMessage)) and what.is_event("output"):
+            queue = self._output_queue
+        else:
+            queue = self._handler_queue
+
         with self:
-            self._handler_queue.extend((what, handler) for handler in handlers)
+            queue.extend((next(self._enqueued_count), what, h) for h in handlers)
+            depth = len(self._handler_queue) + len(self._output_queue)
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+            if (
+                not self._output_backlogged
+                and len(self._output_queue) > self.output_high_water
+            ):
+                self._output_backlogged = True
+                self.output_backlogs += 1
+                log.debug(
+                    "{0} has {1} output events waiting; handling them last.",
+                    self,
+                    len(self._output_queue),
+                )
             self._handlers_enqueued.notify_all()
 
             # If there is anything to handle, but there's no handler thread yet,
@@ -1451,7 +1926,7 @@ class JsonMessageChannel(object):
             # thread has exited. In this case, we spin up a new thread just to run
             # the enqueued response handlers, and it will exit as soon as it's out
             # of handlers to run.
-            if len(self._handler_queue) and self._handler_thread is None:
+            if len(queue) and self._handler_thread is None:
                 self._handler_thread = threading.Thread(
                     target=self._run_handlers, name=fmt("{0} message handler", self)
                 )
@@ -1475,37 +1950,66 @@ class JsonMessageChannel(object):
                 # from Request.on_response().
 
             with self:
-                if not closed and not len(self._handler_queue):
+                queue = self._next_handler_queue()
+                if not closed and queue is None:
                     # Wait for something to process.
                     self._handlers_enqueued.wait()
-
-                # Make a snapshot before releasing the lock.
-                handlers = self._handler_queue[:]
-                del self._handler_queue[:]
-
-                if closed and not len(handlers):
-                    # Nothing to process, channel is closed, and parser thread is
-                    # not running anymore - time to quit! If Request.on_response()
-                    # needs to call _enqueue_handlers() later, it will spin up
-                    # a new handler thread.
-                    self._handler_thread = None
-                    return
-
-            for what, handler in handlers:
-                # If the channel is closed, we don't want to process any more events
-                # or requests - only responses and the final disconnect handler. This
-                # is to guarantee that if a handler calls close() on its own channel,
-                # the corresponding request or event is the last thing to be processed.
-                if closed and handler in (Event._handle, Request._handle):
+                    queue = self._next_handler_queue()
+
+                if queue is None:
+                    if closed:
+                        # Nothing to process, channel is closed, and parser thread is
+                        # not running anymore - time to quit! If Request.on_response()
+                        # needs to call _enqueue_handlers() later, it will spin up
+                        # a new handler thread.
+                        self._handler_thread = None
+                        return
                     continue
 
-                with log.prefixed("/handling {0}/\n", what.describe()):
-                    try:
-                        handler()
-                    except Exception:
-                        # It's already logged by the handler, so just fail fast.
-                        self.close()
-                        os._exit(1)
+                _, what, handler = queue.popleft()
+                if (
+                    self._output_backlogged
+                    and len(self._output_queue) <= self.output_high_water // 2
+                ):
+                    self._output_backlogged = False
+
+            # If the channel is closed, we don't want to process any more events
+            # or requests - only responses and the final disconnect handler. This
+            # is to guarantee that if a handler calls close() on its own channel,
+            # the corresponding request or event is the last thing to be processed.
+            if closed and handler in (Event._handle, Request._handle):
+                continue
+            if closed and isinstance(what, RawMessage) and not what.is_response():
+                continue
+
+            with log.prefixed("/handling {0}/\n", what.describe()):
+                try:
+                    handler()
+                except Exception:
+                    # It's already logged by the handler, so just fail fast.
+                    self.close()
+                    os._exit(1)
+
+    def _next_handler_queue(self):
+        """Returns the queue to run the next handler from, or None if both are empty.
+        """
+
+        queue = self._handler_queue
+        output_queue = self._output_queue
+        if not output_queue:
+            return queue if queue else None
+        if not queue:
+            return output_queue
+
+        # Requests and responses overtake "output" events, and so does everything
+        # else while the output is backlogged; otherwise, it's run in the order in
+        # which it was received.
+        if self._output_backlogged:
+            return queue
+        index, what, _ = queue[0]
+        if what.is_request() or what.is_response() or index < output_queue[0][0]:
+            return queue
+        return output_queue
 
     def _get_handler_for(self, type, name):
         """Returns the handler for a message of a given type.
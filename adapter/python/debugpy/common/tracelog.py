@@ -0,0 +1,92 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See LICENSE in the project root
+# for license information.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""Format of the trace files written by debugpy.common.log.TraceFile, and a tool to
+pretty-print them.
+
+Traces are written instead of text logs when DEBUGPY_LOG_FORMAT=trace is set along
+with the log directory. Every line of a trace is a JSON object, which is either a log
+message::
+
+    {"t": 1.25, "thread": "MainThread", "level": "info", "text": "..."}
+
+or a DAP message that was read from (-->) or written to (<--) a stream, as is::
+
+    {"t": 1.5, "thread": "...", "stream": "Client[1]", "dir": "-->", "message": {...}}
+
+To pretty-print traces in the same layout as text logs::
+
+    python -m debugpy.common.tracelog debugpy.adapter-1234.trace ...
+"""
+
+import io
+import json
+import sys
+
+
+def encode(thread_name, record):
+    """Encodes a record buffered by TraceFile as a line of the trace.
+    """
+
+    if len(record) == 3:
+        t, level, text = record
+        line = json.dumps({"t": t, "thread": thread_name, "level": level, "text": text})
+        return (line + "\n").encode("utf-8")
+
+    t, stream_name, dir, body = record
+    head = json.dumps({"t": t, "thread": thread_name, "stream": stream_name, "dir": dir})
+    # Line breaks can only occur as whitespace between JSON tokens, never in strings,
+    # so the message stays on one line and still means the same.
+    body = body.replace(b"\r", b" ").replace(b"\n", b" ")
+    return head[:-1].encode("utf-8") + b', "message": ' + body + b"}\n"
+
+
+def format_record(record):
+    """Formats a parsed line of the trace the same way a text log would show it.
+    """
+
+    if "message" in record:
+        level = "debug"
+        text = "{0} {1} {2}".format(
+            record["stream"], record["dir"], json.dumps(record["message"], indent=4)
+        )
+    else:
+        level = record["level"]
+        text = record["text"]
+
+    prefix = "{0}+{1:09.3f}: ".format(level[0].upper(), record["t"])
+    text = "[{0}] {1}".format(record["thread"], text)
+    indent = "\n" + (" " * len(prefix))
+    return prefix + indent.join(text.split("\n")) + "\n\n"
+
+
+def pretty_print(file, out):
+    for line in file:
+        line = line.decode("utf-8", "replace").rstrip("\n")
+        if not line:
+            continue
+        try:
+            out.write(format_record(json.loads(line)))
+        except Exception:
+            # Messages are copied into the trace without validation.
+            out.write(line + "\n\n")
+
+
+def main(args):
+    if not args:
+        print("Usage: python -m debugpy.common.tracelog <trace file>...", file=sys.stderr)
+        return 2
+
+    out = io.open(sys.stdout.fileno(), "w", encoding="utf-8", closefd=False)
+    for filename in args:
+        with io.open(filename, "rb") as file:
+            pretty_print(file, out)
+    out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -10,17 +10,35 @@ import sys
 import threading
 
 from debugpy import launcher
-from debugpy.common import log
+from debugpy.common import fmt, log, timestamp
 
 
 class CaptureOutput(object):
     """Captures output from the specified file descriptor, and tees it into another
     file descriptor while generating DAP "output" events for it.
+
+    Output is teed as soon as it's read, but events are batched: pending output is
+    sent in a single event once there's batch_size of it, or once it has been pending
+    for batch_delay, whichever comes first. If the adapter can't keep up, and more
+    than max_pending of output accumulates, any further output is dropped until the
+    backlog is sent, and a note on how much was dropped is added to the next event.
     """
 
     instances = {}
     """Keys are output categories, values are CaptureOutput instances."""
 
+    read_size = 0x10000
+    """How much output is read at once, in bytes."""
+
+    batch_size = 0x8000
+    """How much pending output triggers sending an event right away, in characters."""
+
+    batch_delay = 0.05
+    """How long output can be pending before it is sent, in seconds."""
+
+    max_pending = 0x400000
+    """How much output can be pending before it is dropped, in characters."""
+
     def __init__(self, whose, category, fd, stream):
         assert category not in self.instances
         self.instances[category] = self
@@ -31,6 +49,14 @@ class CaptureOutput(object):
         self._fd = fd
         self._decoder = codecs.getincrementaldecoder("utf-8")(errors="surrogateescape")
 
+        self._lock = threading.Lock()
+        self._pending_changed = threading.Condition(self._lock)
+        self._pending = []
+        self._pending_size = 0
+        self._pending_since = None
+        self._dropped = 0
+        self._finished = False
+
         if stream is None:
             # Can happen if running under pythonw.exe.
             self._stream = None
@@ -53,6 +79,11 @@ class CaptureOutput(object):
         self._worker_thread = threading.Thread(target=self._worker, name=category)
         self._worker_thread.start()
 
+        self._sender_thread = threading.Thread(
+            target=self._sender, name=category + " events"
+        )
+        self._sender_thread.start()
+
     def __del__(self):
         fd = self._fd
         if fd is not None:
@@ -64,7 +95,7 @@ class CaptureOutput(object):
     def _worker(self):
         while self._fd is not None:
             try:
-                s = os.read(self._fd, 0x1000)
+                s = os.read(self._fd, self.read_size)
             except Exception:
                 break
             if not len(s):
@@ -74,17 +105,28 @@ class CaptureOutput(object):
         # Flush any remaining data in the incremental decoder.
         self._process_chunk(b"", final=True)
 
+        with self._lock:
+            self._finished = True
+            self._pending_changed.notify()
+
     def _process_chunk(self, s, final=False):
         s = self._decoder.decode(s, final=final)
         if len(s) == 0:
             return
 
-        try:
-            launcher.channel.send_event(
-                "output", {"category": self.category, "output": s.replace("\r\n", "\n")}
-            )
-        except Exception:
-            pass  # channel to adapter is already closed
+        with self._lock:
+            if self._pending_size + len(s) > self.max_pending:
+                self._dropped += len(s)
+            else:
+                if not self._pending:
+                    # The sender waits without a timeout while nothing is pending,
+                    # so wake it up to start waiting for batch_delay.
+                    self._pending_since = timestamp.current()
+                    self._pending_changed.notify()
+                self._pending.append(s)
+                self._pending_size += len(s)
+                if self._pending_size >= self.batch_size:
+                    self._pending_changed.notify()
 
         if self._stream is None:
             return
@@ -107,6 +149,47 @@ class CaptureOutput(object):
                 break
             i += written
 
+    def _sender(self):
+        while True:
+            with self._lock:
+                while True:
+                    if self._finished or self._pending_size >= self.batch_size:
+                        break
+                    if self._pending:
+                        deadline = self._pending_since + self.batch_delay
+                        timeout = deadline - timestamp.current()
+                        if timeout <= 0:
+                            break
+                    else:
+                        timeout = None
+                    self._pending_changed.wait(timeout)
+
+                finished = self._finished
+                pending = self._pending
+                dropped = self._dropped
+                self._pending = []
+                self._pending_size = 0
+                self._dropped = 0
+
+            s = "".join(pending).replace("\r\n", "\n")
+            if dropped:
+                s += fmt(
+                    "\n[{0} characters of {1} were not shown, because it was "
+                    "produced faster than it could be sent.]\n",
+                    dropped,
+                    self.category,
+                )
+            if s:
+                try:
+                    launcher.channel.send_event(
+                        "output", {"category": self.category, "output": s}
+                    )
+                except Exception:
+                    pass  # channel to adapter is already closed
+
+            if finished:
+                break
+
 
 def wait_for_remaining_output():
     """Waits for all remaining output to be captured and propagated.
@@ -114,3 +197,4 @@ def wait_for_remaining_output():
     for category, instance in CaptureOutput.instances.items():
         log.info("Waiting for remaining {0} of {1}.", category, instance._whose)
         instance._worker_thread.join()
+        instance._sender_thread.join()
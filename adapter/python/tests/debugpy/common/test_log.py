@@ -0,0 +1,70 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See LICENSE in the project root
+# for license information.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import io
+import json
+import threading
+
+from debugpy.common import log, tracelog
+
+
+def test_trace_flushes_every_thread_in_order(tmpdir, monkeypatch):
+    monkeypatch.setattr(log, "log_dir", str(tmpdir))
+    monkeypatch.setattr(log, "log_format", "trace")
+    # Flush while the threads are still writing, not only when the trace closes.
+    monkeypatch.setattr(log.TraceFile, "flush_interval", 0.001)
+
+    trace = log.to_file(prefix="debugpy.test")
+    assert isinstance(trace, log.TraceFile)
+
+    thread_count = 8
+    record_count = 500
+    start = threading.Event()
+
+    def write_records():
+        start.wait()
+        for i in range(record_count):
+            if i % 2:
+                log.message("stream", "-->", json.dumps({"n": i}).encode("utf-8"))
+            else:
+                log.info("{0}", i)
+
+    threads = [
+        threading.Thread(target=write_records, name="writer-{0}".format(i))
+        for i in range(thread_count)
+    ]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+    # The threads have all exited, so their buffers must still be flushed on close.
+    trace.close()
+
+    with io.open(trace.filename, "rb") as file:
+        records = [json.loads(line.decode("utf-8")) for line in file]
+
+    numbers = {thread.name: [] for thread in threads}
+    times = {thread.name: [] for thread in threads}
+    for record in records:
+        if record["thread"] not in numbers:
+            continue  # Logged by this thread, around starting and closing the trace
+        if "message" in record:
+            numbers[record["thread"]].append(record["message"]["n"])
+        else:
+            numbers[record["thread"]].append(int(record["text"]))
+        times[record["thread"]].append(record["t"])
+
+    for name in numbers:
+        assert numbers[name] == list(range(record_count)), name
+        assert times[name] == sorted(times[name]), name
+
+    # Every line of the trace can be pretty-printed.
+    with io.open(trace.filename, "rb") as file:
+        out = io.StringIO()
+        tracelog.pretty_print(file, out)
+    assert "[writer-0] 0\n" in out.getvalue()
+    assert 'stream --> {\n' in out.getvalue()
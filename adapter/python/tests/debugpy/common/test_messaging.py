@@ -0,0 +1,363 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See LICENSE in the project root
+# for license information.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import collections
+import io
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from debugpy.common import messaging
+
+
+def frame(body):
+    body = body.encode("utf-8")
+    return ("Content-Length: %d\r\n\r\n" % len(body)).encode("ascii") + body
+
+
+class Handlers(object):
+    pass
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        # "seq" after the "body", followed by a string.
+        '{"type": "response", "request_seq": 1, "success": true, "command": "foo", '
+        '"body": {"a": [1, 2]}, "seq": 7, "message": "ok"}',
+        # "seq" and "request_seq" in a nested object first.
+        '{"body": {"seq": 3, "request_seq": 4}, "type": "response", "command": "foo", '
+        '"success": true, "request_seq": 1, "seq": 7, "message": "ok"}',
+    ],
+)
+def test_raw_response_scan_fallback(response):
+    request = messaging.RawMessage.scan(
+        "client", b'{"seq": 10, "type": "request", "command": "foo", "arguments": {}}'
+    )
+    assert request is not None
+    assert messaging.RawMessage.scan("server", response.encode("utf-8")) is None
+
+    writer = io.BytesIO()
+    stream = messaging.JsonIOStream(io.BytesIO(frame(response)), writer, "server")
+    channel = messaging.JsonMessageChannel(stream, Handlers())
+
+    responses = []
+    received = threading.Event()
+
+    def on_response(message):
+        responses.append(message)
+        received.set()
+
+    channel.send_raw(request, on_response=on_response)
+    channel.start()
+    assert received.wait(5)
+    channel.close()
+
+    [message] = responses
+    assert message is not None
+    assert message.type == "response"
+    assert message.command == "foo"
+    assert message.seq == 7
+    assert message.request_seq == 1
+
+    relayed = json.loads(message.rewrite(seq=20, request_seq=10).decode("utf-8"))
+    expected = json.loads(response)
+    expected.update(seq=20, request_seq=10)
+    assert relayed == expected
+    assert not channel._sent_raw_requests
+
+
+class FakeSocket(object):
+    """Serves recv() from the given chunks, one chunk per call, and accepts at most
+    max_send bytes per sendmsg() call.
+    """
+
+    def __init__(self, chunks=(), max_send=None):
+        self.chunks = list(chunks)
+        self.max_send = max_send
+        self.recv_calls = 0
+        self.sendmsg_calls = 0
+        self.sent = b""
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self, size):
+        self.recv_calls += 1
+        if not self.chunks:
+            return b""
+        chunk = self.chunks.pop(0)
+        if len(chunk) > size:
+            chunk, rest = chunk[:size], chunk[size:]
+            self.chunks.insert(0, rest)
+        return chunk
+
+    def sendall(self, data):
+        self.sent += bytes(data)
+
+    def sendmsg(self, buffers):
+        self.sendmsg_calls += 1
+        data = b"".join(bytes(buf) for buf in buffers)[: self.max_send]
+        self.sent += data
+        return len(data)
+
+    def shutdown(self, how):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_buffered_socket_io_header_split_across_reads():
+    first = frame('{"seq": 1}')
+    second = frame('{"seq": 2}')
+    split = first.index(b"\r\n") + 1  # Between "\r" and "\n" of the header line
+    sock = FakeSocket(
+        [b"Content-Le", first[10:split], first[split:] + second[:3], second[3:]]
+    )
+    stream = messaging.JsonIOStream.from_socket(sock, "test")
+
+    assert stream.read_json() == {"seq": 1}
+    assert stream.read_json() == {"seq": 2}
+    with pytest.raises(messaging.NoMoreMessages):
+        stream.read_json()
+
+
+def test_buffered_socket_io_body_split_across_reads():
+    body = '{"body": "' + "x" * 1000 + '", "seq": 1}'
+    data = frame(body)
+    header_end = data.index(b"\r\n\r\n") + 4
+    sock = FakeSocket(
+        [data[: header_end + 7], data[header_end + 7 : header_end + 500], data[header_end + 500 :]]
+    )
+    stream = messaging.JsonIOStream.from_socket(sock, "test")
+
+    assert stream.read_raw() == body.encode("utf-8")
+    assert sock.recv_calls == 3
+    with pytest.raises(messaging.NoMoreMessages):
+        stream.read_raw()
+
+
+def test_buffered_socket_io_partial_sendmsg():
+    sock = FakeSocket(max_send=7)
+    stream = messaging.JsonIOStream.from_socket(sock, "test")
+    body = '{"seq": 1, "type": "event", "event": "output"}'
+
+    stream.write_raw(body.encode("utf-8"))
+
+    # The remainder of a partial write is sent, neither lost nor sent twice.
+    assert sock.sent == frame(body)
+    assert sock.sendmsg_calls == -(-len(frame(body)) // 7)
+
+
+def receive_event(event_json):
+    """Receives the event through a JsonMessageChannel, and returns it as passed
+    to the handler.
+    """
+
+    events = []
+    received = threading.Event()
+
+    class EventHandlers(object):
+        def foo_event(self, event):
+            events.append(event)
+            received.set()
+
+    stream = messaging.JsonIOStream(io.BytesIO(frame(event_json)), io.BytesIO(), "server")
+    channel = messaging.JsonMessageChannel(stream, EventHandlers())
+    channel.start()
+    assert received.wait(5)
+    channel.close()
+
+    [event] = events
+    return event
+
+
+def test_lazy_message_dicts_materialize_on_access():
+    event = receive_event(
+        '{"body": {"nested": {"a": {"b": 1}}, "items": [{"c": {"d": 2}}, [{"e": 3}]], '
+        '"popped": {"f": {"g": 4}}}, "event": "foo", "type": "event", "seq": 1}'
+    )
+    body = event.body
+
+    def stored(d, key):
+        return collections.OrderedDict.__getitem__(d, key)
+
+    # Nothing below the body is converted until it's accessed.
+    for key in ("nested", "items", "popped"):
+        assert type(stored(body, key)) in (dict, list)
+
+    def assert_message_dict(d):
+        assert isinstance(d, messaging.MessageDict)
+        assert d.message is event
+
+    nested = body["nested"]
+    assert_message_dict(nested)
+    assert stored(body, "nested") is nested
+    assert type(stored(nested, "a")) is dict
+    assert_message_dict(nested["a"])
+    assert nested["a"] == {"b": 1}
+
+    items = body.get("items")
+    assert_message_dict(items[0])
+    assert_message_dict(items[0].get("c"))
+    assert_message_dict(items[1][0])
+    assert items == [{"c": {"d": 2}}, [{"e": 3}]]
+
+    popped = body.pop("popped")
+    assert_message_dict(popped)
+    assert "popped" not in body
+    assert_message_dict(popped.pop("f"))
+
+    with pytest.raises(messaging.InvalidMessageError):
+        body["missing"]
+
+
+def test_lazy_message_dicts_prettify_top_level_only():
+    event = receive_event(
+        '{"body": {"message": "m", "nested": {"event": "e", "seq": 2}, "seq": 3}, '
+        '"event": "foo", "type": "event", "seq": 1}'
+    )
+
+    # The message itself is reordered for the log, but its payload is left as it is.
+    assert list(event.json.keys()) == ["seq", "type", "event", "body"]
+    assert list(event.body.keys()) == ["message", "nested", "seq"]
+    assert list(event.body["nested"].keys()) == ["event", "seq"]
+
+
+class OutputBacklog(object):
+    """A channel receiving messages written to a pipe, whose "output" event handler
+    blocks until it's released, so that a backlog builds up behind it.
+    """
+
+    def __init__(self, output_high_water):
+        self.handled = []
+        self.handled_changed = threading.Condition()
+        self.release = threading.Event()
+        self.blocked = threading.Event()
+
+        read_fd, self._write_fd = os.pipe()
+        stream = messaging.JsonIOStream(os.fdopen(read_fd, "rb"), io.BytesIO(), "test")
+        self.channel = messaging.JsonMessageChannel(stream, self)
+        self.channel.output_high_water = output_high_water
+
+    def _record(self, what):
+        with self.handled_changed:
+            self.handled.append(what)
+            self.handled_changed.notify_all()
+
+    def output_event(self, event):
+        self.blocked.set()
+        self.release.wait(5)
+        self.blocked.clear()
+        self._record(event.body["output"])
+
+    def stopped_event(self, event):
+        self._record("stopped")
+
+    def send(self, *messages):
+        os.write(self._write_fd, b"".join(frame(json.dumps(m)) for m in messages))
+
+    def send_output(self, *outputs):
+        self.send(
+            *(
+                {"seq": 1, "type": "event", "event": "output", "body": {"output": output}}
+                for output in outputs
+            )
+        )
+
+    def wait_for(self, count):
+        with self.handled_changed:
+            while len(self.handled) < count:
+                assert self.handled_changed.wait(5)
+
+    def block_on_output(self, output):
+        """Sends an output event, and waits until its handler is blocked."""
+        self.send_output(output)
+        assert self.blocked.wait(5)
+
+    def wait_until_queued(self, handlers, outputs):
+        """Waits until the message loop has read the messages sent, while the handler
+        of an output is still blocked.
+        """
+        channel = self.channel
+        for _ in range(500):
+            with channel:
+                if (len(channel._handler_queue), len(channel._output_queue)) == (
+                    handlers,
+                    outputs,
+                ):
+                    return
+            time.sleep(0.01)
+        raise AssertionError("The messages sent weren't all read")
+
+    def close(self):
+        self.release.set()
+        os.close(self._write_fd)
+        self.channel.close()
+
+
+def test_control_messages_overtake_output_backlog():
+    backlog = OutputBacklog(output_high_water=4)
+    request = backlog.channel.send_request("foo")
+    request.on_response(lambda response: backlog._record("response"))
+    backlog.channel.start()
+    try:
+        # The first output blocks its handler, and ten more pile up behind it.
+        backlog.block_on_output(0)
+        backlog.send_output(*range(1, 11))
+        backlog.send({"seq": 2, "type": "event", "event": "stopped", "body": {}})
+        backlog.send(
+            {
+                "seq": 3,
+                "type": "response",
+                "request_seq": request.seq,
+                "success": True,
+                "command": "foo",
+            }
+        )
+
+        # The message loop keeps reading past the backlog, and the event and the
+        # response are handled ahead of the output waiting.
+        backlog.wait_until_queued(2, 10)
+        assert backlog.channel.output_backlogs == 1
+
+        backlog.release.set()
+        assert request.wait_for_response() == {}
+        backlog.wait_for(13)
+        assert backlog.handled == [0, "stopped", "response"] + list(range(1, 11))
+    finally:
+        backlog.close()
+
+
+def test_output_order_is_kept_once_backlog_drains():
+    backlog = OutputBacklog(output_high_water=4)
+    backlog.channel.start()
+    try:
+        backlog.block_on_output(0)
+        backlog.send_output(*range(1, 6))
+        backlog.send({"seq": 2, "type": "event", "event": "stopped", "body": {}})
+        backlog.wait_until_queued(1, 5)
+        backlog.release.set()
+        backlog.wait_for(7)
+        assert backlog.handled == [0, "stopped"] + list(range(1, 6))
+
+        # With the backlog gone, events are handled in the order they were received
+        # again, so that "stopped" doesn't show up ahead of the output before it.
+        backlog.release.clear()
+        backlog.block_on_output(6)
+        backlog.send_output(7)
+        backlog.send({"seq": 3, "type": "event", "event": "stopped", "body": {}})
+        backlog.wait_until_queued(1, 1)
+        backlog.release.set()
+        backlog.wait_for(10)
+        assert backlog.handled[7:] == [6, 7, "stopped"]
+        assert backlog.channel.output_backlogs == 1
+    finally:
+        backlog.close()
@@ -0,0 +1,62 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See LICENSE in the project root
+# for license information.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import threading
+
+import pytest
+
+from debugpy import launcher
+from debugpy.launcher import output
+
+
+class FakeChannel(object):
+    def __init__(self):
+        self.events = []
+        self.event_sent = threading.Event()
+
+    def send_event(self, event, body):
+        self.events.append((event, body))
+        self.event_sent.set()
+
+
+@pytest.fixture
+def capture(monkeypatch):
+    channel = FakeChannel()
+    monkeypatch.setattr(launcher, "channel", channel, raising=False)
+    read_fd, write_fd = os.pipe()
+    capture = output.CaptureOutput("test", "stdout", read_fd, None)
+    try:
+        yield capture, channel, write_fd
+    finally:
+        try:
+            os.close(write_fd)
+        except OSError:
+            pass
+        capture._worker_thread.join()
+        capture._sender_thread.join()
+        del output.CaptureOutput.instances["stdout"]
+
+
+def test_small_output_is_sent_after_batch_delay(capture):
+    capture, channel, write_fd = capture
+    os.write(write_fd, b"hello\n")
+
+    # Well before the pipe is closed.
+    assert channel.event_sent.wait(capture.batch_delay + 5)
+    assert channel.events == [("output", {"category": "stdout", "output": "hello\n"})]
+
+
+def test_output_is_sent_in_order(capture):
+    capture, channel, write_fd = capture
+    for i in range(100):
+        os.write(write_fd, "{0}\n".format(i).encode("ascii"))
+    os.close(write_fd)
+    capture._sender_thread.join()
+
+    assert all(event == "output" for event, _ in channel.events)
+    sent = "".join(body["output"] for _, body in channel.events)
+    assert sent == "".join("{0}\n".format(i) for i in range(100))
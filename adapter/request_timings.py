@@ -0,0 +1,110 @@
+
+from util import log, peek
+import json
+import time
+
+# Event debugpy's pydevd sends after answering each request when PYDEVD_REQUEST_TIMINGS is set
+TIMINGS_EVENT = 'debugpyTimings'
+
+# Upper bounds (ms) of the histogram buckets, the last one taking everything above
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram:
+    """
+    Counts durations (ms) in fixed buckets, keeping their total and maximum.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        i = 0
+        while i < len(BUCKETS) and ms > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def describe(self):
+        n = sum(self.counts)
+        buckets = ' '.join(
+            '{}{}:{}'.format('<=' if i < len(BUCKETS) else '>', BUCKETS[min(i, len(BUCKETS) - 1)], count)
+            for i, count in enumerate(self.counts) if count
+        )
+        return "n={} avg {:.1f} ms, max {:.1f} ms | {}".format(n, self.total / n, self.max, buckets)
+
+
+class RequestTimings:
+    """
+    Opt-in timing of the requests relayed to debugpy (see NUKE_ADAPTER_TIMINGS in util).
+
+    The adapter measures how long each request took to be relayed to debugpy and how long
+    until its response came back. pydevd, in Nuke, reports how long each stage of its
+    handling took in a debugpyTimings event after the response, which is logged and
+    swallowed here rather than forwarded to the debugger. Everything is also counted
+    in per-command histograms, logged by dump() when the adapter exits.
+    """
+
+    def __init__(self):
+        self._pending = {}  # request seq -> (command, received, relayed)
+        self._histograms = {}  # (command, measure) -> Histogram
+
+    def on_request(self, seq, command, received):
+        self._pending[seq] = (command, received, None)
+
+    def on_relayed(self, seq):
+        entry = self._pending.get(seq)
+        if entry is not None:
+            self._pending[seq] = (entry[0], entry[1], time.perf_counter())
+
+    def on_response(self, message):
+        """
+        Takes the raw response (bytes) to a relayed request.
+        """
+
+        entry = self._pending.pop(peek(message, 'request_seq'), None)
+        if entry is None:
+            return
+
+        command, received, relayed = entry
+        now = time.perf_counter()
+        if relayed is not None:
+            self._add(command, 'relay', (relayed - received) * 1000)
+            self._add(command, 'debugpy', (now - relayed) * 1000)
+        self._add(command, 'round trip', (now - received) * 1000)
+
+    def on_timings_event(self, message):
+        """
+        Takes a raw debugpyTimings event (bytes) sent by pydevd.
+        """
+
+        body = json.loads(message).get('body') or {}
+        command = body.get('command')
+        timings = body.get('timings') or {}
+
+        stages = sorted(timings.items(), key=lambda item: item[1])
+        log("pydevd timings of {} #{}: {}".format(
+            command, body.get('request_seq'), ', '.join('{} +{:.1f} ms'.format(*stage) for stage in stages)))
+
+        if 'sent' in timings:
+            self._add(command, 'pydevd', timings['sent'])
+        if 'started' in timings and 'executed' in timings:
+            self._add(command, 'pydevd execute', timings['executed'] - timings['started'])
+
+    def _add(self, command, measure, ms):
+        histogram = self._histograms.get((command, measure))
+        if histogram is None:
+            histogram = self._histograms[command, measure] = Histogram()
+        histogram.add(ms)
+
+    def dump(self):
+        if not self._histograms:
+            return
+
+        lines = ["Request timings:"]
+        for (command, measure), histogram in sorted(self._histograms.items()):
+            lines.append("  {} {}: {}".format(command, measure, histogram.describe()))
+        log('\n'.join(lines))
@@ -0,0 +1,189 @@
+'''
+    Runs the module being debugged in Nuke, reloading only what changed
+
+    The first run imports the module. Later runs look at the module and every
+    module imported from the same directory tree: those whose source is unchanged
+    are skipped, and the others are patched in place with pydevd's xreload, so
+    that the state they hold in memory survives. Modules are reloaded after the
+    modules they import from, so that they bind the reloaded objects.
+
+    A source is unchanged if its mtime and size didn't change since the last run,
+    or if they did but its contents still hash the same. Modules imported since the
+    last run are taken as they were when imported. A changed source is only taken
+    as the new state once its module reloaded, so that a reload failing (on a syntax
+    error, say) is tried again on the next run.
+'''
+
+import ast
+import hashlib
+import os
+import sys
+
+try:
+    from importlib import reload
+except ImportError:  # Python 2, where reload is a builtin
+    pass
+
+
+# Source path -> (mtime, size, sha1) as of the last run it was loaded in
+_sources = {}
+
+
+def _source_path(module):
+    path = getattr(module, '__file__', None)
+    if not path:
+        return None
+    if path.endswith(('.pyc', '.pyo')):
+        path = path[:-1]
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _local_modules(directory):
+    """ The imported modules whose source is in the directory, or below it """
+
+    directory = os.path.join(os.path.normcase(os.path.abspath(directory)), '')
+    modules = []
+    for module in list(sys.modules.values()):
+        path = _source_path(module)
+        if path and path.startswith(directory) and os.path.exists(path):
+            modules.append((module, path))
+    return modules
+
+
+def _digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _state(path):
+    """ The current state of the source, only hashing it if its mtime or size changed """
+
+    stat = os.stat(path)
+    known = _sources.get(path)
+    if known and known[:2] == (stat.st_mtime, stat.st_size):
+        return known
+    return (stat.st_mtime, stat.st_size, _digest(path))
+
+
+def _changed(path, state):
+    """ Whether the source changed since the last run, given its current state """
+
+    known = _sources.get(path)
+    # A module seen for the first time was imported since the last run, from its current source
+    return bool(known) and known[2] != state[2]
+
+
+def _record(modules):
+    """ Records the state of the sources not seen yet """
+
+    for _, path in modules:
+        if path not in _sources:
+            _sources[path] = _state(path)
+
+
+def _package(module):
+    package = getattr(module, '__package__', None)
+    if package is None:
+        package = module.__name__ if hasattr(module, '__path__') else module.__name__.rpartition('.')[0]
+    return package
+
+
+def _imports(module, path, names):
+    """ The names of the modules among the given ones that the source of the module imports """
+
+    try:
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), path)
+    except (SyntaxError, ValueError, IOError, OSError):
+        return []  # Reloading it will report the error
+
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ''
+            if node.level:
+                package = _package(module).split('.')
+                if node.level > 1:
+                    package = package[:1 - node.level]
+                base = '.'.join([part for part in package + [base] if part])
+            imported.add(base)
+            # The names imported may be submodules
+            imported.update(base + '.' + alias.name for alias in node.names)
+
+    imported.discard(module.__name__)
+    return sorted(name for name in imported if name in names)
+
+
+def _reload_order(changed, modules):
+    """
+    The changed modules, each after the local modules it imports from (directly or through
+    unchanged modules), so that reloading it binds what they hold once reloaded
+    """
+
+    by_name = dict((module.__name__, (module, path)) for module, path in modules)
+    changed_names = set(module.__name__ for module in changed)
+    ordered = []
+    visited = set()
+
+    def visit(name):
+        visited.add(name)
+        module, path = by_name[name]
+        for imported in _imports(module, path, by_name):
+            if imported not in visited:  # Import cycles are broken here
+                visit(imported)
+        if name in changed_names:
+            ordered.append(module)
+
+    for name in sorted(changed_names):
+        if name not in visited:
+            visit(name)
+    return ordered
+
+
+def _reload(module):
+    try:
+        from _pydevd_bundle.pydevd_reload import xreload
+    except ImportError:
+        xreload = None
+
+    if xreload is not None:
+        xreload(module)
+    else:
+        reload(module)
+
+
+def run(name, directory):
+    """
+    Imports the module the first time, then only reloads it,
+    and the modules it imported from its directory, if they changed.
+    """
+
+    if name not in sys.modules:
+        __import__(name)
+        _record(_local_modules(directory))
+        return
+
+    modules = _local_modules(directory)
+    changed = {}  # name -> (path, state) of the changed modules
+    for module, path in modules:
+        state = _state(path)
+        if _changed(path, state):
+            changed[module.__name__] = (path, state)
+        else:
+            _sources[path] = state
+
+    if not changed:
+        sys.stderr.write('No changes to {0} or its local imports, skipping reload.\n'.format(name))
+        return
+
+    try:
+        for module in _reload_order([module for module, _ in modules if module.__name__ in changed], modules):
+            sys.stderr.write('Reloading {0}...\n'.format(module.__name__))
+            _reload(module)
+            path, state = changed[module.__name__]
+            _sources[path] = state
+    finally:
+        # The modules the reloaded code imported for the first time are as they are now
+        _record(_local_modules(directory))
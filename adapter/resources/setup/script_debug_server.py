@@ -1,9 +1,33 @@
 '''
     Simple socket server using threads
+
+    Clients keep their connection open and send any number of commands over it.
+    Each command is framed as a 4-byte big-endian length followed by a UTF-8
+    JSON object, and runs its code inline in Nuke's main thread:
+
+        {"id": 1, "code": "...", "priority": "control"}
+
+    Commands are queued as they arrive, and everything queued is run in a single
+    main-thread callback. Commands with the "control" priority run ahead of the
+    others, which are run in the order they were received.
+
+    Once the code has run, the command is answered on the same connection,
+    framed the same way:
+
+        {"id": 1, "success": true, "error": null, "result": null}
+
+    Code can report back to the client by assigning a JSON-serializable value
+    to __result__.
 '''
 
+from collections import deque
+import json
 import socket
+import struct
+import sys
 import threading
+import traceback
+import __main__
 
 import nuke
 
@@ -11,9 +35,153 @@ import nuke
 HOST = ''
 PORT = 8888
 
+HEADER = struct.Struct('>I')
+
+PRIORITY_CONTROL = 'control'
+
+_queue_lock = threading.Lock()
+_control_queue = deque()
+_queue = deque()
+_drain_scheduled = False
+
+
+class _Client(object):
+    """ A connection commands are received from and answered on """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.send_lock = threading.Lock()
+
+    def send(self, message):
+        payload = json.dumps(message).encode('utf-8')
+        with self.send_lock:
+            self.sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+class _Command(object):
+
+    def __init__(self, client, command):
+        self.client = client
+        self.id = command['id']
+        self.code = command['code']
+        self.priority = command.get('priority')
+
+    def run(self):
+        """ Runs the code, then answers the client. Must be called in the main thread. """
+
+        result, error = _exec(self.code)
+        try:
+            try:
+                self.client.send({'id': self.id, 'success': error is None, 'error': error, 'result': result})
+            except UnicodeError as e:
+                # i.e. Python 2 byte strings that aren't UTF-8
+                error = 'The __result__ set has text which can\'t be encoded as JSON (%s): %r' % (e, result)
+                self.client.send({'id': self.id, 'success': False, 'error': error, 'result': None})
+            except (TypeError, ValueError):
+                error = 'The __result__ set is not JSON serializable: %r' % (result,)
+                self.client.send({'id': self.id, 'success': False, 'error': error, 'result': None})
+        except socket.error:
+            # The client went away, nobody is waiting for the answer
+            pass
+
+
+def _namespace():
+    """ The namespace commands run in, shared by all commands sent to Nuke """
+
+    namespace = __main__.__dict__.get('_atom_plugin_SendToNuke')
+    if not namespace:
+        namespace = __main__.__dict__.copy()
+        __main__.__dict__['_atom_plugin_SendToNuke'] = namespace
+    return namespace
 
-def _exec(command):
-    exec(command)
+
+def _exec(code):
+    """
+    Runs code in the shared namespace.
+    Returns the value it assigned to __result__, and the traceback if it raised.
+    """
+
+    namespace = _namespace()
+    namespace.pop('__result__', None)
+    try:
+        exec(compile(code, '<sublime debugger>', 'exec'), namespace, namespace)
+    except BaseException:
+        # SystemExit and KeyboardInterrupt too: the rest of the commands run in the
+        # same callback must still be run and answered
+        error = traceback.format_exc()
+        sys.stderr.write(error)
+        if isinstance(error, bytes):
+            # Python 2, where it may have non-ASCII bytes from the code or the exception message
+            error = error.decode('utf-8', 'replace')
+        return None, error
+    return namespace.pop('__result__', None), None
+
+
+def _submit(command):
+    """ Queues a command, scheduling a main-thread callback unless one is already pending """
+
+    global _drain_scheduled
+
+    with _queue_lock:
+        if command.priority == PRIORITY_CONTROL:
+            _control_queue.append(command)
+        else:
+            _queue.append(command)
+
+        schedule = not _drain_scheduled
+        _drain_scheduled = True
+
+    if schedule:
+        nuke.executeInMainThread(_drain)
+
+
+def _drain():
+    """ Runs all the commands queued so far, control commands first """
+
+    global _drain_scheduled
+
+    with _queue_lock:
+        commands = list(_control_queue) + list(_queue)
+        _control_queue.clear()
+        _queue.clear()
+        # Commands received from now on are run by the next callback
+        _drain_scheduled = False
+
+    for command in commands:
+        command.run()
+
+
+def _recv_exactly(sock, size):
+    """ Returns exactly size bytes from the socket, or None if it disconnected """
+
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _serve_client(sock):
+    """ Queues the commands sent by a client until it disconnects """
+
+    client = _Client(sock)
+    try:
+        while True:
+            header = _recv_exactly(sock, HEADER.size)
+            if header is None:
+                break
+            payload = _recv_exactly(sock, HEADER.unpack(header)[0])
+            if payload is None:
+                break
+
+            _submit(_Command(client, json.loads(payload.decode('utf-8'))))
+    except socket.error:
+        pass
+    finally:
+        sock.close()
 
 
 def server_start():
@@ -23,17 +191,9 @@ def server_start():
 
     while True:
         client, _ = s.accept()
-        try:
-            command = client.recv(4096)
-            if command:
-                nuke.executeInMainThread(_exec, args=(command))
-        except SystemExit:
-            result = self.encode('SERVER: Shutting down...')
-            if result:
-                client.send(result)
-            raise
-        finally:
-            client.close()
+        t = threading.Thread(None, _serve_client, args=(client,))
+        t.setDaemon(True)
+        t.start()
 
 
 t = threading.Thread(None, server_start)
@@ -0,0 +1,107 @@
+
+from util import peek
+import json
+
+# Requests that only read the state of a stopped debuggee
+CACHEABLE_COMMANDS = {'threads', 'stackTrace', 'scopes', 'variables'}
+
+# Requests that resume the debuggee, or may change what it's stopped on
+RESUMING_COMMANDS = {
+    'continue', 'next', 'stepIn', 'stepOut', 'stepBack', 'reverseContinue',
+    'restartFrame', 'goto', 'pause', 'restart', 'disconnect', 'terminate',
+}
+
+# Requests that may change variables while stopped
+MODIFYING_COMMANDS = {'setVariable', 'setExpression'}
+
+# Evaluations in these contexts are assumed to have no side effects
+READ_ONLY_EVALUATE_CONTEXTS = {'hover', 'watch', 'variables', 'clipboard'}
+
+# Events after which debugpy's answers may be different
+INVALIDATING_EVENTS = {'stopped', 'continued', 'thread', 'invalidated', 'exited', 'terminated'}
+
+# Responses answered from the cache are numbered from here, far above the seqs debugpy numbers
+# its own messages with (from 1, one per message), so that the debugger never sees a seq twice.
+# They still increase from one cached response to the next, but not across debugpy's messages.
+CACHED_SEQ_START = 1 << 30
+
+
+class ResponseCache:
+    """
+    Answers repeated threads, stackTrace, scopes and variables requests locally
+    while Nuke is stopped, instead of round-tripping them through debugpy.
+
+    Responses are keyed by command and arguments and only live for the current
+    stop: each stopped/continued event, each request resuming Nuke, and each
+    request that may change variables starts a new epoch and drops the cache.
+    Cached responses are replayed with a seq of their own (see CACHED_SEQ_START).
+    """
+
+    def __init__(self):
+        self.epoch = 0
+        self.stopped = False
+        self.hits = 0
+        self.misses = 0
+        self._seq = CACHED_SEQ_START
+        self._responses = {}  # key -> response
+        self._pending = {}  # request seq -> (key, epoch it was sent in)
+
+    def on_request(self, request):
+        """
+        Returns a response to the request from the cache, or None if it must be sent to debugpy.
+        """
+
+        command = request.get('command')
+
+        if command in RESUMING_COMMANDS:
+            self.stopped = False
+            self.invalidate()
+            return None
+
+        if command in MODIFYING_COMMANDS or (
+                command == 'evaluate' and
+                request.get('arguments', {}).get('context') not in READ_ONLY_EVALUATE_CONTEXTS):
+            self.invalidate()
+            return None
+
+        if command not in CACHEABLE_COMMANDS or not self.stopped:
+            return None
+
+        key = command + json.dumps(request.get('arguments'), sort_keys=True)
+        response = self._responses.get(key)
+        if response is None:
+            self.misses += 1
+            self._pending[request['seq']] = (key, self.epoch)
+            return None
+
+        self.hits += 1
+        self._seq += 1
+        return dict(response, seq=self._seq, request_seq=request['seq'])
+
+    def on_response(self, message):
+        """
+        Keeps debugpy's response (raw bytes) if it answers a cacheable request of the current epoch.
+        """
+
+        if not self._pending:
+            return
+
+        entry = self._pending.pop(peek(message, 'request_seq'), None)
+        if entry is None or entry[1] != self.epoch:
+            return
+
+        response = json.loads(message)
+        if response.get('success'):
+            self._responses[entry[0]] = response
+
+    def on_event(self, event):
+        if event in INVALIDATING_EVENTS:
+            self.invalidate()
+            if event == 'stopped':
+                self.stopped = True
+            elif event == 'continued':
+                self.stopped = False
+
+    def invalidate(self):
+        self.epoch += 1
+        self._responses.clear()
@@ -1,40 +1,168 @@
 
 from os.path import abspath, join, dirname, basename, split
-from datetime import datetime
+from logger import Logger, LEVELS, DEBUG, INFO, WARNING, ERROR
 from threading import Thread
 import json
-import sys
-
-# Import correct Queue
-if (sys.version_info[0] == 3):
-    from queue import Queue
-else:  # Python 2
-    from multiprocessing import Queue
+import os
+import re
 
 #  Debugging this adapter
-debug = True
+#  Set NUKE_ADAPTER_LOG_LEVEL to DEBUG to log every message relayed
 log_file = abspath(join(dirname(__file__), 'log.txt'))
+log_level = LEVELS.get(os.environ.get('NUKE_ADAPTER_LOG_LEVEL', 'INFO').upper(), INFO)
 
-if debug:
-    open(log_file, 'w+').close()  # Creates and/or clears the file
+#  Set NUKE_ADAPTER_TIMINGS to 1 to log how long each request takes in the adapter and in
+#  Nuke's debugpy, with histograms per command when the adapter exits. It's enabled in
+#  Nuke's debugpy the first time it's started there.
+REQUEST_TIMINGS = os.environ.get('NUKE_ADAPTER_TIMINGS', '').lower() in ('1', 'true', 'yes')
+
+#  Set NUKE_ADAPTER_STATS_FILE to a path to have the bytes the adapter copied while framing
+#  the messages it relayed written there, as JSON, when it exits (see bench/relay_bench.py)
+STATS_FILE = os.environ.get('NUKE_ADAPTER_STATS_FILE')
+
+logger = Logger(log_file, level=log_level)
+logger.start()  # Creates and/or clears the file
 
 debugpy_path = join(abspath(dirname(__file__)), "python")
+modules_path = join(abspath(dirname(__file__)), "resources", "modules")
 
 
 # --- Utility functions --- #
 
-def log(msg, json_msg=None):
-    if debug:
+def log(msg, json_msg=None, level=None):
+    """
+    Logs a message, followed by the JSON message given with it, if any.
+    Messages default to INFO, and those carrying JSON to DEBUG,
+    as those are logged for every DAP message relayed.
+    """
+
+    if level is None:
+        level = INFO if json_msg is None else DEBUG
+    logger.log(level, msg, json_msg)
 
-        if json_msg:
-            msg += '\n' + json.dumps(json.loads(json_msg), indent=4)
 
-        with open(log_file, 'a+') as f:
-            f.write('\n' + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + " - " + msg + '\n')
+def run(func, args=(), daemon=False):
+    Thread(target=func, args=args, daemon=daemon).start()
 
 
-def run(func, args=()):
-    Thread(target=func, args=args).start()
+def frame_message(body):
+    """
+    Returns the body (str or bytes) framed with its DAP header, as bytes.
+    The Content-Length is the byte length of the body.
+    """
+
+    if not isinstance(body, bytes):
+        body = body.encode('UTF-8')
+        RelayStats.bytes_copied += len(body)
+    header = (CONTENT_HEADER + '{}\r\n\r\n'.format(len(body))).encode('ascii')
+    RelayStats.bytes_copied += len(header) + len(body)
+    return header + body
+
+
+class RelayStats:
+    """
+    Counts the bytes the adapter copies itself while relaying messages: the chunks
+    read into the frame parsers' buffers, the bodies copied out of them and the
+    messages framed again. Copies made by asyncio and the OS aren't counted.
+    """
+
+    bytes_copied = 0
+
+    @classmethod
+    def dump(cls):
+        if STATS_FILE:
+            with open(STATS_FILE, 'w') as f:
+                json.dump({'bytes_copied': cls.bytes_copied}, f)
+
+
+def parse_content_length(header):
+    """
+    Returns the Content-Length value found in a raw block of header lines (bytes),
+    or -1 if there isn't one.
+    """
+
+    for line in header.split(b'\r\n'):
+        if line.startswith(CONTENT_HEADER_BYTES):
+            return int(line[len(CONTENT_HEADER_BYTES):])
+    return -1
+
+
+class FrameParser:
+    """
+    Splits a byte stream into DAP messages.
+
+    Chunks of any size are fed to it as they are read, and it returns the bodies
+    of the messages they complete, as bytes. Content-Length is a byte count,
+    so bodies holding multibyte UTF-8 characters are framed correctly.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._content_length = -1
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        RelayStats.bytes_copied += len(data)
+        messages = []
+
+        while True:
+            if self._content_length < 0:
+                # Wait for the end of the headers, then get the
+                # length of the content following them
+                end = buffer.find(HEADER_SEPARATOR)
+                if end < 0:
+                    break
+                self._content_length = parse_content_length(bytes(buffer[:end]))
+                RelayStats.bytes_copied += 2 * end  # Sliced, then copied to bytes
+                del buffer[:end + len(HEADER_SEPARATOR)]
+
+                if self._content_length < 0:
+                    raise ValueError("DAP message without a Content-Length header")
+
+            if len(buffer) < self._content_length:
+                break
+
+            # Copy the body out of the buffer once
+            with memoryview(buffer)[:self._content_length] as body:
+                messages.append(body.tobytes())
+            RelayStats.bytes_copied += self._content_length
+            del buffer[:self._content_length]
+            self._content_length = -1
+
+        return messages
+
+
+_peek_patterns = {}
+
+
+def peek(message, key):
+    """
+    Returns the value of a string or integer field of a raw DAP message (bytes)
+    without decoding it, or None if the field isn't present.
+
+    Only the first occurrence of the key is considered, which for messages
+    serialized by debugpy is the top-level one. Callers that act on the result
+    for anything other than routing should confirm it with a full parse.
+    """
+
+    pattern = _peek_patterns.get(key)
+    if pattern is None:
+        pattern = re.compile(
+            b'"' + key.encode('ascii') + b'"\\s*:\\s*(?:"((?:[^"\\\\]|\\\\.)*)"|(-?\\d+))'
+        )
+        _peek_patterns[key] = pattern
+
+    match = pattern.search(message)
+    if not match:
+        return None
+    value = match.group(1)
+    if value is not None:
+        if b'\\' in value:
+            # Escaped characters are decoded as JSON does
+            return json.loads(b'"' + value + b'"')
+        return value.decode('UTF-8')
+    return int(match.group(2))
 
 
 # --- Resources --- #
@@ -43,19 +171,34 @@ def run(func, args=()):
 ATTACH_TEMPLATE = """
 import sys
 import os
-debugpy_module = r"{debugpy_path}"
-if debugpy_module not in sys.path:
-    sys.path.insert(0, debugpy_module)
+for module_path in (r"{debugpy_path}", r"{modules_path}"):
+    if module_path not in sys.path:
+        sys.path.insert(0, module_path)
+
+# pydevd reads it when it's imported, and it mustn't be passed on
+# to the processes started from Nuke afterwards (i.e. renders)
+_set_request_timings = {request_timings} and "PYDEVD_REQUEST_TIMINGS" not in os.environ
+if _set_request_timings:
+    os.environ["PYDEVD_REQUEST_TIMINGS"] = "1"
 
 import debugpy
 
 try:
     debugpy.configure(python="{interpreter}")
     debugpy.listen(("{hostname}",{port}))
-except RuntimeError:
-    x=1
+    listening = "started"
+except RuntimeError as e:
+    # debugpy was already set up by a previous session
+    if "already" not in str(e):
+        raise
+    listening = "already running"
 finally:
+    if _set_request_timings:
+        os.environ.pop("PYDEVD_REQUEST_TIMINGS", None)
     sys.stderr.write("\\n\\nConnection to Sublime Debugger is active.\\n\\n")
+
+# Tell the adapter debugpy is listening, so that it can connect right away
+__result__ = {{"listening": listening}}
 """
 
 # Used to run the module.
@@ -86,7 +229,49 @@ except Exception as e:
     raise e
 """
 
+# Used to run the module when the "reload" setting is "incremental":
+# only the module and its local imports that changed since the last run are reloaded.
+RUN_INCREMENTAL_TEMPLATE = """
+try:
+    s = sys.stdout
+    sys.stdout = sys.stderr
+
+    current_directory = r"{dir}"
+    if current_directory not in sys.path:
+        sys.path.insert(0, current_directory)
+
+    print('\\nDebugging {file_name}...\\n\\n')
+
+    import sublime_debugger_rerun
+    sublime_debugger_rerun.run('{file_name}', current_directory)
+
+    print('\\n\\nDone.\\n')
+
+    sys.stdout = s
+
+except Exception as e:
+    sys.stderr.write('Error while debugging: ' + str(e))
+    raise e
+"""
+
 CONTENT_HEADER = "Content-Length: "
+CONTENT_HEADER_BYTES = CONTENT_HEADER.encode('ascii')
+HEADER_SEPARATOR = b"\r\n\r\n"
+
+# Size of the chunks read from stdin and from debugpy
+READ_CHUNK_SIZE = 64 * 1024
+
+# Address of script_debug_server in Nuke
+NUKE_ADDRESS = ("localhost", int(os.environ.get('NUKE_DEBUG_SERVER_PORT', 8888)))
+
+# Seconds to wait for connections to Nuke and its debugpy to be established
+CONNECT_TIMEOUT = 10
+
+# Connecting to debugpy is retried this many times, waiting twice as
+# long after each failure, from the initial delay up to the max (seconds)
+CONNECT_ATTEMPTS = 8
+CONNECT_INITIAL_DELAY = 0.05
+CONNECT_MAX_DELAY = 2.0
 
 INITIALIZE_RESPONSE = """{
     "request_seq": 1,
@@ -150,26 +335,6 @@ PAUSE_REQUEST = """{{
     "type": "request"
 }}"""
 
-NUKE_CMD_TEMPLATE = """
-import traceback
-import sys
-import __main__
-
-namespace = __main__.__dict__.get('_atom_plugin_SendToNuke')
-if not namespace:
-    namespace = __main__.__dict__.copy()
-    __main__.__dict__['_atom_plugin_SendToNuke'] = namespace
-
-namespace['__file__'] = r"{0}"
-namespace['print'] = sys.stderr.write
-
-try:
-    execfile(r"{0}", namespace, namespace)
-except:
-    sys.stdout.write(traceback.format_exc())
-    traceback.print_exc()
-"""
-
 # DISCONNECT_RESPONSE = """{{
 #     "request_seq": {req_seq},
 #     "body": {{}},
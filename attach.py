@@ -9,6 +9,7 @@ from os.path import join, abspath, dirname, expanduser, exists
 from Debugger.modules.debugger.debugger import Debugger
 from threading import Timer
 from shutil import copy
+import filecmp
 import sublime
 import time
 import sys
@@ -35,6 +36,7 @@ config_snippets = [
             "program": "\${file\}",
             "request": "attach",  # can only be attach or launch
             "interpreter": sys.executable,
+            "reload": "full",  # "incremental" only reloads the modules that changed since the last run
             "debugpy":  # The host/port used to communicate with debugpy in Nuke
             {
                 "host": "localhost",
@@ -62,6 +64,7 @@ srv = join(user_nuke_path, "script_debug_server.py")
 menu = join(user_nuke_path, "menu.py")
 
 first_setup = False
+server_updated = False
 
 if exists(join(user_nuke_path, 'debug_server.py')):
     os.remove(join(user_nuke_path, 'debug_server.py'))
@@ -69,6 +72,10 @@ if exists(join(user_nuke_path, 'debug_server.py')):
 if not exists(srv):
     copy(join(setup, 'script_debug_server.py'), srv)
     first_setup = True
+elif not filecmp.cmp(join(setup, 'script_debug_server.py'), srv, shallow=False):
+    # The installed server is from an older version of the adapter
+    copy(join(setup, 'script_debug_server.py'), srv)
+    server_updated = True
 
 if not exists(menu):
     with open(menu, 'w') as f:
@@ -121,6 +128,11 @@ def plugin_loaded():
             "Because this is your first time using the adapter, a one-time "
             "setup was performed. Please restart Nuke before continuing."
         )
+    elif server_updated:
+        sublime.message_dialog(
+            "The Nuke debug adapter was updated, along with the server it "
+            "installed in Nuke. Please restart Nuke before continuing."
+        )
 
 
 def plugin_unloaded():
@@ -0,0 +1,461 @@
+"""
+
+Measures the adapter's relay in isolation.
+
+Starts the adapter as a subprocess, playing the Debugger on its stdin/stdout,
+and stands in for both script_debug_server in Nuke and debugpy. A session
+(initialize, attach, setBreakpoints, configurationDone, then a scenario's
+requests) is replayed through it, and the throughput, per-hop latency, bytes
+relayed and bytes the adapter copied while framing them are reported:
+
+    debugger->debugpy   request written to stdin -> request read by debugpy
+    debugpy->debugger   response written by debugpy -> response read from stdout
+    round trip          request written to stdin -> response read from stdout
+
+Requests the adapter answers itself, from its response cache, never reach
+debugpy, so they're only counted in the round trip.
+
+Usage:
+
+    python bench/relay_bench.py [--scenario stepping|variables|output|all]
+                                [--iterations N] [--window N] [--session FILE]
+                                [--adapter PATH] [--json]
+
+A recorded session is a JSON list of exchanges, each being a request and the
+messages debugpy answers it with:
+
+    [{"request": {"command": "stackTrace", "arguments": {...}},
+      "responses": [{"type": "response", "body": {...}}, ...]}, ...]
+
+request_seq, seq, success and command are filled in during the replay.
+
+"""
+
+from os.path import abspath, dirname, join
+from threading import Thread, Event
+import argparse
+import subprocess
+import tempfile
+import socket
+import struct
+import json
+import time
+import sys
+import os
+
+repo_path = dirname(dirname(abspath(__file__)))
+
+CONTENT_HEADER = b"Content-Length: "
+
+
+# --- Framing --- #
+
+def frame(message):
+    body = json.dumps(message).encode('UTF-8')
+    return CONTENT_HEADER + str(len(body)).encode('ascii') + b"\r\n\r\n" + body
+
+
+def read_frame(stream):
+    """
+    Reads a DAP message from a binary file object, returning its raw body,
+    or None once the stream is closed.
+    """
+
+    content_length = -1
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        if line == b"\r\n":
+            break
+        if line.startswith(CONTENT_HEADER):
+            content_length = int(line[len(CONTENT_HEADER):])
+    return stream.read(content_length)
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+# --- Sessions --- #
+
+def variables(count, value_size=40):
+    return [
+        {
+            "name": "knob_{}".format(i),
+            "value": "'" + "x" * value_size + "'",
+            "type": "str",
+            "evaluateName": "node['knob_{}']".format(i),
+            "variablesReference": 0,
+        }
+        for i in range(count)
+    ]
+
+
+def stack_frames(depth):
+    return [
+        {
+            "id": i + 1,
+            "name": "callback_{}".format(i),
+            "line": 10 + i,
+            "column": 1,
+            "source": {"path": "/studio/pipeline/nuke/tools/callbacks_{}.py".format(i % 7)},
+        }
+        for i in range(depth)
+    ]
+
+
+def stepping(iterations):
+    """ Stepping through a callback: small requests, small responses. """
+
+    exchanges = []
+    for i in range(iterations):
+        exchanges += [
+            {"request": {"command": "next", "arguments": {"threadId": 1}},
+             "responses": [{"type": "response", "body": {}},
+                           {"type": "event", "event": "stopped",
+                            "body": {"reason": "step", "threadId": 1}}]},
+            {"request": {"command": "threads"},
+             "responses": [{"type": "response", "body": {"threads": [{"id": 1, "name": "MainThread"}]}}]},
+            {"request": {"command": "stackTrace", "arguments": {"threadId": 1}},
+             "responses": [{"type": "response", "body": {"stackFrames": stack_frames(20), "totalFrames": 20}}]},
+            {"request": {"command": "scopes", "arguments": {"frameId": 1}},
+             "responses": [{"type": "response", "body": {"scopes": [
+                 {"name": "Locals", "variablesReference": 1, "expensive": False}]}}]},
+            {"request": {"command": "variables", "arguments": {"variablesReference": 1}},
+             "responses": [{"type": "response", "body": {"variables": variables(30)}}]},
+        ]
+    return exchanges
+
+
+def variables_storm(iterations):
+    """ Expanding a big node graph: multi-MB variables and stackTrace responses. """
+
+    big_variables = variables(20000)
+    deep_stack = stack_frames(1000)
+
+    exchanges = []
+    for i in range(iterations):
+        exchanges += [
+            {"request": {"command": "stackTrace", "arguments": {"threadId": 1}},
+             "responses": [{"type": "response", "body": {"stackFrames": deep_stack, "totalFrames": 1000}}]},
+            {"request": {"command": "variables", "arguments": {"variablesReference": i + 1}},
+             "responses": [{"type": "response", "body": {"variables": big_variables}}]},
+        ]
+    return exchanges
+
+
+def output_flood(iterations):
+    """ A script printing in a loop: bursts of output events between requests. """
+
+    line = "Writing frame 1001 of /shows/abc/sh010/comp/render.%04d.exr\n"
+    exchanges = []
+    for i in range(iterations):
+        exchanges.append(
+            {"request": {"command": "threads"},
+             "responses": [{"type": "event", "event": "output",
+                            "body": {"category": "stdout", "output": line}}] * 50 +
+                          [{"type": "response", "body": {"threads": [{"id": 1, "name": "MainThread"}]}}]}
+        )
+    return exchanges
+
+
+SCENARIOS = {
+    'stepping': stepping,
+    'variables': variables_storm,
+    'output': output_flood,
+}
+
+# Default iterations, the variables storm's responses being several MB each
+ITERATIONS = {
+    'stepping': 200,
+    'variables': 10,
+    'output': 200,
+}
+
+SETUP = [
+    {"request": {"command": "attach", "arguments": {}},
+     "responses": [{"type": "response", "body": {}},
+                   {"type": "event", "event": "initialized", "body": {}}]},
+    {"request": {"command": "setBreakpoints", "arguments": {
+        "source": {"path": "/studio/pipeline/nuke/tools/callbacks_0.py"},
+        "breakpoints": [{"line": 10 + i} for i in range(20)]}},
+     "responses": [{"type": "response", "body": {"breakpoints": [
+         {"id": i, "verified": True, "line": 10 + i} for i in range(20)]}}]},
+    {"request": {"command": "configurationDone"},
+     "responses": [{"type": "response", "body": {}}]},
+]
+
+
+# --- Stand-ins --- #
+
+class FakeNuke:
+    """
+    Stands in for script_debug_server, acknowledging every command.
+    """
+
+    HEADER = struct.Struct('>I')
+
+    def __init__(self):
+        self.server = socket.socket()
+        self.server.bind(('localhost', 0))
+        self.server.listen(5)
+        self.port = self.server.getsockname()[1]
+        Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            client, _ = self.server.accept()
+            Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        stream = client.makefile('rb')
+        while True:
+            header = stream.read(self.HEADER.size)
+            if len(header) < self.HEADER.size:
+                return
+            command = json.loads(stream.read(self.HEADER.unpack(header)[0]).decode('UTF-8'))
+            payload = json.dumps({'id': command['id'], 'success': True, 'error': None,
+                                  'result': {'listening': 'started'}}).encode('UTF-8')
+            client.sendall(self.HEADER.pack(len(payload)) + payload)
+
+
+class FakeDebugpy:
+    """
+    Stands in for debugpy in Nuke, answering each request with the responses
+    recorded for it, found by the request's seq (see expect).
+    """
+
+    def __init__(self):
+        self.server = socket.socket()
+        self.server.bind(('localhost', 0))
+        self.server.listen(1)
+        self.port = self.server.getsockname()[1]
+
+        self.received = {}  # request seq -> time debugpy read the request
+        self.sent = {}  # request seq -> time debugpy wrote the response
+        self.bytes_sent = 0
+        self.exchanges = {}  # request seq -> exchange
+        self.seq = 0
+
+        Thread(target=self._serve, daemon=True).start()
+
+    def expect(self, seq, exchange):
+        """ Sets the exchange to answer the request with the given seq with, if it gets here """
+        self.exchanges[seq] = exchange
+
+    def _answer(self, request, exchange):
+        data = []
+        for response in exchange['responses']:
+            self.seq += 1
+            message = dict(response, seq=self.seq)
+            if message['type'] == 'response':
+                message.update(request_seq=request['seq'], success=True, command=request['command'])
+            data.append(frame(message))
+        return b''.join(data)
+
+    def _serve(self):
+        client, _ = self.server.accept()
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        stream = client.makefile('rb')
+
+        while True:
+            body = read_frame(stream)
+            if body is None:
+                return
+            now = time.perf_counter()
+            request = json.loads(body.decode('UTF-8'))
+            self.received[request['seq']] = now
+
+            # The adapter forwards initialize, though it answers it itself
+            if request['command'] == 'initialize':
+                data = frame({"seq": 0, "type": "response", "request_seq": request['seq'],
+                              "success": True, "command": "initialize", "body": {}})
+            else:
+                data = self._answer(request, self.exchanges.pop(request['seq']))
+
+            self.sent[request['seq']] = time.perf_counter()
+            self.bytes_sent += len(data)
+            client.sendall(data)
+
+
+# --- The Debugger --- #
+
+class FakeDebugger:
+    """
+    Plays the Debugger: starts the adapter and talks to it over stdin/stdout.
+    """
+
+    def __init__(self, adapter_path, nuke_port, stats_file):
+        env = dict(os.environ, NUKE_DEBUG_SERVER_PORT=str(nuke_port), NUKE_ADAPTER_STATS_FILE=stats_file)
+        env.setdefault('NUKE_ADAPTER_LOG_LEVEL', 'INFO')
+
+        self.process = subprocess.Popen([sys.executable, adapter_path], env=env,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.seq = 0
+        self.written = {}  # request seq -> time the request was written
+        self.responded = {}  # request seq -> time its response was read
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.messages_read = 0
+        self.response_event = Event()
+        Thread(target=self._read, daemon=True).start()
+
+    def request(self, command, arguments=None):
+        self.seq += 1
+        message = {"seq": self.seq, "type": "request", "command": command}
+        if arguments is not None:
+            message['arguments'] = arguments
+        data = frame(message)
+
+        self.written[self.seq] = time.perf_counter()
+        self.bytes_written += len(data)
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+        return self.seq
+
+    def wait_for(self, seq, timeout=60):
+        deadline = time.perf_counter() + timeout
+        while seq not in self.responded:
+            if time.perf_counter() > deadline:
+                raise TimeoutError("No response to request {}".format(seq))
+            self.response_event.wait(0.1)
+            self.response_event.clear()
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait(timeout=10)
+
+    def _read(self):
+        while True:
+            body = read_frame(self.process.stdout)
+            if body is None:
+                return
+            now = time.perf_counter()
+            self.bytes_read += len(body)
+            self.messages_read += 1
+
+            message = json.loads(body.decode('UTF-8'))
+            if message['type'] == 'response':
+                self.responded[message['request_seq']] = now
+                self.response_event.set()
+
+
+# --- Running --- #
+
+def run_scenario(name, exchanges, adapter_path, window):
+    """
+    Replays the session setup and the exchanges, keeping up to window
+    requests in flight, and returns the measurements.
+    """
+
+    nuke = FakeNuke()
+    debugpy = FakeDebugpy()
+    stats_file = join(tempfile.mkdtemp(), 'adapter_stats.json')
+    debugger = FakeDebugger(adapter_path, nuke.port, stats_file)
+
+    def send(exchange, arguments=None):
+        request = exchange['request']
+        debugpy.expect(debugger.seq + 1, exchange)
+        return debugger.request(request['command'], arguments or request.get('arguments'))
+
+    try:
+        debugger.wait_for(debugger.request('initialize', {"adapterID": "Nuke"}))
+        debugger.wait_for(send(SETUP[0], {
+            "program": join(repo_path, "bench", "relay_bench.py"),
+            "interpreter": sys.executable,
+            "debugpy": {"host": "localhost", "port": debugpy.port},
+        }))
+        for exchange in SETUP[1:]:
+            debugger.wait_for(send(exchange))
+
+        first = debugger.seq + 1
+        started = time.perf_counter()
+        in_flight = []
+        for exchange in exchanges:
+            in_flight.append(send(exchange))
+            if len(in_flight) >= window:
+                debugger.wait_for(in_flight.pop(0))
+        for seq in in_flight:
+            debugger.wait_for(seq)
+        elapsed = time.perf_counter() - started
+
+    finally:
+        debugger.close()
+
+    with open(stats_file) as f:
+        bytes_copied = json.load(f)['bytes_copied']
+    os.remove(stats_file)
+    os.rmdir(dirname(stats_file))
+
+    seqs = range(first, debugger.seq + 1)
+    relayed = [s for s in seqs if s in debugpy.sent]
+    to_debugpy = [debugpy.received[s] - debugger.written[s] for s in relayed]
+    to_debugger = [debugger.responded[s] - debugpy.sent[s] for s in relayed]
+    round_trip = [debugger.responded[s] - debugger.written[s] for s in seqs]
+    messages = len(exchanges) + sum(len(e['responses']) for e in exchanges)
+
+    return {
+        'scenario': name,
+        'requests': len(exchanges),
+        'answered_by_adapter': len(seqs) - len(relayed),
+        'messages': messages,
+        'seconds': elapsed,
+        'messages_per_second': messages / elapsed,
+        'bytes_to_debugpy': debugger.bytes_written,
+        'bytes_to_debugger': debugpy.bytes_sent,
+        'bytes_copied': bytes_copied,
+        'latency_ms': {
+            hop: {'p50': percentile(values, 50) * 1000, 'p99': percentile(values, 99) * 1000}
+            for hop, values in (('debugger->debugpy', to_debugpy),
+                                ('debugpy->debugger', to_debugger),
+                                ('round trip', round_trip))
+        },
+    }
+
+
+def report(result):
+    print("{scenario}: {requests} requests ({answered_by_adapter} answered by the adapter), "
+          "{messages} messages in {seconds:.2f} s ({messages_per_second:.0f} messages/s)".format(**result))
+    print("    bytes relayed: {:,} to debugpy, {:,} to the debugger".format(
+        result['bytes_to_debugpy'], result['bytes_to_debugger']))
+    print("    bytes copied by the adapter: {:,} ({:.1f} per byte relayed)".format(
+        result['bytes_copied'],
+        result['bytes_copied'] / max(1, result['bytes_to_debugpy'] + result['bytes_to_debugger'])))
+    for hop, latency in result['latency_ms'].items():
+        print("    {:<20} p50 {:8.3f} ms   p99 {:8.3f} ms".format(hop, latency['p50'], latency['p99']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the Nuke adapter's relay.")
+    parser.add_argument('--scenario', default='all', choices=sorted(SCENARIOS) + ['all'])
+    parser.add_argument('--iterations', type=int,
+                        help="times each scenario's requests are repeated (default: {})".format(
+                            ', '.join('{} {}'.format(name, n) for name, n in sorted(ITERATIONS.items()))))
+    parser.add_argument('--window', type=int, default=1, help="requests kept in flight")
+    parser.add_argument('--session', help="replay a recorded session instead of a scenario")
+    parser.add_argument('--adapter', default=join(repo_path, 'adapter'))
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.session:
+        with open(args.session) as f:
+            sessions = [(args.session, json.load(f))]
+    else:
+        names = sorted(SCENARIOS) if args.scenario == 'all' else [args.scenario]
+        sessions = [(name, SCENARIOS[name](args.iterations or ITERATIONS[name])) for name in names]
+
+    results = [run_scenario(name, exchanges, args.adapter, args.window) for name, exchanges in sessions]
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        for result in results:
+            report(result)
+
+
+if __name__ == '__main__':
+    main()